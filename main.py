@@ -2,16 +2,24 @@
 import os
 
 from modules.game_state import GameState
-from modules.constants import TEXT_DIR_PATH, sample_map_data
+from modules.replay import Replay, save_replay
+from modules.terminal import create_terminal
+from modules.constants import TEXT_DIR_PATH, REPLAY_ENV_VAR, sample_map_data
 
 # Main ループ
 def main():
-    game_state = GameState()
-    while game_state.game_state():
-        game_state.step_turn()
+    game_state = GameState(prefetch=True, terminal=create_terminal())  # 次フロアはプレイ中に先読みする. 対応端末では差分描画
+    game_state.print_opening()
+    try:
+        while game_state.game_state():
+            game_state.step_turn()
+    finally:
+        if os.environ.get(REPLAY_ENV_VAR) == "1" and game_state.commands:
+            save_replay(Replay.from_game(game_state))  # 不具合報告用にシードとコマンド列を残す（RECORD_REPLAY=1 の時だけ）
 
 def tmp():
-    game_state = GameState(requires_map_file_path=["map_data/map00.txt"])  # デバッグ用：特定フロア指定
+    game_state = GameState(requires_map_file_path=["map_data/map00.txt"], prefetch=True)  # デバッグ用：特定フロア指定
+    game_state.print_opening()
     while game_state.game_state():
         # command = game_state.read_command()
         # os.system('cls' if os.name == 'nt' else 'clear')  # 画面クリア
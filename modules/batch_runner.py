@@ -0,0 +1,275 @@
+# ==================== バランス調整用バッチ実行 ====================
+# map_data/ の各フロア（およびランダムなフロア抽選）を指定ポリシーで大量に自動プレイし、
+# 勝率・クリアまでのターン数・ゴール時HP・死因を集計する。
+#
+# python -m modules.batch_runner --games 1000 --policy greedy
+import argparse
+import glob
+import importlib
+import json
+import os
+import random
+import sys
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from modules.constants import MAP_DIR_PATH
+from modules.game_state import GameState
+from modules.grid import PATH
+
+RANDOM_RUN_LABEL = "random_run"  # GameState() によるランダム抽選フロアの集計ラベル
+
+
+# ==================== 行動ポリシー ====================
+class RandomPolicy:
+    """ w/a/s/d からランダムに移動する。HPが半分を切ったらポーションを使う """
+    def __init__(self, rng: random.Random) -> None:
+        self.rng = rng
+
+    def __call__(self, game_state: GameState) -> str:
+        player = game_state.player
+        if player.potions and player.hp * 2 < player.MAX_HP:
+            return 'u'
+        return self.rng.choice('wasd')
+
+
+class GreedyPolicy(RandomPolicy):
+    """ 必要な鍵（落ちている鍵・鍵を持つモンスター）-> ゴールの順に最短経路で向かう """
+    def __call__(self, game_state: GameState) -> str:
+        player = game_state.player
+        if player.potions and player.hp * 2 < player.MAX_HP:
+            return 'u'
+
+        floor = game_state.floor
+        targets = set()
+        missing_keys = [key_id for key_id in floor.goal['keys'] if key_id not in player.inventory]
+        for key_id in missing_keys:
+            item = floor.items.get(key_id)
+            if item is not None and not item.picked:
+                targets.add(item.pos)
+        if missing_keys and not targets:  # 鍵を落とすモンスターを狙う
+            for monster in floor.monsters.values():
+                if monster.alive and any(isinstance(drop, dict) and drop.get('id') in missing_keys for drop in monster.drop_list):
+                    targets.add(monster.pos)
+        if not targets:
+            targets = floor.goal['pos']
+
+        command = first_step_towards(game_state, targets)
+        return command if command is not None else self.rng.choice('wasd')
+
+
+# ポリシー名 -> クラス. "package.module:ClassName" 形式でも指定できる
+POLICIES = {
+    "random": RandomPolicy,
+    "greedy": GreedyPolicy,
+}
+
+
+def load_policy(name: str, rng: random.Random):
+    """ ポリシー名からポリシーを生成する。呼び出し可能オブジェクト (game_state) -> command を返す """
+    if name in POLICIES:
+        return POLICIES[name](rng)
+    module_name, _, attr = name.partition(":")
+    if not attr:
+        raise ValueError(f"不明なポリシーです: {name}")
+    policy_class = getattr(importlib.import_module(module_name), attr)
+    return policy_class(rng)
+
+
+def first_step_towards(game_state: GameState, targets: set[tuple[int, int]]) -> str | None:
+    """ プレイヤー位置から targets のいずれかへの最短経路の最初の一手を返す。到達不能なら None """
+    grid = game_state.floor.grid
+    start = grid.index(*game_state.player.position)
+    target_indices = {grid.index(*pos) for pos in targets if grid.in_bounds(*pos)}
+    if start in target_indices:
+        return None
+
+    first_move = {start: None}
+    queue = deque([start])
+    while queue:
+        current = queue.popleft()
+        for command, offset in grid.neighbor_offsets.items():
+            new_index = current + offset
+            if new_index in first_move or grid.cells[new_index] != PATH:
+                continue
+            first_move[new_index] = first_move[current] or command
+            if new_index in target_indices:
+                return first_move[new_index]
+            queue.append(new_index)
+    return None
+
+
+# ==================== 1ゲーム分の実行（ワーカープロセス側） ====================
+def play_game(map_paths: list[str] | None, policy_name: str, seed: int, max_turns: int) -> dict:
+    """
+    1ゲームを最後まで（または max_turns まで）ヘッドレスで実行し、集計用の要約を返す
+    map_paths が None の場合は GameState のランダム抽選でフロアを選ぶ
+    """
+    rng = random.Random(seed)
+    game_state = GameState(requires_map_file_path=map_paths or [], seed=seed)
+    policy = load_policy(policy_name, rng)
+
+    hp_at_goal = []
+    death_cause = None
+    turns = 0
+    while game_state.game_state() and turns < max_turns:
+        result = game_state.step(policy(game_state))
+        turns += 1
+        if result.floor_cleared:
+            hp_at_goal.append(game_state.player.hp)
+        if result.game_over:
+            death_cause = _death_cause(result.events)
+
+    won = game_state.is_game_cleared
+    if not won and death_cause is None:
+        death_cause = "timeout"
+    return {
+        "seed": seed,
+        "won": won,
+        "turns": turns,
+        "floors_cleared": game_state.cleared_count,
+        "hp": game_state.player.hp,
+        "hp_at_goal": hp_at_goal,
+        "death_cause": death_cause,
+    }
+
+
+def _death_cause(events) -> str:
+    """ 最後にダメージを与えたイベントから死因を求める """
+    for event in reversed(events):
+        if event.kind == "battle" and event.data['monster_hits'] > 0:
+            return f"monster:{event.data['monster_id']}"
+        if event.kind == "trap":
+            return f"trap:{event.data['item_id']}"
+        if event.kind == "terrain_damage":
+            return "terrain_damage"
+        if event.kind == "quit":
+            return "quit"
+    return "unknown"
+
+
+def play_chunk(label: str, map_paths: list[str] | None, policy_name: str, seeds: list[int], max_turns: int) -> tuple[str, list[dict]]:
+    """ 複数ゲームをまとめて実行する（プロセス間通信の回数を減らすため） """
+    return label, [play_game(map_paths, policy_name, seed, max_turns) for seed in seeds]
+
+
+# ==================== 集計 ====================
+class FloorStats:
+    """ 1ラベル（フロア or ランダム抽選）分の集計値. 個々のゲーム結果は保持しない """
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.games = 0
+        self.wins = 0
+        self.turns_to_clear_total = 0  # 勝利したゲームのターン数合計
+        self.hp_at_goal_total = 0
+        self.goals = 0  # ゴール到達回数（複数フロアの場合は各フロアで数える）
+        self.death_causes: Counter[str] = Counter()
+
+    def add(self, summary: dict) -> None:
+        self.games += 1
+        if summary["won"]:
+            self.wins += 1
+            self.turns_to_clear_total += summary["turns"]
+        else:
+            self.death_causes[summary["death_cause"]] += 1
+        self.hp_at_goal_total += sum(summary["hp_at_goal"])
+        self.goals += len(summary["hp_at_goal"])
+
+    def to_dict(self) -> dict:
+        return {
+            "label": self.label,
+            "games": self.games,
+            "win_rate": self.wins / self.games if self.games else 0.0,
+            "mean_turns_to_clear": self.turns_to_clear_total / self.wins if self.wins else None,
+            "mean_hp_at_goal": self.hp_at_goal_total / self.goals if self.goals else None,
+            "death_causes": dict(self.death_causes.most_common()),
+        }
+
+
+def run_batch(map_files: list[str], games: int, policy_name: str = "greedy", random_runs: int = 0,
+              workers: int | None = None, max_turns: int = 2000, seed: int = 0, chunk_size: int = 32,
+              on_game=None, on_progress=None) -> dict[str, FloorStats]:
+    """
+    map_files の各フロアを games 回ずつ、GameState のランダム抽選を random_runs 回、プロセスプールで実行する
+    on_game(label, summary): 1ゲーム終わるごとに呼ばれる（JSON Lines 出力など）
+    on_progress(stats, done, total): チャンク完了ごとに呼ばれる
+    実行中のタスク数は workers の2倍までに抑え、結果はその場で集計して捨てる
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = [(path, [path], games) for path in map_files]
+    if random_runs:
+        jobs.append((RANDOM_RUN_LABEL, None, random_runs))
+
+    def iter_tasks():
+        next_seed = seed
+        for label, map_paths, count in jobs:
+            for begin in range(0, count, chunk_size):
+                n = min(chunk_size, count - begin)
+                yield label, map_paths, list(range(next_seed, next_seed + n))
+                next_seed += n
+
+    stats = {label: FloorStats(label) for label, _, _ in jobs}
+    total = sum(count for _, _, count in jobs)
+    done = 0
+    tasks = iter_tasks()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        while True:
+            while len(pending) < workers * 2:
+                task = next(tasks, None)
+                if task is None:
+                    break
+                label, map_paths, seeds = task
+                pending.add(executor.submit(play_chunk, label, map_paths, policy_name, seeds, max_turns))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                label, summaries = future.result()
+                for summary in summaries:
+                    stats[label].add(summary)
+                    if on_game is not None:
+                        on_game(label, summary)
+                done += len(summaries)
+            if on_progress is not None:
+                on_progress(stats, done, total)
+    return stats
+
+
+# ==================== CLI ====================
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="フロアバランス調整用の自動プレイ集計")
+    parser.add_argument("--maps", nargs="*", help="対象マップ（既定: map_data/map0*.txt）")
+    parser.add_argument("--games", type=int, default=100, help="フロアごとのゲーム数")
+    parser.add_argument("--random-runs", type=int, default=0, help="GameState のランダム抽選で遊ぶゲーム数")
+    parser.add_argument("--policy", default="greedy", help=f"{list(POLICIES)} または module:Class")
+    parser.add_argument("--workers", type=int, default=None, help="ワーカープロセス数（既定: CPUコア数）")
+    parser.add_argument("--max-turns", type=int, default=2000, help="1ゲームの最大ターン数")
+    parser.add_argument("--seed", type=int, default=0, help="最初のゲームのシード")
+    parser.add_argument("--chunk-size", type=int, default=32, help="1タスクで実行するゲーム数")
+    parser.add_argument("--jsonl", help="1ゲームごとの結果を書き出す JSON Lines ファイル")
+    args = parser.parse_args(argv)
+
+    map_files = args.maps if args.maps is not None else sorted(glob.glob(MAP_DIR_PATH + "map0*.txt"))
+
+    jsonl_file = open(args.jsonl, 'w', encoding='utf-8') if args.jsonl else None
+
+    def on_game(label: str, summary: dict) -> None:
+        jsonl_file.write(json.dumps({"label": label, **summary}, ensure_ascii=False) + "\n")
+
+    def on_progress(stats: dict[str, FloorStats], done: int, total: int) -> None:
+        print(f"\r{done}/{total} games", end="", file=sys.stderr, flush=True)
+
+    try:
+        stats = run_batch(map_files, args.games, args.policy, args.random_runs, args.workers,
+                          args.max_turns, args.seed, args.chunk_size,
+                          on_game=on_game if jsonl_file else None, on_progress=on_progress)
+    finally:
+        if jsonl_file:
+            jsonl_file.close()
+    print(file=sys.stderr)
+    print(json.dumps([s.to_dict() for s in stats.values()], ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# ==================== 戦闘の一括計算 ====================
+# 戦闘中は双方の攻撃力が変わらないので、1撃ずつ殴り合うループを回さなくても結果は直接求まる。
+#   プレイヤーが先攻。モンスターを倒すのに要る攻撃回数 k = ceil(monster_hp / player_attack)、
+#   プレイヤーが倒れるまでに受けられる攻撃回数 j = ceil(player_hp / monster_attack)
+#   k <= j ならプレイヤーの勝ち（プレイヤー k 回・モンスター k-1 回攻撃）、そうでなければ負け（双方 j 回攻撃）
+# Floor.battle_monster は結果を1件の "battle" イベントにまとめ、
+# 1撃ごとのメッセージは表示する側（TerminalSink）が hit_events() で必要な時だけ作る
+from typing import Iterator
+from modules.events import GameEvent
+
+PLAYER_WINS = 'player'
+MONSTER_WINS = 'monster'
+
+
+def _hits_to_defeat(hp: int, attack: int) -> int | None:
+    """ hp を 0 以下にするのに要る攻撃回数（攻撃力が 0 以下なら倒せないので None） """
+    if attack <= 0:
+        return None
+    return -(-hp // attack)
+
+
+class BattleOutcome:
+    """
+    1回の戦闘の結果
+    player_hits / monster_hits: それぞれが攻撃した回数
+    player_hp / monster_hp: 戦闘後のHP（負の値もそのまま. 従来のループと同じ）
+    winner: 'player' / 'monster'. 戦闘が成立しない・決着しない場合は None
+    """
+    def __init__(self, monster_id: str, player_attack: int, monster_attack: int,
+                 player_hp_before: int, monster_hp_before: int,
+                 player_hits: int, monster_hits: int, winner: str | None) -> None:
+        self.monster_id = monster_id
+        self.player_attack = player_attack
+        self.monster_attack = monster_attack
+        self.player_hp_before = player_hp_before
+        self.monster_hp_before = monster_hp_before
+        self.player_hits = player_hits
+        self.monster_hits = monster_hits
+        self.player_hp = player_hp_before - monster_hits * monster_attack
+        self.monster_hp = monster_hp_before - player_hits * player_attack
+        self.winner = winner
+
+    def __repr__(self):
+        return (f"BattleOutcome(monster_id={self.monster_id}, winner={self.winner}, "
+                f"hits={self.player_hits}/{self.monster_hits}, hp={self.player_hp}/{self.monster_hp})")
+
+    def to_event(self) -> GameEvent:
+        """ 戦闘全体を1件にまとめた "battle" イベント（JSON にそのまま書ける値だけを持つ） """
+        return GameEvent("battle", monster_id=self.monster_id,
+                         player_attack=self.player_attack, monster_attack=self.monster_attack,
+                         player_hp_before=self.player_hp_before, monster_hp_before=self.monster_hp_before,
+                         player_hits=self.player_hits, monster_hits=self.monster_hits,
+                         hp=max(self.player_hp, 0), monster_hp=max(self.monster_hp, 0), winner=self.winner)
+
+
+def resolve_battle(monster_id: str, player_hp: int, player_attack: int,
+                   monster_hp: int, monster_attack: int) -> BattleOutcome:
+    """ 戦闘の結果を O(1) で求める（HP・攻撃力は呼び出し側の値を読むだけで書き換えない） """
+    if player_hp <= 0 or monster_hp <= 0:
+        return BattleOutcome(monster_id, player_attack, monster_attack, player_hp, monster_hp, 0, 0, None)
+
+    k = _hits_to_defeat(monster_hp, player_attack)
+    j = _hits_to_defeat(player_hp, monster_attack)
+    if k is None and j is None:
+        # どちらもダメージを与えられない. 従来のループでは終わらなかったので、戦闘不成立として扱う
+        return BattleOutcome(monster_id, player_attack, monster_attack, player_hp, monster_hp, 0, 0, None)
+    if j is None or (k is not None and k <= j):
+        return BattleOutcome(monster_id, player_attack, monster_attack, player_hp, monster_hp, k, k - 1, PLAYER_WINS)
+    return BattleOutcome(monster_id, player_attack, monster_attack, player_hp, monster_hp, j, j, MONSTER_WINS)
+
+
+def hit_events(data: dict) -> Iterator[GameEvent]:
+    """
+    "battle" イベントの data から、1撃ごとの player_attack / monster_attack イベントを順に作る
+    従来の battle_monster が積んでいたものと同じ内容になる
+    """
+    monster_id = data['monster_id']
+    player_attack = data['player_attack']
+    monster_attack = data['monster_attack']
+    player_hp = data['player_hp_before']
+    monster_hp = data['monster_hp_before']
+    for hit in range(data['player_hits']):
+        monster_hp -= player_attack
+        yield GameEvent("player_attack", monster_id=monster_id, damage=player_attack, monster_hp=max(monster_hp, 0))
+        if hit >= data['monster_hits']:
+            break
+        player_hp -= monster_attack
+        yield GameEvent("monster_attack", monster_id=monster_id, damage=monster_attack, hp=max(player_hp, 0))
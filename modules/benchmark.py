@@ -0,0 +1,287 @@
+# ==================== ベンチマーク ====================
+# 読み込み・描画・ターン処理・経路探索のホットパスを計測し、結果を JSON に保存する。
+# 以前の結果と比較して、しきい値を超えて遅くなったケースを報告する。
+#
+# python -m modules.benchmark --output bench.json
+# python -m modules.benchmark --output new.json --compare bench.json --threshold 0.2
+import argparse
+import glob
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from modules.constants import MAP_DIR_PATH, DIRECTIONS
+from modules.floor import Floor
+from modules.game_state import GameState
+from modules.monster_table import numpy_available
+from modules.monsters import Monster
+from modules.player import Player
+from modules.read_map_data import read_map_data
+
+SYNTHETIC_SIZES = (100, 500, 1000)  # 合成フロアの一辺
+SYNTHETIC_MONSTERS = (10, 1000, 10000)  # 合成フロアのモンスター数
+QUICK_SIZES = (100,)
+QUICK_MONSTERS = (10, 1000)
+
+
+# ==================== ベンチマークケースの登録 ====================
+# name -> (map_file_path -> 計測対象の引数なし関数 | None). None を返したフロアはスキップ
+BENCHMARKS: dict[str, Callable[[str], Callable[[], object] | None]] = {}
+
+
+def benchmark(name: str):
+    """ ベンチマークケースを登録するデコレータ """
+    def register(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return register
+
+
+@benchmark("read_map_data")
+def bench_read_map_data(map_file_path: str):
+    return lambda: read_map_data(map_file_path)
+
+
+@benchmark("floor_init")
+def bench_floor_init(map_file_path: str):
+    return lambda: Floor(map_file_path, use_cache=False)
+
+
+@benchmark("floor_init_cached")
+def bench_floor_init_cached(map_file_path: str):
+    Floor(map_file_path)  # キャッシュを温める
+    return lambda: Floor(map_file_path)
+
+
+@benchmark("print_grid")
+def bench_print_grid(map_file_path: str):
+    floor = Floor(map_file_path)
+    player = Player(floor.start)
+    cells = [floor.start, *floor.grid.passable_cells()][:64]
+    state = {'i': 0}
+
+    def run():
+        state['i'] = (state['i'] + 1) % len(cells)
+        player.position = cells[state['i']]  # 1フレームごとにプレイヤーを動かす
+        floor.print_grid(player, output_file_object=io.StringIO())
+    return run
+
+
+@benchmark("monster_bfs")
+def bench_monster_bfs(map_file_path: str):
+    floor = Floor(map_file_path)
+    monster = Monster("bench", floor.start, "chase")
+    goal = _farthest_cell(floor)
+    return lambda: monster.bfs(floor.start, goal, floor.grid)
+
+
+@benchmark("ice_gimmick_effect")
+def bench_ice_gimmick_effect(map_file_path: str):
+    floor = Floor(map_file_path)
+    if floor.gimmicks is None or not floor.gimmicks.ice_regions:
+        return None
+    gimmicks = floor.gimmicks
+    starts = []
+    for pos in gimmicks.ice_regions:
+        for direction in DIRECTIONS:
+            if len(gimmicks.slide(pos, direction)[1]) > 0:
+                starts.append((pos, direction))
+    if not starts:
+        return None
+    starts.sort()
+    player = Player(starts[0][0])
+    state = {'i': 0}
+
+    def run():
+        state['i'] = (state['i'] + 1) % len(starts)
+        player.position, player.last_move_direction = starts[state['i']]
+        gimmicks.ice_gimmick_effect(player, on_visit=lambda pos: None)
+    return run
+
+
+@benchmark("step")
+def bench_step(map_file_path: str, vectorized_monsters: bool = False):
+    """ 入出力なしの GameState.step 1ターン分. ゲームは終わらせない（作り直しのフロア読み込みを計測に入れない） """
+    rng = random.Random(0)
+    game_state = GameState(requires_map_file_path=[map_file_path], seed=0, sinks=[],
+                           vectorized_monsters=vectorized_monsters)
+    game_state.player.hp = 10 ** 9  # 途中で死なないようにする（ターン処理そのものを測る）
+    game_state.floor.goal = {**game_state.floor.goal, 'pos': set(), 'keys': []}  # ゴールに着かない（判定の処理は残る）
+    if game_state.floor.goal['type'] == 'keys_only':
+        game_state.floor.goal['type'] = 'reach'
+
+    def run():
+        game_state.step(rng.choice('wasd'))
+    return run
+
+
+@benchmark("step_vectorized")
+def bench_step_vectorized(map_file_path: str):
+    if not numpy_available():
+        return None
+    return bench_step(map_file_path, vectorized_monsters=True)
+
+
+def _farthest_cell(floor: Floor) -> tuple[int, int]:
+    """ 開始位置からマンハッタン距離で最も遠い通行可能セル（BFS がほぼ全域を探索するケース用） """
+    start_row, start_col = floor.start
+    return max(floor.grid.passable_cells(), key=lambda pos: abs(pos[0] - start_row) + abs(pos[1] - start_col))
+
+
+# ==================== 合成フロア ====================
+def write_synthetic_floor(directory: str, size: int, n_monsters: int, seed: int = 0) -> str:
+    """
+    一辺 size の合成フロアを directory に書き出し、TXT のパスを返す
+    外周は壁、内部は (偶数, 偶数) セルに柱を置いた格子状の通路（全通路が連結）
+    中央付近の行は氷、モンスターは static / random / chase を均等に配置する
+    """
+    rng = random.Random(seed)
+    name = f"synthetic_{size}x{size}_m{n_monsters}"
+    txt_path = os.path.join(directory, name + ".txt")
+    json_path = os.path.join(directory, name + ".json")
+
+    def passable(row: int, col: int) -> bool:
+        if row in (0, size - 1) or col in (0, size - 1):
+            return False
+        return not (row % 2 == 0 and col % 2 == 0)
+
+    with open(txt_path, 'w', encoding='utf-8') as f:
+        f.write("[grid]\n")
+        for row in range(size):
+            f.write("".join('.' if passable(row, col) else '#' for col in range(size)) + "\n")
+        f.write(f"\n[info]\njson={json_path}\n")
+
+    ai_types = ('static', 'random', 'chase')
+    used = {(1, 1)}
+    monsters = []
+    while len(monsters) < n_monsters:
+        pos = (rng.randrange(1, size - 1), rng.randrange(1, size - 1))
+        if pos in used or not passable(*pos):
+            continue
+        used.add(pos)
+        ai_type = ai_types[len(monsters) % len(ai_types)]
+        monster = {"id": f"M{len(monsters)}", "pos": list(pos), "ai_type": ai_type, "move_every": 1}
+        if ai_type == 'chase':
+            monster["ai_params"] = {"range": 20}
+        monsters.append(monster)
+
+    ice_row = size // 2 | 1  # 奇数行は全セル通路
+    info = {
+        "name": name,
+        "start": [1, 1],
+        "goal": {"type": "reach", "pos": [size - 2, size - 2]},
+        "monsters": monsters,
+        "gimmicks": {"ice": {"regions": [[ice_row, col] for col in range(1, size - 1)]}},
+    }
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(info, f)
+    return txt_path
+
+
+# ==================== 計測 ====================
+def measure(func: Callable[[], object], min_time: float = 0.05, repeat: int = 3) -> float:
+    """ func 1回あたりの実行時間（秒）を返す. 1回の計測が min_time 以上になるよう回数を決め、repeat 回の最小値を取る """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def run_benchmarks(map_files: list[str], name_filter: str = "", min_time: float = 0.05,
+                   on_result: Callable[[str, float], None] | None = None) -> dict[str, float]:
+    """ 全ケース x 全フロアを計測し、{"ケース名[フロア名]": 秒} を返す """
+    results = {}
+    for map_file_path in map_files:
+        floor_name = os.path.splitext(os.path.basename(map_file_path))[0]
+        for name, factory in BENCHMARKS.items():
+            key = f"{name}[{floor_name}]"
+            if name_filter and name_filter not in key:
+                continue
+            func = factory(map_file_path)
+            if func is None:
+                continue
+            results[key] = measure(func, min_time=min_time)
+            if on_result is not None:
+                on_result(key, results[key])
+    return results
+
+
+def compare_results(current: dict[str, float], baseline: dict[str, float], threshold: float) -> list[tuple[str, float, float]]:
+    """ baseline より (1 + threshold) 倍を超えて遅くなったケースを (名前, 旧, 新) のリストで返す """
+    regressions = []
+    for key, seconds in current.items():
+        old = baseline.get(key)
+        if old is not None and seconds > old * (1 + threshold):
+            regressions.append((key, old, seconds))
+    return regressions
+
+
+# ==================== CLI ====================
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="ホットパスのベンチマーク")
+    parser.add_argument("--output", default="bench_output.json", help="結果を書き出す JSON ファイル")
+    parser.add_argument("--compare", help="比較対象（以前の結果）の JSON ファイル")
+    parser.add_argument("--threshold", type=float, default=0.2, help="遅くなったとみなす割合（0.2 = 20%%）")
+    parser.add_argument("--filter", default="", help="ケース名[フロア名] に含まれる文字列で絞り込む")
+    parser.add_argument("--min-time", type=float, default=0.05, help="1回の計測の最短時間（秒）")
+    parser.add_argument("--quick", action="store_true", help="合成フロアを小さいものだけにする")
+    parser.add_argument("--no-synthetic", action="store_true", help="合成フロアを使わない")
+    args = parser.parse_args(argv)
+
+    map_files = sorted(glob.glob(MAP_DIR_PATH + "map0*.txt"))
+    with tempfile.TemporaryDirectory() as directory:
+        if not args.no_synthetic:
+            sizes, monster_counts = (QUICK_SIZES, QUICK_MONSTERS) if args.quick else (SYNTHETIC_SIZES, SYNTHETIC_MONSTERS)
+            for size in sizes:
+                for n_monsters in monster_counts:
+                    if n_monsters < (size - 2) ** 2 // 2:  # 通路に収まる数だけ
+                        map_files.append(write_synthetic_floor(directory, size, n_monsters))
+
+        def on_result(key: str, seconds: float) -> None:
+            print(f"{key:60s} {seconds * 1e6:14.2f} us", file=sys.stderr)
+
+        results = run_benchmarks(map_files, args.filter, args.min_time, on_result)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_results(results, baseline, args.threshold)
+        for key, old, new in regressions:
+            print(f"REGRESSION {key}: {old * 1e6:.2f} us -> {new * 1e6:.2f} us ({new / old - 1:+.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions over {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
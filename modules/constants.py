@@ -3,6 +3,7 @@
 TARGET_CLEAR = 5  # クリア必要フロア数
 TOTAL_FLOORS = 8  # 有効な総フロア数
 DIRECTIONS = {'w': (-1,0), 's': (1,0), 'a': (0, -1), 'd': (0,1)}  # 移動方向
+COMMANDS = ('w', 'a', 's', 'd', 'u', 'q', 'r')  # 受け付けるコマンド
 TILE_SYMBOLS = {
     '#': 'Wall',
     '.': 'Path',
@@ -17,5 +18,8 @@ TILE_SYMBOLS = {
 
 MAP_DIR_PATH = "map_data/"
 TEXT_DIR_PATH = "game_texts/"
+FLOOR_CACHE_DIR = ".cache/floors/"  # 解析済みフロアのキャッシュ置き場
+REPLAY_LOG_PATH = ".cache/replays.jsonl"  # 対話プレイのリプレイ記録（modules/replay.py）
+REPLAY_ENV_VAR = "RECORD_REPLAY"  # この環境変数が 1 の時だけ main.py がリプレイを記録する
 
 sample_map_data = MAP_DIR_PATH + "sample01.txt"
\ No newline at end of file
@@ -0,0 +1,91 @@
+# ==================== イベント出力先 ====================
+# GameState.step が1ターン分のイベント（TurnResult.events）を溜め、GameState.emit がここの出力先にまとめて流す。
+#   TerminalSink: 画面表示用の文字列に整形して1ターンにつき1回だけ書き込む
+#   JsonLinesSink: 1ターン1行の JSON Lines で記録する（整形なし）
+#   NullSink: 何もしない（シミュレーション用）
+import json
+import sys
+from typing import TextIO
+
+from modules.constants import TEXT_DIR_PATH
+from modules.battle import hit_events
+from modules.events import TurnResult
+
+ENDING_TEXT_PATH = TEXT_DIR_PATH + "Ending.txt"
+
+
+def turn_record(result: TurnResult) -> dict:
+    """ 1ターン分を JSON にできる辞書にする（集合は json.dumps の default=list で配列になる） """
+    return {
+        "turn": result.turn,
+        "command": result.command,
+        "hp_delta": result.hp_delta,
+        "events": [{"kind": event.kind, **event.data} for event in result.events],
+    }
+
+
+class EventSink:
+    """ イベント出力先の基底クラス. write_turn で1ターン分を受け取る """
+    def write_turn(self, result: TurnResult) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """ 後始末（ファイルを閉じるなど）. 何もしなくてよければオーバーライド不要 """
+
+
+class NullSink(EventSink):
+    """ 何も出力しない """
+    def write_turn(self, result: TurnResult) -> None:
+        pass
+
+
+class TerminalSink(EventSink):
+    """ イベントを表示用メッセージに整形し、1ターン分をまとめて stream に1回で書き込む """
+    def __init__(self, stream: TextIO | None = None) -> None:
+        self.stream = stream  # None なら書き込み時点の sys.stdout
+
+    def format_turn(self, result: TurnResult) -> str:
+        """ 1ターン分の表示文字列を作る """
+        parts = []
+        for event in result.events:
+            if event.kind == "show_rule" or event.kind == "floor_started":
+                parts.append(f"\n{event.data['rule']}\n\n\n")  # マップごとのルール説明
+            elif event.kind == "game_cleared":
+                with open(ENDING_TEXT_PATH, 'r', encoding='utf-8') as f:
+                    ending = f.read()
+                parts.append(f"\n\n\n\n{ending}\nCongratulations on clearing the game!\n")
+            elif event.kind == "battle":
+                parts.extend(hit.message() + "\n" for hit in hit_events(event.data))  # 1撃ごとのログに展開
+            else:
+                message = event.message()
+                if message:
+                    parts.append(message + "\n")
+        return "".join(parts)
+
+    def write_turn(self, result: TurnResult) -> None:
+        text = self.format_turn(result)
+        if text:
+            stream = self.stream if self.stream is not None else sys.stdout
+            stream.write(text)
+            stream.flush()
+
+
+class JsonLinesSink(EventSink):
+    """
+    1ターンを1行の JSON で書き込む
+    {"turn": 12, "command": "w", "hp_delta": -10, "events": [{"kind": "trap", "item_id": "T1", ...}, ...]}
+    """
+    def __init__(self, path: str | None = None, stream: TextIO | None = None) -> None:
+        if (path is None) == (stream is None):
+            raise ValueError("path と stream のどちらか一方を指定してください。")
+        self._owns_stream = stream is None
+        self.stream = stream if stream is not None else open(path, 'a', encoding='utf-8')
+
+    def write_turn(self, result: TurnResult) -> None:
+        self.stream.write(json.dumps(turn_record(result), ensure_ascii=False, default=list) + "\n")
+
+    def close(self) -> None:
+        if self._owns_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
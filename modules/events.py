@@ -0,0 +1,72 @@
+# ==================== ゲームイベント ====================
+
+# イベント種別ごとの表示メッセージ. テンプレートが無い種別は画面に表示しない
+EVENT_MESSAGES = {
+    "item_picked": "アイテム {item_id} ({item_type}) を取得しました。",
+    "trap": "罠にかかりました！ {damage} のダメージを受けました。",
+    "weapon_equipped": "{weapon_id} に持ち替えた。攻撃力は {attack} になった。",
+    "weapon_ignored": "{weapon_id} を拾ったが、すでに装備中の武器の方が強い。",
+    "terrain_damage": "足元のダメージ床で {damage} ダメージを受けた！ (残りHP: {hp})",
+    "potion_used": "ポーション {potion_id} を使用しました。",
+    "no_potion": "使用可能なポーションがありません！",
+    "blocked": "その方向には移動できません！",
+    "battle_start": "モンスター {monster_id} と遭遇しました！戦闘開始！",
+    "player_attack": "あなたの攻撃！ モンスター {monster_id} に {damage} のダメージ！ (残りHP: {monster_hp})",
+    "monster_attack": "モンスター {monster_id} の攻撃！ あなたは {damage} のダメージを受けました！ (残りHP: {hp})",
+    "battle": "モンスター {monster_id} との戦闘: {player_hits} 回攻撃し、{monster_hits} 回攻撃を受けました。 (残りHP: {hp})",
+    "monster_defeated": "モンスター {monster_id} を倒しました！",
+    "player_defeated": "あなたは倒されてしまいました...",
+    "goal_message": "{message}",
+    "floor_cleared": "ゴールに到達しました！フロアクリア！",
+    "floor_remaining": "フロアクリア！ 残り {remaining} 層です。",
+    "game_over": "あなたは力尽きました。ゲームオーバーです。",
+    "quit": "ゲーム終了します。",
+}
+
+
+class GameEvent:
+    """
+    ゲーム中に起きた出来事1件分
+    kind: イベント種別（EVENT_MESSAGES のキーなど）
+    data: 種別ごとの付加情報（monster_id, damage など）
+    """
+    def __init__(self, kind: str, **data) -> None:
+        self.kind = kind
+        self.data = data
+
+    def __repr__(self):
+        return f"GameEvent(kind={self.kind}, data={self.data})"
+
+    def message(self) -> str:
+        """ 表示用メッセージを返す。表示しない種別は空文字 """
+        template = EVENT_MESSAGES.get(self.kind)
+        if template is None:
+            return ""
+        return template.format(**self.data)
+
+
+class TurnResult:
+    """
+    GameState.step の返り値. 1ターン分の結果
+    command: 実行したコマンド
+    turn: ターン番号（GameState.turn_count）
+    events: ターン中に発生したイベント列
+    hp_delta: ターン開始時からのHP変化量
+    moved: プレイヤーが移動できたかどうか
+    floor_cleared / game_over / game_cleared: ターン終了時点の判定
+    """
+    def __init__(self, command: str, events: list[GameEvent], hp_delta: int = 0, moved: bool = False,
+                 floor_cleared: bool = False, game_over: bool = False, game_cleared: bool = False, turn: int = 0) -> None:
+        self.command = command
+        self.turn = turn
+        self.events = events
+        self.hp_delta = hp_delta
+        self.moved = moved
+        self.floor_cleared = floor_cleared
+        self.game_over = game_over
+        self.game_cleared = game_cleared
+
+    def __repr__(self):
+        return (f"TurnResult(command={self.command}, turn={self.turn}, hp_delta={self.hp_delta}, moved={self.moved}, "
+                f"floor_cleared={self.floor_cleared}, game_over={self.game_over}, "
+                f"game_cleared={self.game_cleared}, events={self.events})")
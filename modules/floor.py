@@ -1,56 +1,20 @@
 # ==================== フロアクラス ====================
-import json
+import random
+from collections import deque
+from modules.battle import resolve_battle, PLAYER_WINS, MONSTER_WINS
+from modules.events import GameEvent
+from modules.grid import Grid, PATH
 from modules.items import Item
 from modules.objects import Door, Chest, Teleport, Gimmicks
 from modules.player import Player
 from modules.monsters import Monster
-from modules.read_map_data import read_map_data
-
-# マップを表示する際のシンボル定義 半角
-ENTITY_SYMBOLS = {
-    "player": "@",
-    "goal": "G",
-    "path": " ",
-    "wall": "■",
-    "weapon": "W",
-    "potion": "P",
-    "key": "K",
-    "trap": "!",
-    "monster": "M",
-    "opened_door": "/",
-    "closed_door": "D",
-    "closed_chest": "C",
-    "opened_chest": " ",
-    "teleport": "T",
-    "hidden_item": "?",
-}
-
-# マップを表示する際のシンボル定義 全角
-ENTITY_SYMBOLS_FULL_WIDTH = {
-    "player": "🧍",
-    "goal": "🚩",
-    "path": "　",
-    "wall": "🔳",
-    "weapon": "🗡️ ", 
-    "potion": "🧪",
-    "key": "🔑",
-    "trap": "💥",
-    "monster": "👾",
-    "monster_weak": "🐁",  # ここ
-    "monster_normal": "👾",
-    "monster_strong": "🐉",
-    "opened_door": "　",
-    "closed_door": "🚪",
-    "closed_chest": "🧰",
-    "opened_chest": "　",
-    "teleport": "🔯",
-    "hidden_item": "❓",
-}
+from modules.floor_cache import load_compiled_floor, compile_floor
+from modules.renderer import ENTITY_SYMBOLS, ENTITY_SYMBOLS_FULL_WIDTH, FloorRenderer
 
 class Floor:
     """
     map_txt から読み込んだ1フロア分の全データ（grid以外はJSONから供給）
-    grid: 2次元リスト（#と.のみ）
+    grid: Grid（#と.のみ. 行優先のフラット配列）
     json_path: JSONデータのパス
     以下はJSONで与える:
         name, reveal_hidden, start, goal, goal.type/keys
@@ -58,23 +22,21 @@ class Floor:
     
     フロア内のイベント処理はここで行う。
     """
-    def __init__(self, map_file_path: str, specific_json_path: str = "", floor_id: str = "-1") -> None:
+    def __init__(self, map_file_path: str, specific_json_path: str = "", floor_id: str = "-1", use_cache: bool = True,
+                 rng: random.Random | None = None) -> None:
         self.floor_id = floor_id  # フロアID（任意指定）
+        self.rng = rng if rng is not None else random.Random()  # フロア内の乱数（モンスターのステータス・移動、武器の攻撃力）
 
-        # ===== マップ読み込み =====
-        self.grid, self.json_path = read_map_data(map_file_path)
-        self.map_size = (len(self.grid), len(self.grid[0]))  # (n_rows, n_cols)
-        self.movable_cells = set()  # 通行可能セル集合
-        for i in range(self.map_size[0]):
-            for j in range(self.map_size[1]):
-                if self.grid[i][j] == '.':
-                    self.movable_cells.add((i, j))
-
-        # ===== JSONデータ読み込み =====
-        if specific_json_path or self.json_path:
-            self.info = self._read_json_data(specific_json_path or self.json_path)  # specific_json_path が優先
+        # ===== マップ・JSONデータ読み込み =====
+        # 解析済みデータ（grid, JSON, ゴール, ギミック領域）はキャッシュから取得し、同じフロアの Floor 間で共有する
+        if use_cache:
+            self.compiled = load_compiled_floor(map_file_path, specific_json_path)
         else:
-            raise ValueError("JSONデータのパスが指定されていません。")
+            self.compiled = compile_floor(map_file_path, specific_json_path)
+        self.grid = self.compiled.grid
+        self.json_path = self.compiled.json_path
+        self.map_size = (self.grid.n_rows, self.grid.n_cols)  # (n_rows, n_cols)
+        self.info = self.compiled.info
 
         self.name = self.info.get('name', f"Floor {floor_id}")  # フロア名
         self.reveal_hidden = self.info.get('reveal_hidden', False)  # 隠しアイテム自動発見
@@ -104,39 +66,44 @@ class Floor:
         self.teleports: dict[str, Teleport] = {}
         self._teleports_init()
 
-        # # ===== ギミック =====
-        self.gimmick: Gimmicks | None = None
+        # ===== ギミック =====
+        self.gimmicks: Gimmicks | None = None
         self._gimmicks_init()
 
         # ===== ルール =====
         self.rule = ""
         self._rules_init()
 
-    # ===== JSONデータ読み込み =====
-    def _read_json_data(self, json_path: str) -> dict:
-        """ JSONデータを読み込み、辞書で返す。 """
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data
-    
-    # ===== ゴール情報初期化 =====
-    def _goal_init(self):  # TODO: key_only未対応
-        goal = self.info.get('goal', {})
+        # ===== 位置インデックス（位置 -> そのセル上のエンティティ） =====
+        self.items_at: dict[tuple[int, int], list[Item]] = {}  # 未回収アイテム
+        self.monsters_at: dict[tuple[int, int], list[Monster]] = {}  # 生存モンスター
+        self.doors_at: dict[tuple[int, int], Door] = {}
+        self.chests_at: dict[tuple[int, int], Chest] = {}
+        self.teleports_at: dict[tuple[int, int], Teleport] = {}  # 起動セル（双方向なら両端）
+        self._position_index_init()
 
-        # ゴール方法のタイプ. "reach" | "keys_only" | "reach_and_keys"
-        self.goal['type'] = goal.get('type', 'reach')
+        # ===== 描画・観測 =====
+        self._renderers: dict[bool, FloorRenderer] = {}  # full_width -> 差分描画器（get_renderer で作る）
+        self.observation = None  # FloorObservation（学習用の観測テンソル. observation_view で作る）
+        self._dirty_sets: list[set[tuple[int, int]]] = []  # 描画器・観測の dirty_cells（mark_cell_changed が積む）
 
-        # 複数のゴール. trueの場合 pos が2次元リストで渡される
-        self.goal['multiple'] = goal.get('multiple', False)  
+        # ===== イベント =====
+        self.events: list[GameEvent] = []  # フロア内で発生したイベント（GameState がターンごとに差し替える）
 
-        # ゴールの位置. type=reach または reach_and_keys で使用
-        if self.goal['multiple'] is False:
-            self.goal['pos'] = set([tuple(goal.get('pos', (0, 0)))])
-        else:
-            self.goal['pos'] = set(tuple(p) for p in goal.get('pos', []))
-        
-        # ゴールに必要なkeyのid. type=keys_only または reach_and_keys で使用
-        self.goal['keys'] = list(goal.get('keys', []))
+        # ===== 追跡用距離マップ =====
+        self._distance_field = None  # プレイヤーからの距離（Grid の index 空間の配列）
+        self._distance_field_key = None  # 距離マップを計算したときのプレイヤー位置（地形はフロア中変わらない）
+
+        # ===== モンスター表（NumPy 一括更新. enable_monster_table で作る） =====
+        self.monster_table = None
+
+        # ===== ターン計測 =====
+        self.instrumentation = None  # TurnInstrumentation（GameState.start_floor が設定. None なら計測しない）
+
+    # ===== ゴール情報初期化 =====
+    def _goal_init(self):
+        # type / multiple / pos / keys は floor_cache.normalize_goal で正規化済み（読み取り専用で共有）
+        self.goal = self.compiled.goal
 
     # ===== アイテム情報初期化 =====
     def _items_init(self):
@@ -149,8 +116,12 @@ class Floor:
     def _monsters_init(self):
         monsters_data = self.info.get('monsters', [])
         for monster_data in monsters_data:
-            monster = Monster(**monster_data)
+            monster = Monster(**monster_data, rng=self.rng)
             self.monsters[monster.id] = monster
+
+        # 距離マップの探索打ち切り距離. range 未指定の追跡モンスターがいれば打ち切らない
+        chase_ranges = [m.ai_params.get('range') for m in self.monsters.values() if m.ai_type == 'chase']
+        self.chase_range_limit: int | None = None if (not chase_ranges or None in chase_ranges) else max(chase_ranges)
     
     # ===== ドア情報初期化 =====
     def _doors_init(self):
@@ -175,13 +146,32 @@ class Floor:
 
     # ===== ギミック情報初期化 =====
     def _gimmicks_init(self):
-        gimmicks_data = self.info.get('gimmicks')
-        if isinstance(gimmicks_data, dict) and gimmicks_data:
-            self.gimmicks = Gimmicks(grid=self.grid, moveable_cells=self.movable_cells, params=gimmicks_data)
-        else:
-            self.gimmicks = None
+        # ギミックは状態を持たないので、解析済みのものを共有する
+        self.gimmicks = self.compiled.gimmicks
 
 
+    # ===== 位置インデックス初期化 =====
+    def _position_index_init(self):
+        for item in self.items.values():
+            if not item.picked:
+                self.items_at.setdefault(item.pos, []).append(item)
+        for monster in self.monsters.values():
+            if monster.alive:
+                self.monsters_at.setdefault(monster.pos, []).append(monster)
+        for door in self.doors.values():
+            self.doors_at.setdefault(door.pos, door)
+        for chest in self.chests.values():
+            self.chests_at.setdefault(chest.pos, chest)
+        for tp in self.teleports.values():  # 同じセルに複数ある場合は先に定義された方が優先
+            self.teleports_at.setdefault(tp.source, tp)
+            if tp.bidirectional:
+                self.teleports_at.setdefault(tp.target, tp)
+
+    @property
+    def movable_cells(self) -> frozenset[tuple[int, int]]:
+        """ 通行可能セル集合（大きなマップでは重いので、必要になった時だけ作る） """
+        return self.compiled.movable_cells
+
     def _rules_init(self):
         self.rule = self.info.get('rule', "")
 
@@ -209,42 +199,6 @@ class Floor:
         print("Teleports:")
         print(self.teleports)
 
-    # ===== マップ上のシンボル収集 =====
-    def _collect_entity_symbols(self, full_width = True) -> dict[tuple[int, int], str]:
-        """ マップ上のアイテム・モンスター・ギミックのシンボルを収集し、位置とシンボルの辞書を返す """
-        symbol_map = ENTITY_SYMBOLS_FULL_WIDTH if full_width else ENTITY_SYMBOLS
-
-        symbols: dict[tuple[int, int], str]= {}  # 位置: シンボルのタイプ
-        # items
-        for item in self.items.values():
-            if item.picked:  # 回収済みアイテム
-                continue
-            if item.hidden and self.reveal_hidden:  # 未発見の隠しアイテム
-                symbols[item.pos] = "hidden_item"
-            else:
-                symbols[tuple(item.pos)] = item.type
-
-        # monsters
-        for monster in self.monsters.values():
-            if monster.alive:
-                monster_strength_key = f"monster_{monster.strength}"
-                symbols[monster.pos] = monster_strength_key if (monster_strength_key in symbol_map) else "monster"
-
-        # doors
-        for door in self.doors.values():
-            symbols[door.pos] = "opened_door" if door.opened else "closed_door"
-
-        # chests
-        for chest in self.chests.values():
-            symbols[chest.pos] = "opened_chest" if chest.opened else "closed_chest"
-
-        # teleports
-        for tp in self.teleports.values():
-            symbols[tp.source] = "teleport"
-            if tp.bidirectional:
-                symbols[tp.target] = "teleport"
-        return symbols
-
     # ===== マップ表示 =====
     def print_grid(self, player: Player = None, output_file_object = None, full_width: bool = True) -> str:
         """
@@ -256,51 +210,106 @@ class Floor:
         返り値: 
             出力したマップ文字列
         """
-        entity_symbols = self._collect_entity_symbols()
-        symbol_map = ENTITY_SYMBOLS_FULL_WIDTH if full_width else ENTITY_SYMBOLS
-        output = ""  # 出力用文字列
-
-        for i in range(self.map_size[0]):
-            row = []
-            for j in range(self.map_size[1]):
-                pos = (i, j)
-                if player is not None and pos == player.position:  # プレイヤー位置
-                    symbol = symbol_map["player"]
-                # elif pos == self.start:  # スタート位置
-                #     symbol = 'S'  # TODO: もしかしたらいらないかも？
-                elif pos in self.goal['pos']:  # ゴール位置
-                    symbol = symbol_map["goal"]
-                elif pos in entity_symbols:  # アイテム・モンスター・ギミック
-                    symbol = symbol_map[entity_symbols[pos]]
-                elif self.grid[i][j] == '.':  # 通路
-                    symbol = symbol_map["path"]
-                else:
-                    symbol = symbol_map["wall"]  # 壁
-                
-                row.append(symbol)
-
-            output += "".join(row) + "\n"
-
+        output = self.get_renderer(full_width).render(player.position if player is not None else None)
         print(output, file=output_file_object)
         return output
 
+    def get_renderer(self, full_width: bool = True) -> FloorRenderer:
+        """ シンボル幅ごとの差分描画器を返す（初回のみ静的レイヤを構築） """
+        renderer = self._renderers.get(full_width)
+        if renderer is None:
+            renderer = FloorRenderer(self, full_width)
+            self._renderers[full_width] = renderer
+            self._dirty_sets.append(renderer.dirty_cells)
+        return renderer
+
+    def observation_view(self):
+        """
+        観測テンソル (N_CHANNELS, 行数, 列数) の読み取り専用ビュー（コピーしない. modules/observation.py）
+        初回に全体を作り、以後は変わったセルだけ書き直す. player チャネルは立てない. numpy が必要
+        """
+        if self.observation is None:
+            from modules.observation import FloorObservation
+            self.observation = FloorObservation(self)
+            self._dirty_sets.append(self.observation.dirty_cells)
+        return self.observation.update()
+
+    def mark_cell_changed(self, pos: tuple[int, int]) -> None:
+        """ セル上のエンティティが変わったことを描画器・観測に知らせる（ドア・チェストの開閉時などにも呼ぶ） """
+        for dirty_cells in self._dirty_sets:
+            dirty_cells.add(pos)
+
+
+    # ==================== 位置インデックスの更新 ====================
+    # エンティティの位置や状態を変えるときは必ずこれらを通す（items_at / monsters_at が古くならないように）
+    def move_monster(self, monster: Monster, new_pos: tuple[int, int]) -> None:
+        """ モンスターを移動させ、位置インデックスを更新する """
+        self._unindex_monster(monster)
+        monster.pos = new_pos
+        self.monsters_at.setdefault(new_pos, []).append(monster)
+        self.mark_cell_changed(new_pos)
+
+    def move_monsters(self, moves) -> None:
+        """ (monster, new_pos) の列をまとめて移動させる（MonsterTable の書き戻し用. move_monster と同じ結果） """
+        monsters_at = self.monsters_at
+        changed = []
+        for monster, new_pos in moves:
+            old_pos = monster.pos
+            monsters = monsters_at.get(old_pos)
+            if monsters and monster in monsters:
+                monsters.remove(monster)
+                if not monsters:
+                    del monsters_at[old_pos]
+                changed.append(old_pos)
+            monster.pos = new_pos
+            monsters = monsters_at.get(new_pos)
+            if monsters is None:
+                monsters_at[new_pos] = [monster]
+            else:
+                monsters.append(monster)
+            changed.append(new_pos)
+        for dirty_cells in self._dirty_sets:
+            dirty_cells.update(changed)
+
+    def _unindex_monster(self, monster: Monster) -> None:
+        monsters = self.monsters_at.get(monster.pos)
+        if monsters and monster in monsters:
+            monsters.remove(monster)
+            if not monsters:
+                del self.monsters_at[monster.pos]
+            self.mark_cell_changed(monster.pos)
+
+    def _pick_item(self, item: Item) -> None:
+        """ アイテムを回収済みにし、位置インデックスから外す """
+        item.picked = True
+        items = self.items_at.get(item.pos)
+        if items and item in items:
+            items.remove(item)
+            if not items:
+                del self.items_at[item.pos]
+            self.mark_cell_changed(item.pos)
 
     # ==================== イベント処理 ====================
     def _handle_cell_items(self, player: Player, cell_pos: tuple[int, int]) -> None:
-        for item in self.items.values():
-            if item.picked or item.pos != cell_pos:
-                continue  # 位置が違うか、既に回収済み
+        items = self.items_at.get(cell_pos)
+        if not items:
+            return
+        if self.instrumentation is not None:
+            self.instrumentation.count('entities_scanned', len(items))
 
+        for item in list(items):  # 回収で items が変わるのでコピーして回す
             if item.hidden and not self.reveal_hidden:
                 continue  # 隠しアイテムは発見されない
 
             if item.type in ('trap', 'weapon'):  # 罠・武器の即時効果適用
-                item.apply_effect(player)
-                item.picked = True
+                event = item.apply_effect(player, self.rng)
+                self._pick_item(item)
+                if event is not None:
+                    self.events.append(event)
             else:
                 player.add_item(item)
-                item.picked = True
-                print(f"アイテム {item.id} ({item.type}) を取得しました。")
+                self._pick_item(item)
+                self.events.append(GameEvent("item_picked", item_id=item.id, item_type=item.type))
 
     # ===== 踏んだ瞬間の処理 を一括で行う =====
     def enter_cell(self, player: Player) -> None:
@@ -314,15 +323,110 @@ class Floor:
             if self.gimmicks:  # ダメージ床
                 damage = self.gimmicks.apply_terrain_damage(player, pos)
                 if damage:
-                    print(f"足元のダメージ床で {damage} ダメージを受けた！ (残りHP: {player.hp})")
+                    self.events.append(GameEvent("terrain_damage", damage=damage, hp=player.hp))
         
         # テレポート
-        for teleport in self.teleports.values():
+        teleport = self.teleports_at.get(player.position)
+        if teleport is not None:
             new_pos = teleport.get_destination(player.position)
-            if new_pos is not None:
-                player.position = teleport.get_destination(player.position)
-                break
+            self.events.append(GameEvent("teleport", teleport_id=teleport.id, source=player.position, target=new_pos))
+            player.position = new_pos
+
+
+    # ===== 複製（先読み・木探索用） =====
+    def clone(self) -> 'Floor':
+        """
+        状態だけを複製した Floor を返す（GameState.clone が使う）
+        grid・ゴール・ギミック・テレポート・ルールなど変わらないデータは共有し、
+        乱数・未回収アイテム・生存モンスター・ドア・宝箱と位置インデックスだけを作り直す
+        回収済みアイテムと倒したモンスターはもう変わらないので共有する. 描画器と観測テンソルは持ち越さない
+        """
+        floor = Floor.__new__(Floor)
+        floor.__dict__.update(self.__dict__)
+        floor.rng = random.Random.__new__(random.Random)  # OS の乱数で初期化しない（状態はすぐ上書きする）
+        floor.rng.setstate(self.rng.getstate())
 
+        # id(元のオブジェクト) -> 複製. 同じ ID のエンティティが複数あっても取り違えないようにオブジェクトで対応づける
+        copies = {}
+        for item in self.items.values():
+            if not item.picked:
+                copies[id(item)] = item.copy()
+        for items in self.items_at.values():
+            for item in items:
+                if id(item) not in copies:
+                    copies[id(item)] = item.copy()
+        for monster in self.monsters.values():
+            if monster.alive:
+                copies[id(monster)] = monster.copy(floor.rng)
+        for monsters in self.monsters_at.values():
+            for monster in monsters:
+                if id(monster) not in copies:
+                    copies[id(monster)] = monster.copy(floor.rng)
+        for entity in (*self.doors.values(), *self.doors_at.values(), *self.chests.values(), *self.chests_at.values()):
+            if id(entity) not in copies:
+                copies[id(entity)] = entity.copy()
+        floor.items = {item_id: copies.get(id(item), item) for item_id, item in self.items.items()}
+        floor.monsters = {monster_id: copies.get(id(monster), monster) for monster_id, monster in self.monsters.items()}
+        floor.doors = {door_id: copies[id(door)] for door_id, door in self.doors.items()}
+        floor.chests = {chest_id: copies[id(chest)] for chest_id, chest in self.chests.items()}
+
+        # 位置インデックスは順序（拾う順・戦う順）ごと写す
+        floor.items_at = {pos: [copies[id(item)] for item in items] for pos, items in self.items_at.items()}
+        floor.monsters_at = {pos: [copies[id(monster)] for monster in monsters] for pos, monsters in self.monsters_at.items()}
+        floor.doors_at = {pos: copies[id(door)] for pos, door in self.doors_at.items()}
+        floor.chests_at = {pos: copies[id(chest)] for pos, chest in self.chests_at.items()}
+
+        floor._renderers = {}
+        floor.observation = None
+        floor._dirty_sets = []
+        floor.events = []
+        floor.instrumentation = None
+        if self.monster_table is not None:
+            floor.monster_table = self.monster_table.clone(floor, copies)
+        return floor
+
+    # ===== モンスター表 =====
+    def enable_monster_table(self):
+        """ モンスターの移動を NumPy の一括更新（MonsterTable）に切り替える. numpy が必要 """
+        from modules.monster_table import MonsterTable
+        self.monster_table = MonsterTable(self)
+        return self.monster_table
+
+    # ===== 追跡用距離マップ =====
+    def player_distance_field(self, player_pos: tuple[int, int]):
+        """
+        プレイヤー位置からの逆方向BFSによる距離マップを返す
+        返り値: Grid の index 空間の int 配列（grid.index(row, col) で引く）. 到達不能・探索範囲外は -1
+        プレイヤーが動いた時だけ再計算し、全追跡モンスターで共有する（grid はフロア中変わらない）
+        """
+        key = player_pos
+        if self._distance_field_key == key:
+            return self._distance_field
+
+        cells = self.grid.cells
+        offsets = self.grid.neighbor_offset_list
+        limit = self.chase_range_limit
+        distance = self.grid.new_index_array(-1)
+        start = self.grid.index(*player_pos)
+        distance[start] = 0
+        queue = deque([start])
+        while queue:
+            index = queue.popleft()
+            d = distance[index] + 1
+            if limit is not None and d > limit:
+                continue  # 射程外は探索しない
+            for offset in offsets:
+                new_index = index + offset
+                if distance[new_index] != -1 or cells[new_index] != PATH:
+                    continue  # 訪問済み or 通路でない（外周は壁なので範囲チェック不要）
+                distance[new_index] = d
+                queue.append(new_index)
+
+        if self.instrumentation is not None:
+            self.instrumentation.count('bfs_nodes', sum(1 for d in distance if d != -1))
+        self._distance_field = distance
+        self._distance_field_key = key
+        return distance
 
     # # ===== モンスターとの遭遇判定 =====
     # def check_monster_encounter(self, player: 'Player') -> Monster | None:
@@ -337,29 +441,33 @@ class Floor:
         """ プレイヤーとモンスターの戦闘処理 """
         # print(f"モンスター {monster.id} と遭遇しました！ 戦闘開始！")
 
-        while player.hp > 0 and monster.hp > 0:
-            # プレイヤーの攻撃
-            monster.hp -= player.attack
-            print(f"あなたの攻撃！ モンスター {monster.id} に {player.attack} のダメージ！ (残りHP: {max(monster.hp, 0)})")
-            if monster.hp <= 0:
-                monster.alive = False
-                print(f"モンスター {monster.id} を倒しました！")
-                
-                # ドロップアイテム処理
-                for drop_item in monster.drop_list:
-                    item = Item.create_item(**drop_item)  # Itemオブジェクト生成
-                    if item.type == 'trap' or item.type == 'weapon':  # 即時効果適用アイテム
-                        item.apply_effect(player)
-                    else:
-                        player.add_item(Item.create_item(**drop_item))  # 鍵, ポーションはインベントリに追加
-                break
-
-            # モンスターの攻撃
-            player.hp -= monster.attack
-            print(f"モンスター {monster.id} の攻撃！ あなたは {monster.attack} のダメージを受けました！ (残りHP: {max(player.hp, 0)})")
-            if player.hp <= 0:
-                print("あなたは倒されてしまいました...")
-                break
+        self.events.append(GameEvent("battle_start", monster_id=monster.id))
+
+        # 殴り合いの結果は一括で求め、1撃ごとのログは "battle" イベントから表示側で展開する（modules/battle.py）
+        outcome = resolve_battle(monster.id, player.hp, player.attack, monster.hp, monster.attack)
+        player.hp = outcome.player_hp
+        monster.hp = outcome.monster_hp
+        if outcome.player_hits:
+            self.events.append(outcome.to_event())
+
+        if outcome.winner == PLAYER_WINS:
+            monster.alive = False
+            self._unindex_monster(monster)
+            if self.monster_table is not None:
+                self.monster_table.mark_dead(monster)
+            self.events.append(GameEvent("monster_defeated", monster_id=monster.id))
+
+            # ドロップアイテム処理
+            for drop_item in monster.drop_list:
+                item = Item.create_item(**drop_item)  # Itemオブジェクト生成
+                if item.type == 'trap' or item.type == 'weapon':  # 即時効果適用アイテム
+                    event = item.apply_effect(player, self.rng)
+                    if event is not None:
+                        self.events.append(event)
+                else:
+                    player.add_item(item)  # 鍵, ポーションはインベントリに追加
+        elif outcome.winner == MONSTER_WINS:
+            self.events.append(GameEvent("player_defeated", monster_id=monster.id))
 
     # def generate_drop_items(self, monster: 'Monster') -> list[Item]:
     #     """ モンスター撃破時のドロップアイテムリストを生成する """
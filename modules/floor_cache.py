@@ -0,0 +1,159 @@
+# ==================== 解析済みフロアのキャッシュ ====================
+# map TXT + JSON を解析した結果（grid, ゴール, エンティティ表, ギミック領域）を
+# プロセス内メモリと .cache/floors/ の pickle にキャッシュする。
+# キーは元ファイルのパス・サイズ・更新時刻で、どちらかが変わると自動で作り直す。
+import hashlib
+import json
+import os
+import pickle
+from functools import cached_property
+
+from modules.constants import FLOOR_CACHE_DIR
+from modules.grid import Grid
+from modules.objects import Gimmicks
+from modules.read_map_data import read_map_data
+
+CACHE_VERSION = 2  # CompiledFloor の形式を変えたら上げる（古いキャッシュは読まない）
+
+ENTITY_TABLES = ('items', 'monsters', 'doors', 'chests', 'teleports')
+_POSITION_KEYS = ('pos', 'source', 'target')
+
+
+class CompiledFloor:
+    """
+    1フロア分の解析済みデータ. 複数の Floor インスタンスから読み取り専用で共有する
+    grid: Grid
+    json_path: 実際に読んだ JSON のパス
+    info: JSON の内容（エンティティ表の座標は tuple に正規化済み）
+    goal: 正規化済みゴール情報 {type, multiple, pos: set, keys: list}
+    gimmicks: Gimmicks | None（氷・ダメージ床の領域）
+    sources: [(path, size, mtime_ns), ...] 有効性判定用
+    """
+    def __init__(self, grid: Grid, json_path: str, info: dict, goal: dict, gimmicks: Gimmicks | None,
+                 sources: list[tuple[str, int, int]]) -> None:
+        self.version = CACHE_VERSION
+        self.grid = grid
+        self.json_path = json_path
+        self.info = info
+        self.goal = goal
+        self.gimmicks = gimmicks
+        self.sources = sources
+
+    def __repr__(self):
+        return f"CompiledFloor(json_path={self.json_path}, grid={self.grid}, sources={self.sources})"
+
+    @cached_property
+    def movable_cells(self) -> frozenset[tuple[int, int]]:
+        """ 通行可能セル集合（必要になった時に1度だけ作り、全 Floor で共有） """
+        return frozenset(self.grid.passable_cells())
+
+    def is_fresh(self) -> bool:
+        """ 元ファイルが変わっていなければ True """
+        return self.version == CACHE_VERSION and all(_file_signature(path) == (path, size, mtime)
+                                                    for path, size, mtime in self.sources)
+
+
+def _file_signature(path: str) -> tuple[str, int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (path, stat.st_size, stat.st_mtime_ns)
+
+
+# ===== 解析 =====
+def normalize_goal(info: dict) -> dict:
+    """ JSON の goal を {type, multiple, pos: set, keys: list} に正規化する """  # TODO: key_only未対応
+    goal = info.get('goal', {})
+    normalized = {}
+
+    # ゴール方法のタイプ. "reach" | "keys_only" | "reach_and_keys"
+    normalized['type'] = goal.get('type', 'reach')
+
+    # 複数のゴール. trueの場合 pos が2次元リストで渡される
+    normalized['multiple'] = goal.get('multiple', False)
+
+    # ゴールの位置. type=reach または reach_and_keys で使用
+    if normalized['multiple'] is False:
+        normalized['pos'] = set([tuple(goal.get('pos', (0, 0)))])
+    else:
+        normalized['pos'] = set(tuple(p) for p in goal.get('pos', []))
+
+    # ゴールに必要なkeyのid. type=keys_only または reach_and_keys で使用
+    normalized['keys'] = list(goal.get('keys', []))
+    return normalized
+
+
+def compile_floor(map_file_path: str, specific_json_path: str = "") -> CompiledFloor:
+    """ TXT と JSON を読んで CompiledFloor を作る（キャッシュを使わない） """
+    map_signature = _file_signature(map_file_path)
+    grid, json_path = read_map_data(map_file_path)
+    json_path = specific_json_path or json_path  # specific_json_path が優先
+    if not json_path:
+        raise ValueError("JSONデータのパスが指定されていません。")
+    json_signature = _file_signature(json_path)
+    with open(json_path, 'r', encoding='utf-8') as f:
+        info = json.load(f)
+
+    for table in ENTITY_TABLES:
+        for entity in info.get(table, []):
+            for key in _POSITION_KEYS:
+                if key in entity:
+                    entity[key] = tuple(entity[key])
+
+    gimmicks_data = info.get('gimmicks')
+    gimmicks = Gimmicks(grid=grid, params=gimmicks_data) if isinstance(gimmicks_data, dict) and gimmicks_data else None
+    return CompiledFloor(grid, json_path, info, normalize_goal(info), gimmicks, [map_signature, json_signature])
+
+
+# ===== キャッシュ =====
+_memory_cache: dict[tuple[str, str], CompiledFloor] = {}  # プロセス内キャッシュ
+
+
+def _cache_file_path(map_file_path: str, specific_json_path: str, cache_dir: str) -> str:
+    key = f"{os.path.abspath(map_file_path)}|{specific_json_path}".encode('utf-8')
+    return os.path.join(cache_dir, hashlib.sha1(key).hexdigest() + ".pickle")
+
+
+def load_compiled_floor(map_file_path: str, specific_json_path: str = "", cache_dir: str = FLOOR_CACHE_DIR) -> CompiledFloor:
+    """
+    CompiledFloor を返す. プロセス内キャッシュ -> ディスクキャッシュ -> 解析 の順に探す
+    元の TXT / JSON のサイズ・更新時刻が変わっていれば作り直してキャッシュを更新する
+    """
+    key = (map_file_path, specific_json_path)
+    compiled = _memory_cache.get(key)
+    if compiled is not None and compiled.is_fresh():
+        return compiled
+
+    cache_file = _cache_file_path(map_file_path, specific_json_path, cache_dir)
+    compiled = _read_cache_file(cache_file)
+    if compiled is None or not compiled.is_fresh():
+        compiled = compile_floor(map_file_path, specific_json_path)
+        _write_cache_file(cache_file, compiled)
+    _memory_cache[key] = compiled
+    return compiled
+
+
+def _read_cache_file(cache_file: str) -> CompiledFloor | None:
+    try:
+        with open(cache_file, 'rb') as f:
+            compiled = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None  # 無い・壊れている・形式が古いキャッシュは作り直す
+    return compiled if isinstance(compiled, CompiledFloor) else None
+
+
+def _write_cache_file(cache_file: str, compiled: CompiledFloor) -> None:
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)  # 並列プロセスでも壊れたファイルを読ませない
+    except OSError:
+        pass  # 書き込めない環境ではキャッシュなしで続行
+
+
+def clear_memory_cache() -> None:
+    """ プロセス内キャッシュを空にする """
+    _memory_cache.clear()
@@ -0,0 +1,257 @@
+# ==================== 複数セッションのゲームサーバ ====================
+# 1プロセスの asyncio で多数のプレイヤーを同時に遊ばせる TCP サーバ（行プロトコル）
+#   - 1接続 = 1セッション = 1つの GameState. モジュールのグローバルは書き換えず、状態は全てセッションが持つ
+#   - 入力待ちは input() ではなく接続ごとの readline を await するので、他のセッションを止めない
+#     1コマンドの処理は GameState.step（入出力なし）をそのまま呼ぶ
+#   - 解析済みフロア（CompiledFloor: grid・JSON・ゴール・ギミック領域）は起動時に読み込み、全セッションで読み取り専用で共有する
+#   - idle_timeout 秒コマンドが来ないセッションは切断して破棄する
+#
+# プロトコル（UTF-8, 1行1メッセージ）:
+#   クライアント -> サーバ: コマンド1文字（w/a/s/d/u/r/q）. 空行は無視
+#   サーバ -> クライアント: JSON 1行
+#     {"type": "start", "session": 1, "seed": ..., "floor": "3", "rule": "...", "state": "playing", "screen": "..."}
+#     {"type": "turn", "turn": 1, "command": "w", "hp_delta": 0, "events": [...], "text": "...",
+#      "hp": 100, "floors_cleared": 0, "state": "playing" | "cleared" | "over", "screen": "..."}
+#     {"type": "error", "message": "..."}   （不正なコマンド・満員）
+#     {"type": "evicted", "idle_timeout": 300}   （無操作で切断）
+#   state が "playing" 以外になったターン・q の後はサーバから切断する
+#
+# python -m modules.game_server --port 8765 --idle-timeout 300
+# nc localhost 8765
+import argparse
+import asyncio
+import glob
+import io
+import json
+import random
+import time
+
+from modules.constants import COMMANDS, MAP_DIR_PATH
+from modules.event_sinks import turn_record
+from modules.events import TurnResult
+from modules.floor_cache import CompiledFloor, load_compiled_floor
+from modules.game_state import GameState
+from modules.terminal import PlainTerminal
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_IDLE_TIMEOUT = 300.0  # 秒
+
+
+def state_label(game: GameState) -> str:
+    """ "playing" / "cleared" / "over" """
+    if game.is_game_cleared:
+        return "cleared"
+    if game.is_game_over:
+        return "over"
+    return "playing"
+
+
+def preload_floors(map_paths: list[str]) -> dict[str, CompiledFloor]:
+    """
+    map_paths を解析してプロセス内キャッシュに載せる（以後の Floor 生成は解析済みデータを共有する）
+    読めないファイルは飛ばす
+    """
+    compiled = {}
+    for path in map_paths:
+        try:
+            compiled[path] = load_compiled_floor(path)
+        except (OSError, ValueError) as e:
+            print(f"{path}: 読み込めません: {e}")
+    return compiled
+
+
+class Session:
+    """
+    1接続分のゲーム. GameState は画面・出力先を持たず（step だけで進める）、表示は応答ごとに文字列で作る
+    last_active: 最後にコマンドを受け取った時刻（time.monotonic）
+    """
+    def __init__(self, session_id: int, map_paths: list[str] | None, seed: int | None) -> None:
+        self.session_id = session_id
+        self.terminal = PlainTerminal(stream=io.StringIO())
+        self.game = GameState(requires_map_file_path=list(map_paths or []), seed=seed, sinks=[],
+                              terminal=self.terminal)
+        self.last_active = time.monotonic()
+
+    def __repr__(self):
+        return f"Session(id={self.session_id}, seed={self.game.seed}, turn={self.game.turn_count}, state={state_label(self.game)})"
+
+    def render(self) -> str:
+        """ 今のマップとステータス（PlainTerminal と同じ表示） """
+        self.terminal.stream = io.StringIO()
+        self.terminal.draw(self.game.floor, self.game.player)
+        return self.terminal.stream.getvalue()
+
+    def start_message(self) -> dict:
+        game = self.game
+        return {"type": "start", "session": self.session_id, "seed": game.seed, "floor": game.floor.floor_id,
+                "rule": game.floor.rule, "state": state_label(game), "screen": self.render()}
+
+    def handle(self, command: str) -> dict:
+        """ コマンド1つを処理して応答を返す """
+        self.last_active = time.monotonic()
+        if command not in COMMANDS:
+            return {"type": "error", "message": f"不正なコマンドです: {command!r}（{'/'.join(COMMANDS)}）"}
+        result: TurnResult = self.game.step(command)
+        game = self.game
+        message = {"type": "turn", **turn_record(result), "text": self.terminal.format_turn(result),
+                   "hp": game.player.hp, "floors_cleared": game.cleared_count, "state": state_label(game)}
+        if game.game_state():
+            message["screen"] = self.render()
+        return message
+
+
+class GameServer:
+    """
+    asyncio の TCP ゲームサーバ
+    map_paths: 全セッションで遊ぶフロア（GameState の requires_map_file_path. None ならセッションごとのランダム抽選）
+    seed: セッションのシードを作る乱数のシード（None ならセッションごとに OS の乱数）
+    idle_timeout: この秒数コマンドが来ないセッションを破棄する
+    max_sessions: 同時セッション数の上限（None なら無制限）
+    """
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, map_paths: list[str] | None = None,
+                 seed: int | None = None, idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 max_sessions: int | None = None) -> None:
+        self.host = host
+        self.port = port
+        self.map_paths = list(map_paths) if map_paths else None
+        self.rng = random.Random(seed) if seed is not None else None
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.sessions: dict[int, Session] = {}
+        self.compiled_floors: dict[str, CompiledFloor] = {}
+        self._next_session_id = 1
+        self._server: asyncio.base_events.Server | None = None
+
+    def __repr__(self):
+        return f"GameServer(host={self.host}, port={self.port}, sessions={len(self.sessions)})"
+
+    async def start(self) -> None:
+        """ フロアを読み込んでから待ち受けを始める（port=0 なら空いているポートを使い、self.port に入れる） """
+        map_paths = self.map_paths or sorted(glob.glob(MAP_DIR_PATH + "map0*.txt"))
+        loop = asyncio.get_running_loop()
+        self.compiled_floors = await loop.run_in_executor(None, preload_floors, map_paths)
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def new_session(self) -> Session:
+        session_id = self._next_session_id
+        self._next_session_id += 1
+        seed = self.rng.getrandbits(63) if self.rng is not None else None
+        session = Session(session_id, self.map_paths, seed)
+        self.sessions[session_id] = session
+        return session
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session = None
+        try:
+            if self.max_sessions is not None and len(self.sessions) >= self.max_sessions:
+                await _send(writer, {"type": "error", "message": "満員です。"})
+                return
+            session = self.new_session()
+            await _send(writer, session.start_message())
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    await _send(writer, {"type": "evicted", "idle_timeout": self.idle_timeout})
+                    return
+                if not line:
+                    return  # クライアントが切断した
+                command = line.decode('utf-8', errors='replace').strip().lower()
+                if not command:
+                    continue
+                message = session.handle(command)
+                await _send(writer, message)
+                if message["type"] == "turn" and (command == 'q' or message["state"] != "playing"):
+                    return
+        except (ConnectionError, ValueError):
+            pass  # 切断・長すぎる行（StreamReader の上限超え）
+        finally:
+            if session is not None:
+                self.sessions.pop(session.session_id, None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def _send(writer: asyncio.StreamWriter, message: dict) -> None:
+    writer.write((json.dumps(message, ensure_ascii=False, default=list) + "\n").encode('utf-8'))
+    await writer.drain()
+
+
+# ==================== クライアント（テスト・動作確認用） ====================
+class GameClient:
+    """ 1セッション分のクライアント. connect() の後 send(command) で応答の JSON を受け取る """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, start: dict) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.start = start  # 接続時に受け取った start（または error）メッセージ
+
+    @classmethod
+    async def connect(cls, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> 'GameClient':
+        reader, writer = await asyncio.open_connection(host, port)
+        client = cls(reader, writer, {})
+        client.start = await client.receive()
+        return client
+
+    async def receive(self) -> dict:
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("サーバが切断しました。")
+        return json.loads(line)
+
+    async def send(self, command: str) -> dict:
+        self.writer.write((command + "\n").encode('utf-8'))
+        await self.writer.drain()
+        return await self.receive()
+
+    async def close(self) -> None:
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+# ==================== CLI ====================
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="複数セッションを1プロセスで扱うゲームサーバ（TCP 行プロトコル）")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"待ち受けアドレス（既定: {DEFAULT_HOST}）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"待ち受けポート（既定: {DEFAULT_PORT}）")
+    parser.add_argument("--maps", nargs="*", default=None, help="遊ぶフロア（既定: セッションごとのランダム抽選）")
+    parser.add_argument("--seed", type=int, default=None, help="セッションのシードを作る乱数のシード")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT, help="無操作で切断するまでの秒数")
+    parser.add_argument("--max-sessions", type=int, default=None, help="同時セッション数の上限")
+    args = parser.parse_args(argv)
+
+    server = GameServer(args.host, args.port, args.maps, args.seed, args.idle_timeout, args.max_sessions)
+
+    async def run() -> None:
+        await server.start()
+        print(f"listening on {server.host}:{server.port} ({len(server.compiled_floors)} floors loaded)")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,36 +1,66 @@
 from modules.floor import Floor
 from modules.player import Player
-from modules.constants import MAP_DIR_PATH, TARGET_CLEAR, TOTAL_FLOORS, DIRECTIONS
+from modules.grid import Grid, PATH
+from modules.events import GameEvent, TurnResult
+from modules.prefetch import FloorPrefetcher
+from modules.instrumentation import TurnInstrumentation, CountingWriter
+from modules.event_sinks import EventSink
+from modules.terminal import PlainTerminal, AnsiTerminal
+from modules.monster_table import numpy_available
+from modules.constants import MAP_DIR_PATH, TARGET_CLEAR, TOTAL_FLOORS, COMMANDS
 import random
+import sys
+from contextlib import redirect_stdout
 
 class GameState:
-    def __init__(self, requires_map_file_path: list[str] = []) -> None:
+    def __init__(self, requires_map_file_path: list[str] = [], prefetch: bool = False,
+                 instrumentation: TurnInstrumentation | None = None, seed: int | None = None,
+                 sinks: list[EventSink] | None = None, terminal: PlainTerminal | AnsiTerminal | None = None,
+                 vectorized_monsters: bool = False) -> None:
         self.is_game_state = True  # ゲーム進行中フラグ
 
+        # 乱数. シードとコマンド列が同じならゲームは完全に再現される（modules/replay.py）
+        self.seed: int = seed if seed is not None else random.SystemRandom().getrandbits(63)
+        self.rng = random.Random(self.seed)
+        self.commands: list[str] = []  # step に渡したコマンドの記録（リプレイ用）
+
         self.requires_map_file_path = requires_map_file_path
         if self.requires_map_file_path:  # デバッグ用：特定フロア指定
-            global TARGET_CLEAR
-            TARGET_CLEAR = len(self.requires_map_file_path)  # デバッグ用：クリア必要フロア数
+            self.target_clear = len(self.requires_map_file_path)  # デバッグ用：クリア必要フロア数
             self.all_floors = self.requires_map_file_path  # デバッグ用：特定フロア指定
         else:
-            self.all_floors = random.sample(list(range(1, TOTAL_FLOORS + 1)), TARGET_CLEAR)  # クリア必要フロアリスト
+            self.all_floors = self.rng.sample(list(range(1, TOTAL_FLOORS + 1)), TARGET_CLEAR)  # クリア必要フロアリスト
             # self.all_floors = list(range(1, TOTAL_FLOORS + 1))  # デバッグ用：全フロアクリア
             self.all_floors.append(0)  #  強制的にmap00を追加
-            TARGET_CLEAR+=1
-            print(f"Selected Floors to Clear: {self.all_floors}")  # デバッグ用表示
+            self.target_clear = TARGET_CLEAR + 1  # クリア必要フロア数（グローバルは書き換えない）
+
+        # フロアごとの乱数シード. 先読みスレッドで読み込んでも結果が変わらないように開始時に確定させる
+        self.floor_seeds: list[int] = [self.rng.getrandbits(63) for _ in self.all_floors]
 
         self.cleared_count = 0  # クリア済みフロア数
         self.current_floor_index = 0  # 現在のフロアインデックス
+        self.turn_count = 0  # 経過ターン数
 
         self.is_game_over = False  # ゲームオーバーフラグ
         self.is_game_cleared = False  # ゲームクリアフラグ
 
+        # 次フロアの先読み（all_floors は開始時に確定しているので、プレイ中に次を読み込んでおける）
+        self.prefetcher: FloorPrefetcher | None = FloorPrefetcher() if prefetch else None
+
+        # 画面描画（step_turn が使う）. AnsiTerminal なら差分描画（modules/terminal.create_terminal で端末に合わせて選ぶ）
+        self.terminal = terminal if terminal is not None else PlainTerminal()
+
+        # イベント出力先. step_turn / emit がターンごとに流す（step 自体は何も出力しない）. 既定は画面のみ
+        self.sinks: list[EventSink] = list(sinks) if sinks is not None else [self.terminal]
+
+        # モンスターの移動を NumPy で一括計算する（numpy が無ければ通常のループ. modules/monster_table.py）
+        self.vectorized_monsters = vectorized_monsters and numpy_available()
+
+        # ターン計測（None なら計測しない）
+        self.instrumentation: TurnInstrumentation | None = instrumentation
+
         self.floor: 'Floor' = self.start_floor()  # 現在のフロアインスタンス
-        print_all_opening()
-        print("正常にフロアが開始されました。")  # デバッグ用表示
         self.player: 'Player' = Player(self.floor.start)  # プレイヤーインスタンス
-        print() #マップごとのルール説明
-        print(self.floor.rule)
 
     # ====== ゲーム進行管理 ======
     def game_state(self) -> bool:
@@ -38,140 +68,268 @@ class GameState:
         self.is_game_state = not (self.is_game_over or self.is_game_cleared)
         return self.is_game_state
 
-    def start_floor(self) -> 'Floor':
-        """ 現在のフロアを開始する """
-        floor_id = str(self.all_floors[self.current_floor_index])  # 現在のフロアID
+    def load_floor(self, floor_index: int) -> 'Floor':
+        """ all_floors[floor_index] のフロアを読み込む """
+        floor_id = str(self.all_floors[floor_index])  # フロアID
         
         if self.requires_map_file_path:  # デバッグ用：特定フロア指定
-            map_file_path = self.requires_map_file_path[self.current_floor_index]
+            map_file_path = self.requires_map_file_path[floor_index]
         else:
             map_file_path = MAP_DIR_PATH + f"map0{floor_id}.txt"  # マップファイルパス
-        floor = Floor(map_file_path, floor_id=floor_id)  # フロアインスタンス生成
+        floor = Floor(map_file_path, floor_id=floor_id, rng=random.Random(self.floor_seeds[floor_index]))  # フロアインスタンス生成
+        return floor
+
+    def start_floor(self) -> 'Floor':
+        """ 現在のフロアを開始する。先読み済みならそれを使い、続けて次のフロアの先読みを始める """
+        floor = None
+        if self.prefetcher is not None:
+            floor = self.prefetcher.take(self.current_floor_index)
+        if floor is None:
+            floor = self.load_floor(self.current_floor_index)  # 先読みしていない・失敗した場合は同期読み込み
+        floor.instrumentation = self.instrumentation
+        if self.vectorized_monsters and floor.monster_table is None:
+            floor.enable_monster_table()
+
+        next_index = self.current_floor_index + 1
+        if self.prefetcher is not None and next_index < len(self.all_floors):
+            self.prefetcher.schedule(next_index, lambda: self.load_floor(next_index))
         return floor
 
     def next_floor(self, player: Player) -> None:
-        """ フロアクリア後に呼ぶ。{TARGET_CLEAR}回クリアでゲームクリア """
+        """ フロアクリア後に呼ぶ。次のフロアへ進める。{target_clear}回クリアでゲームクリア """
         self.cleared_count += 1
         self.current_floor_index += 1
         player.floor_clear_keys_reset() # 鍵リセット
 
-        if self.cleared_count >= TARGET_CLEAR:
+        if self.cleared_count >= self.target_clear:
             self.is_game_cleared = True
-            # print("おめでとうございます！すべてのフロアをクリアしました！")
-        else:
-            print(f"フロアクリア！ 残り {TARGET_CLEAR - self.cleared_count} 層です。")
+            if self.prefetcher is not None:
+                self.prefetcher.shutdown()
+            return
+
+        self.floor = self.start_floor()
+        player.position = self.floor.start
+        player.recalculate_attack()
     
     def check_game_over(self) -> bool:
         """ ゲームオーバー判定 """
         if self.player.hp <= 0:
             self.is_game_over = True
-            print("あなたは力尽きました。ゲームオーバーです。")
             return True
         return False
 
     def check_game_cleared(self) -> bool:
         """ ゲームクリア判定 """
-        if self.is_game_cleared:
-            print("\n\n\n")
-            print_game_text("game_texts/Ending.txt")
-            print("Congratulations on clearing the game!")
-            return True
-        return False
+        return self.is_game_cleared
 
+    # ===== 状態の複製（先読み・木探索用） =====
+    # 変わらないデータ（grid・ギミック領域・テレポート・ゴール・フロア順とシード）は共有し、
+    # 乱数・プレイヤー・フロア上のエンティティ・カウンタだけを複製する
+    _STATE_FIELDS = ('is_game_state', 'rng', 'commands', 'cleared_count', 'current_floor_index', 'turn_count',
+                     'is_game_over', 'is_game_cleared', 'floor', 'player')
 
-    # ===== 入出力 =====
-    def read_command(self) -> str:
-        """ プレイヤーからのコマンド入力を受け取る """
-        while True:
-            command = input("(w/a/s/d 移動, u:ポーション, r:ルール表示, q:終了) > ").strip().lower()
-            if command in ['w', 'a', 's', 'd', 'u', 'q', 'r']:
-                return command
-            # print("不正ななコマンドです。{w, a, s, d, u, q} のいずれかを入力してください。")
+    def clone(self) -> 'GameState':
+        """
+        同じ状態から独立して進められる GameState を返す
+        複製は画面・出力先・計測・先読みを持たない（step だけで進める. 次のフロアは同期読み込み）
+        """
+        game = GameState.__new__(GameState)
+        game.__dict__.update(self.__dict__)
+        game.rng = random.Random.__new__(random.Random)  # OS の乱数で初期化しない（状態はすぐ上書きする）
+        game.rng.setstate(self.rng.getstate())
+        game.commands = list(self.commands)
+        game.floor = self.floor.clone()
+        game.player = self.player.copy()
+        game.prefetcher = None
+        game.terminal = PlainTerminal()
+        game.sinks = []
+        game.instrumentation = None
+        return game
 
-    # ===== ゲーム状態更新 ======
-    def step_turn(self, command = "") -> None:
-        """ 1ターン（プレイヤー入力 -> セルイベント -> 敵行動 -> 判定） """
-        self.floor.print_grid(self.player)
-        print()
-        self.player.print_status()
-        print()
+    def snapshot(self) -> 'GameState':
+        """ 今の状態を保存する（restore で何度でも戻せる. 返り値自体は進めないこと） """
+        return self.clone()
 
-        if not command in ['w', 'a', 's', 'd', 'u', 'q', 'r']:
-            command = self.read_command()  # コマンド入力
+    def restore(self, snapshot: 'GameState') -> None:
+        """ snapshot の状態に戻す. 画面・出力先・計測・先読みはそのまま使う """
+        state = snapshot.clone()
+        for name in self._STATE_FIELDS:
+            setattr(self, name, getattr(state, name))
+        self.floor.instrumentation = self.instrumentation
+
+    # ===== ゲーム状態更新（入出力なし） ======
+    def step(self, command: str) -> TurnResult:
+        """
+        1ターン（コマンド -> セルイベント -> 敵行動 -> 判定）を入出力なしで進め、結果を返す
+        外部AIやシミュレーションからはこちらを直接呼ぶ
+        """
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return self._step(command, None)
+        owns_turn = instrumentation.begin_turn(self.turn_count + 1)  # step_turn から呼ばれた場合は計測中
+        try:
+            return self._step(command, instrumentation)
+        finally:
+            if owns_turn:
+                instrumentation.end_turn()
+
+    def _step(self, command: str, instrumentation: TurnInstrumentation | None) -> TurnResult:
+        if command not in COMMANDS:
+            raise ValueError(f"不正なコマンドです: {command!r}")
+        self.commands.append(command)
+
+        events: list[GameEvent] = []
+        self.floor.events = events  # フロア内のイベントもこのターンのリストに積む
+        hp_before = self.player.hp
+        self.turn_count += 1
+        result = TurnResult(command, events, turn=self.turn_count)
 
         if command == 'q':
-            print("ゲーム終了します。")
+            events.append(GameEvent("quit"))
             self.is_game_over = True
-            return
+            result.game_over = True
+            return result
 
         elif command == 'u':
-            self.player.use_potion()  # ポーション使用
-            return
+            potion_id = self.player.use_potion()  # ポーション使用
+            if potion_id is None:
+                events.append(GameEvent("no_potion"))
+            else:
+                events.append(GameEvent("potion_used", potion_id=potion_id))
+            result.hp_delta = self.player.hp - hp_before
+            return result
         
         elif command == 'r':
-            print()
-            print(self.floor.rule)
-            print("\n")
-            return
+            events.append(GameEvent("show_rule", rule=self.floor.rule))
+            return result
         
         new_position = try_move_player(self.player, command, self.floor.grid)
         if new_position is not None:
             self.player.position = new_position
             self.player.last_move_direction = command
+            result.moved = True
         else:
-            print("その方向には移動できません！")
-            return
+            events.append(GameEvent("blocked", direction=command))
+            return result
+        if instrumentation is not None:
+            instrumentation.lap('move')
         
         # セルに入った際のイベント処理
         self.floor.enter_cell(self.player)
+        if instrumentation is not None:
+            instrumentation.lap('enter_cell')
 
         # モンスター行動
-        occupied = {m.pos for m in self.floor.monsters.values() if m.alive}
-        for monster in self.floor.monsters.values():
-            if not monster.alive:
-                continue
-            if monster.increment_turn():  # move_every に達したら移動
-                # monster.pos
-                new_pos = monster.monster_next_move(self.player.position, self.floor.grid, occupied_positions=occupied)
-                if new_pos in occupied:
-                    continue  # 移動先が他のモンスターと被る場合は移動しない
-                occupied.remove(monster.pos)
-                occupied.add(new_pos)
-                monster.pos = new_pos
-                
-                # occupied.remove(monster.pos)
-                # occupied.add(monster.pos)
+        if self.floor.monster_table is not None:
+            self.floor.monster_table.step(self.player.position, instrumentation)  # NumPy で全モンスターを一括で動かす
+        else:
+            occupied = self.floor.monsters_at  # 生存モンスターの位置インデックス（move_monster で更新される）
+            distance_field = None  # 追跡モンスター全員で共有する距離マップ（必要になった時だけ計算）
+            for monster in self.floor.monsters.values():
+                if not monster.alive:
+                    continue
+                if monster.increment_turn():  # move_every に達したら移動
+                    if monster.ai_type == 'chase' and distance_field is None:
+                        distance_field = self.floor.player_distance_field(self.player.position)
+                    new_pos = monster.monster_next_move(self.player.position, self.floor.grid, occupied_positions=occupied,
+                                                        distance_field=distance_field, instrumentation=instrumentation)
+                    if new_pos in occupied:
+                        continue  # 移動先が他のモンスターと被る場合は移動しない
+                    self.floor.move_monster(monster, new_pos)
+            if instrumentation is not None:
+                instrumentation.count('entities_scanned', len(self.floor.monsters))
+        if instrumentation is not None:
+            instrumentation.lap('monsters')
 
         # モンスターとの衝突判定
-        for monster in self.floor.monsters.values():
-            if not monster.alive:
-                continue
-            if monster.pos == self.player.position:
-                print(f"モンスター {monster.id} と遭遇しました！戦闘開始！  - game_state.py - step_turn()")
-                self.floor.battle_monster(self.player, monster)
+        for monster in list(self.floor.monsters_at.get(self.player.position, ())):
+            self.floor.battle_monster(self.player, monster)
+        if instrumentation is not None:
+            instrumentation.lap('battle')
 
         # ゴール判定
         is_goal, goal_message = self.floor.check_goal(self.player)
         if is_goal:
-            print("ゴールに到達しました！フロアクリア！")
-            # print(goal_message)
+            events.append(GameEvent("floor_cleared", floor_id=self.floor.floor_id))
             self.next_floor(self.player)  # フロアクリア処理
+            result.floor_cleared = True
             if not self.is_game_cleared:
-                self.floor = self.start_floor()
-                self.player.position = self.floor.start
-                self.player.recalculate_attack()
-                print() #マップごとのルール説明
-                print(self.floor.rule)
-                print("\n")
+                events.append(GameEvent("floor_remaining", remaining=self.target_clear - self.cleared_count))
+                events.append(GameEvent("floor_started", floor_id=self.floor.floor_id, rule=self.floor.rule))
             else:
-                self.check_game_cleared()  #この関数が発生しないbugを直した
-            return
-        else:
-            if goal_message:
-                print(goal_message)
+                events.append(GameEvent("game_cleared"))
+                result.game_cleared = True
+            result.hp_delta = self.player.hp - hp_before
+            if instrumentation is not None:
+                instrumentation.lap('goal')
+            return result
+        elif goal_message:
+            events.append(GameEvent("goal_message", message=goal_message))
+        if instrumentation is not None:
+            instrumentation.lap('goal')
+
+        if self.check_game_over():
+            events.append(GameEvent("game_over"))
+            result.game_over = True
+        result.game_cleared = self.check_game_cleared()
+        result.hp_delta = self.player.hp - hp_before
+        return result
+
+    # ===== 入出力（対話プレイ用の表示層） =====
+    def print_opening(self) -> None:
+        """ ゲーム開始時の説明と最初のフロアのルールを表示する """
+        if not self.requires_map_file_path:
+            print(f"Selected Floors to Clear: {self.all_floors}")  # デバッグ用表示
+        print_all_opening()
+        print("正常にフロアが開始されました。")  # デバッグ用表示
+        print() #マップごとのルール説明
+        print(self.floor.rule)
 
-        self.check_game_over()
-        self.check_game_cleared()
+    def read_command(self) -> str:
+        """ プレイヤーからのコマンド入力を受け取る """
+        while True:
+            command = input("(w/a/s/d 移動, u:ポーション, r:ルール表示, q:終了) > ").strip().lower()
+            if command in COMMANDS:
+                return command
+            # print("不正ななコマンドです。{w, a, s, d, u, q} のいずれかを入力してください。")
+
+    def emit(self, result: TurnResult) -> None:
+        """ step の結果（1ターン分のイベント）を全出力先に流す """
+        for sink in self.sinks:
+            sink.write_turn(result)
+
+    def close_sinks(self) -> None:
+        """ 出力先の後始末（ファイルを閉じるなど） """
+        for sink in self.sinks:
+            sink.close()
+
+    def step_turn(self, command = "") -> TurnResult:
+        """ 1ターン（描画 -> プレイヤー入力 -> step -> 結果表示）. 対話プレイ用 """
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            instrumentation.begin_turn(self.turn_count + 1)
+            with redirect_stdout(CountingWriter(sys.stdout, instrumentation)):  # 端末への出力バイト数を数える
+                try:
+                    return self._step_turn(command, instrumentation)
+                finally:
+                    instrumentation.end_turn()
+        return self._step_turn(command, None)
+
+    def _step_turn(self, command: str, instrumentation: TurnInstrumentation | None) -> TurnResult:
+        self.terminal.draw(self.floor, self.player)
+        if instrumentation is not None:
+            instrumentation.lap('render')
+
+        if not command in COMMANDS:
+            command = self.read_command()  # コマンド入力
+        if instrumentation is not None:
+            instrumentation.lap('input')
+
+        result = self.step(command)
+        self.emit(result)
+        if instrumentation is not None:
+            instrumentation.lap('output')
+        return result
     
 
 # ==================== 便利関数群 ====================
@@ -194,28 +352,19 @@ def print_all_opening():
 def read_player_command() -> str:
     while True:
         command = input("(w/a/s/d 移動, u:ポーション, r:ルール表示, q:終了) > ").strip().lower()
-        if command in ['w', 'a', 's', 'd', 'u', 'q', 'r']:
+        if command in COMMANDS:
             return command
         print("不正ななコマンドです。{w, a, s, d, u, q, r} のいずれかを入力してください。")
         # print("Invalid command! Please enter w, a, s, d, u, or q.")
 
 
 # 移動可能か判定し、可能なら移動先の座標を返す
-def try_move_player(player: Player, direction: str, grid: list[list[str]]) -> tuple[int, int] | None:
+def try_move_player(player: Player, direction: str, grid: Grid) -> tuple[int, int] | None:
     """ プレイヤーを direction に移動させる。移動可能なら新しい座標を、不可なら None を返す """
-    n, m = len(grid), len(grid[0])
-    delta_row, delta_col = DIRECTIONS[direction]
-    new_row = player.position[0] + delta_row
-    new_col = player.position[1] + delta_col
-
-    # 範囲内チェック
-    if not(0 <= new_row < n and 0 <= new_col < m):
-        # print("Out of bounds!")
-        return None
-
-    # 壁チェック
-    if grid[new_row][new_col] != '.':
+    # 外周を壁で囲んだフラット配列なので、範囲内チェックと壁チェックは1回の参照で済む
+    new_index = grid.index(*player.position) + grid.neighbor_offsets[direction]
+    if grid.cells[new_index] != PATH:
         # print("Hit a wall!")
         return None
 
-    return (new_row, new_col)
+    return grid.position(new_index)
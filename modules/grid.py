@@ -0,0 +1,86 @@
+# ==================== グリッド（地形）クラス ====================
+from array import array
+from modules.constants import DIRECTIONS
+
+# セルコード
+WALL = 0
+PATH = 1
+
+# 文字 -> セルコード の変換表（'.' 以外はすべて壁扱い）
+_CHAR_TO_CODE = bytes(PATH if chr(i) == '.' else WALL for i in range(256))
+
+
+class Grid:
+    """
+    マップ地形を行優先のフラットな bytearray で保持する
+    周囲を1マスの壁で囲んで格納するので、隣接セルの参照に範囲チェックが要らない
+        index(row, col) = (row + 1) * stride + (col + 1)    stride = n_cols + 2
+        cells[index] == PATH なら通行可能
+    neighbor_offsets: DIRECTIONS と同じキーで、隣接セルへの index の差分
+    """
+    def __init__(self, n_rows: int, n_cols: int, cells: bytearray | None = None) -> None:
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.stride = n_cols + 2
+        self.size = (n_rows + 2) * self.stride  # 外周の壁を含むセル数
+        self.cells = cells if cells is not None else bytearray(self.size)
+
+        self.neighbor_offsets: dict[str, int] = {key: dr * self.stride + dc for key, (dr, dc) in DIRECTIONS.items()}
+        self.neighbor_offset_list: tuple[int, ...] = tuple(self.neighbor_offsets.values())
+
+    def __repr__(self):
+        return f"Grid(n_rows={self.n_rows}, n_cols={self.n_cols})"
+
+    @classmethod
+    def from_lines(cls, lines: list[str]) -> 'Grid':
+        """ '#' と '.' の文字列リストから生成する。短い行は壁で埋める """
+        n_rows = len(lines)
+        n_cols = max((len(line) for line in lines), default=0)
+        grid = cls(n_rows, n_cols)
+        for row, line in enumerate(lines):
+            start = grid.index(row, 0)
+            codes = line.encode('ascii', 'replace').translate(_CHAR_TO_CODE)
+            grid.cells[start:start + len(codes)] = codes
+        return grid
+
+    # ===== 座標変換 =====
+    def index(self, row: int, col: int) -> int:
+        """ (row, col) をフラット配列の index に変換する """
+        return (row + 1) * self.stride + col + 1
+
+    def position(self, index: int) -> tuple[int, int]:
+        """ フラット配列の index を (row, col) に変換する """
+        row, col = divmod(index, self.stride)
+        return (row - 1, col - 1)
+
+    # ===== 通行判定 =====
+    def in_bounds(self, row: int, col: int) -> bool:
+        return 0 <= row < self.n_rows and 0 <= col < self.n_cols
+
+    def is_passable(self, row: int, col: int) -> bool:
+        """ 指定セルが通行可能か（範囲外は False） """
+        return 0 <= row < self.n_rows and 0 <= col < self.n_cols and self.cells[(row + 1) * self.stride + col + 1] == PATH
+
+    def passable_cells(self):
+        """ 通行可能セルの (row, col) を行優先で列挙する """
+        cells = self.cells
+        for row in range(self.n_rows):
+            start = self.index(row, 0)
+            col = cells.find(PATH, start, start + self.n_cols)
+            while col != -1:
+                yield (row, col - start)
+                col = cells.find(PATH, col + 1, start + self.n_cols)
+
+    def new_index_array(self, fill: int = -1) -> array:
+        """ セルごとの値を持つ int 配列（距離マップ等）を index 空間で作る """
+        return array('i', [fill]) * self.size
+
+    # ===== 表示用 =====
+    def row_string(self, row: int) -> str:
+        """ 1行分を '#' / '.' の文字列で返す """
+        start = self.index(row, 0)
+        return bytes(self.cells[start:start + self.n_cols]).translate(_CODE_TO_CHAR).decode('ascii')
+
+
+# セルコード -> 文字 の変換表
+_CODE_TO_CHAR = bytes(ord('.') if i == PATH else ord('#') for i in range(256))
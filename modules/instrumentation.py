@@ -0,0 +1,216 @@
+# ==================== ターン計測 ====================
+# 1ターンの各フェーズ（描画・入力・移動・セルイベント・モンスター行動・戦闘・ゴール判定）の経過時間と
+# カウンタ（BFS展開ノード数・走査エンティティ数・端末への出力バイト数）を記録する。
+# GameState / Floor は instrumentation が None のときは何もしないので、無効時のコストは None 判定だけ。
+#
+# python -m modules.instrumentation --map map_data/map08.txt --turns 2000 --profile 200
+import cProfile
+import io
+import pstats
+import time
+from typing import Callable
+
+PHASES = ('render', 'input', 'move', 'enter_cell', 'monsters', 'battle', 'goal', 'output')
+COUNTERS = ('bfs_nodes', 'entities_scanned', 'terminal_bytes')
+
+
+class TurnRecord:
+    """
+    1ターン分の計測結果
+    turn: ターン番号
+    phases: フェーズ名 -> 経過秒（通らなかったフェーズは含まない）
+    counters: カウンタ名 -> 値
+    total: ターン全体の経過秒
+    """
+    def __init__(self, turn: int) -> None:
+        self.turn = turn
+        self.phases: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
+        self.total = 0.0
+
+    def __repr__(self):
+        return f"TurnRecord(turn={self.turn}, total={self.total:.6f}, phases={self.phases}, counters={self.counters})"
+
+    def to_dict(self) -> dict:
+        return {'turn': self.turn, 'total': self.total, 'phases': dict(self.phases), 'counters': dict(self.counters)}
+
+
+class TurnInstrumentation:
+    """
+    ターン計測器. GameState(instrumentation=...) に渡すと step / step_turn が各フェーズで lap() を呼ぶ
+    - subscribe(callback): ターン終了ごとに TurnRecord を受け取る（メトリクス出力やプロファイラ連携用）
+    - profile(n_turns): 次のターンから n_turns ターンの間 cProfile を取り、終了時に on_profile の購読者へ渡す
+    - totals / counter_totals: 全ターンの合計
+    """
+    def __init__(self) -> None:
+        self.record: TurnRecord | None = None  # 計測中のターン（ターン外は None）
+        self._last = 0.0  # 直前の lap 時刻
+        self._start = 0.0  # ターン開始時刻
+
+        self.turns = 0  # 計測したターン数
+        self.totals: dict[str, float] = {}  # フェーズ名 -> 合計秒
+        self.counter_totals: dict[str, int] = {}  # カウンタ名 -> 合計
+        self.total_time = 0.0
+
+        self._subscribers: list[Callable[[TurnRecord], None]] = []
+        self._profile_subscribers: list[Callable[[pstats.Stats], None]] = []
+
+        # cProfile
+        self._profile_turns = 0  # 残りのプロファイル対象ターン数（0 なら取らない）
+        self._profiler: cProfile.Profile | None = None
+        self.last_profile: pstats.Stats | None = None
+
+    # ===== 購読 =====
+    def subscribe(self, callback: Callable[[TurnRecord], None]) -> None:
+        """ ターン終了ごとに callback(TurnRecord) を呼ぶ """
+        self._subscribers.append(callback)
+
+    def on_profile(self, callback: Callable[[pstats.Stats], None]) -> None:
+        """ profile() の区間が終わったときに callback(pstats.Stats) を呼ぶ """
+        self._profile_subscribers.append(callback)
+
+    def profile(self, n_turns: int) -> None:
+        """ 次のターンから n_turns ターンの間 cProfile を取る """
+        self._profile_turns = n_turns
+
+    # ===== 計測 =====
+    @property
+    def in_turn(self) -> bool:
+        return self.record is not None
+
+    def begin_turn(self, turn: int) -> bool:
+        """ ターンの計測を始める. すでに計測中なら何もせず False を返す """
+        if self.record is not None:
+            return False
+        if self._profile_turns > 0 and self._profiler is None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self.record = TurnRecord(turn)
+        self._start = self._last = time.perf_counter()
+        return True
+
+    def lap(self, phase: str) -> None:
+        """ 直前の lap（またはターン開始）からの経過時間を phase に加算する """
+        now = time.perf_counter()
+        phases = self.record.phases
+        phases[phase] = phases.get(phase, 0.0) + (now - self._last)
+        self._last = now
+
+    def count(self, counter: str, value: int = 1) -> None:
+        """ カウンタを加算する（ターン外の呼び出しは無視） """
+        if self.record is not None:
+            counters = self.record.counters
+            counters[counter] = counters.get(counter, 0) + value
+
+    def end_turn(self) -> TurnRecord:
+        """ ターンの計測を終え、合計に足して購読者に通知する """
+        record, self.record = self.record, None
+        record.total = time.perf_counter() - self._start
+
+        self.turns += 1
+        self.total_time += record.total
+        for phase, seconds in record.phases.items():
+            self.totals[phase] = self.totals.get(phase, 0.0) + seconds
+        for counter, value in record.counters.items():
+            self.counter_totals[counter] = self.counter_totals.get(counter, 0) + value
+
+        if self._profiler is not None:
+            self._profile_turns -= 1
+            if self._profile_turns <= 0:
+                self._finish_profile()
+
+        for callback in self._subscribers:
+            callback(record)
+        return record
+
+    def _finish_profile(self) -> None:
+        profiler, self._profiler = self._profiler, None
+        profiler.disable()
+        self._profile_turns = 0
+        self.last_profile = pstats.Stats(profiler)
+        for callback in self._profile_subscribers:
+            callback(self.last_profile)
+
+    # ===== 集計 =====
+    def summary(self) -> dict:
+        """ 全ターンの合計と1ターンあたりの平均を返す """
+        turns = max(self.turns, 1)
+        return {
+            'turns': self.turns,
+            'total_time': self.total_time,
+            'phases': {phase: {'total': seconds, 'per_turn': seconds / turns} for phase, seconds in self.totals.items()},
+            'counters': {counter: {'total': value, 'per_turn': value / turns} for counter, value in self.counter_totals.items()},
+        }
+
+    def format_summary(self) -> str:
+        """ summary() を表形式の文字列にする """
+        summary = self.summary()
+        lines = [f"turns: {summary['turns']}  total: {summary['total_time'] * 1e3:.2f} ms"]
+        for phase in (*PHASES, *sorted(set(summary['phases']) - set(PHASES))):
+            if phase in summary['phases']:
+                stats = summary['phases'][phase]
+                lines.append(f"  {phase:12s} {stats['total'] * 1e3:12.3f} ms  {stats['per_turn'] * 1e6:10.2f} us/turn")
+        for counter, stats in sorted(summary['counters'].items()):
+            lines.append(f"  {counter:16s} {stats['total']:12d}  {stats['per_turn']:10.2f} /turn")
+        return "\n".join(lines)
+
+
+class CountingWriter:
+    """ 書き込みバイト数（UTF-8）を instrumentation の terminal_bytes に数えながら stream に流す """
+    def __init__(self, stream, instrumentation: TurnInstrumentation) -> None:
+        self.stream = stream
+        self.instrumentation = instrumentation
+
+    def write(self, text: str) -> int:
+        self.instrumentation.count('terminal_bytes', len(text.encode('utf-8')))
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+# ==================== CLI ====================
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+    import random
+    from contextlib import redirect_stdout
+    from modules.batch_runner import load_policy
+    from modules.game_state import GameState
+
+    parser = argparse.ArgumentParser(description="1フロアを自動プレイしてターンのフェーズ別時間を計測する")
+    parser.add_argument("--map", default="map_data/map08.txt", help="計測するマップ")
+    parser.add_argument("--turns", type=int, default=1000, help="計測するターン数")
+    parser.add_argument("--policy", default="random", help="自動プレイの方策")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--render", action="store_true", help="step_turn で描画も含めて計測する（出力は捨てる）")
+    parser.add_argument("--profile", type=int, default=0, help="最初の N ターンの cProfile 結果を表示する")
+    args = parser.parse_args(argv)
+
+    policy = load_policy(args.policy, random.Random(args.seed))
+    instrumentation = TurnInstrumentation()
+    if args.profile:
+        instrumentation.profile(args.profile)
+
+    played = 0
+    while played < args.turns:
+        game_state = GameState(requires_map_file_path=[args.map], instrumentation=instrumentation, seed=args.seed + played)
+        while game_state.game_state() and played < args.turns:
+            command = policy(game_state)
+            if args.render:
+                with redirect_stdout(io.StringIO()):
+                    game_state.step_turn(command)
+            else:
+                game_state.step(command)
+            played += 1
+
+    print(instrumentation.format_summary())
+    if instrumentation.last_profile is not None:
+        instrumentation.last_profile.sort_stats('cumulative').print_stats(20)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
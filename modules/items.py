@@ -1,24 +1,46 @@
 from typing import TYPE_CHECKING
 import random
+from modules.events import GameEvent
 if TYPE_CHECKING: 
     from modules.player import Player
 
+# params を持たないアイテムで共有する空辞書（params は読むだけで書き換えない）
+NO_PARAMS: dict = {}
+
+
 # ==================== アイテムクラス群 ====================
 class Item:
+    # 大量に作るので __dict__ を持たせない（サブクラスも __slots__ = () にする）
+    __slots__ = ('id', 'type', 'pos', 'hidden', 'params', 'picked')
+
     def __init__(self, id, type, pos = (-1, -1), hidden=False, params=None):
         self.id = id                # 一意なID
         self.type = type            # 'weapon'|'potion'|'key'|'trap'
         self.pos = tuple(pos)              # (row, col)
         self.hidden = hidden        # 描画する際に隠れているかどうか
-        self.params = params or {}  # 追加パラメータ辞書
+        self.params = params or NO_PARAMS  # 追加パラメータ辞書
         self.picked = False         # 回収済みかどうか
     
     def __repr__(self):
         return f"Item(id={self.id}, type={self.type}, pos={self.pos}, hidden={self.hidden}, params={self.params})"
 
-    def apply_effect(self, player: 'Player') -> None:
-        """ プレイヤーにアイテム効果を適用する（サブクラスでオーバーライド） """
-        pass
+    def copy(self) -> 'Item':
+        """ 同じクラス・同じ状態のアイテム（params は共有する） """
+        item = self.__class__.__new__(self.__class__)
+        item.id = self.id
+        item.type = self.type
+        item.pos = self.pos
+        item.hidden = self.hidden
+        item.params = self.params
+        item.picked = self.picked
+        return item
+
+    def apply_effect(self, player: 'Player', rng: random.Random | None = None) -> GameEvent | None:
+        """
+        プレイヤーにアイテム効果を適用する（サブクラスでオーバーライド）. 発生したイベントを返す
+        rng: 乱数を使う効果はこれを使う（None ならモジュールの random）
+        """
+        return None
 
     @classmethod
     def create_item(cls, id, type, pos = (-1, -1), hidden=False, params=None) -> 'Item':
@@ -28,49 +50,64 @@ class Item:
 
 
 class Key(Item):
-    def apply_effect(self, player: 'Player') -> None:
+    __slots__ = ()
+
+    def apply_effect(self, player: 'Player', rng: random.Random | None = None) -> GameEvent | None:
         """ プレイヤーにキー効果を適用する """
-        pass
+        return None
 
     def __repr__(self):
         return f"Key(id={self.id}, type={self.type}, pos={self.pos}, hidden={self.hidden}, params={self.params})"
 
 
 class Weapon(Item):
+    __slots__ = ()
     DEFAULT_ATTACK = 10
-    def apply_effect(self, player: 'Player') -> None:
+
+    def apply_effect(self, player: 'Player', rng: random.Random | None = None) -> GameEvent | None:
         """ プレイヤーに装備効果を適用する """
-        attack_bonus = self.params.get('atk', random.randint(1, self.DEFAULT_ATTACK))
-        player.equip_weapon(self, attack_bonus)
+        attack_bonus = self.params.get('atk')
+        if attack_bonus is None:  # 攻撃力未指定の武器はランダム
+            attack_bonus = (rng or random).randint(1, self.DEFAULT_ATTACK)
+        if player.equip_weapon(self, attack_bonus):
+            return GameEvent("weapon_equipped", weapon_id=self.id, attack=player.attack)
+        return GameEvent("weapon_ignored", weapon_id=self.id)
 
     def __repr__(self):
         return f"Weapon(id={self.id}, type={self.type}, pos={self.pos}, hidden={self.hidden}, params={self.params})"
 
 
 class Potion(Item):
-    def apply_effect(self, player: 'Player') -> None:
+    __slots__ = ()
+
+    def apply_effect(self, player: 'Player', rng: random.Random | None = None) -> GameEvent | None:
         """ プレイヤーにポーション効果を適用する """
         player.hp = player.MAX_HP  # HP全回復（仮）
+        return None
 
     def __repr__(self):
         return f"Potion(id={self.id}, type={self.type}, pos={self.pos}, hidden={self.hidden}, params={self.params})"
 
 
 class Trap(Item):
+    __slots__ = ()
     DEFAULT_DAMAGE = 10
-    def apply_effect(self, player: 'Player') -> None:
+
+    def apply_effect(self, player: 'Player', rng: random.Random | None = None) -> GameEvent | None:
         """ プレイヤーに罠効果を適用する """
         damage = self.params.get('damage', self.DEFAULT_DAMAGE)  # ダメージ量
         player.hp -= damage
-        print(f"罠にかかりました！ {damage} のダメージを受けました。")
+        return GameEvent("trap", item_id=self.id, damage=damage, hp=player.hp)
 
     def __repr__(self):
         return f"Trap(id={self.id}, type={self.type}, pos={self.pos}, hidden={self.hidden}, params={self.params})"
 
 class Dummy(Item):
-    def apply_effect(self, player: 'Player') -> None:
+    __slots__ = ()
+
+    def apply_effect(self, player: 'Player', rng: random.Random | None = None) -> GameEvent | None:
         """ 何も効果を発揮しないアイテム """
-        pass
+        return None
 
     def __repr__(self):
         return f"Dummy(id={self.id}, type={self.type}, pos={self.pos}, hidden={self.hidden})"
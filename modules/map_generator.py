@@ -0,0 +1,326 @@
+# ==================== フロア自動生成 ====================
+# 任意サイズ（4000x4000 程度まで）の迷路フロアを TXT（[grid]/[info]）と JSON（README のスキーマ）で書き出す。
+# - 迷路は Sidewinder 法で1行ずつ作り、その場でファイルに書く（マップ全体を文字列として持たない）
+# - エンティティも行を書きながら配置し、JSON の各セクションは一時ファイルに溜めて最後に連結する
+# - 乱数はシードの random.Random だけを使うので、同じ引数なら同じマップになる
+#
+# python -m modules.map_generator map_data/gen01.txt --rows 201 --cols 201 --seed 1
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+
+WALL_CHAR = ord('#')
+PATH_CHAR = ord('.')
+
+GOAL_TYPES = ('reach', 'keys_only', 'reach_and_keys')
+AI_TYPES = ('static', 'random', 'chase', 'patrol')
+STRENGTHS = ('weak', 'normal', 'strong')
+
+# 1セルあたりの出現率（マップ面積に対する割合. 壁に当たった分は置かない）
+DEFAULT_DENSITIES = {
+    'items': 0.01,
+    'monsters': 0.005,
+    'doors': 0.001,
+    'chests': 0.001,
+    'teleports': 0.0005,
+    'ice': 0.0,
+    'terrain_damage': 0.0,
+}
+ENTITY_KINDS = ('items', 'monsters', 'doors', 'chests', 'teleports')
+JSON_SECTIONS = (*ENTITY_KINDS, 'ice', 'terrain_damage')
+
+
+class _GeometricSampler:
+    """
+    各セルを確率 density で選ぶのと同じ分布の位置を、次の当選までの間隔を幾何分布で引いて求める
+    （1セルずつ乱数を引かずに済む. 行をまたいで間隔を持ち越す）
+    """
+    def __init__(self, density: float, rng: random.Random) -> None:
+        self.rng = rng
+        self.log_q = math.log1p(-density) if 0.0 < density < 1.0 else None
+        self.density = density
+        self.gap = self._next_gap()
+
+    def _next_gap(self) -> int:
+        if self.density <= 0.0:
+            return -1
+        if self.log_q is None:  # density >= 1
+            return 0
+        return int(math.log(1.0 - self.rng.random()) / self.log_q)
+
+    def columns(self, width: int) -> list[int]:
+        """ 次の width セル（1行分）のうち当選した列 """
+        if self.gap < 0:
+            return []
+        hits = []
+        col = self.gap
+        while col < width:
+            hits.append(col)
+            col += 1 + self._next_gap()
+        self.gap = col - width
+        return hits
+
+
+class _JsonSpool:
+    """ JSON 配列の要素を一時ファイルに追記していき、最後に出力先へ連結する """
+    def __init__(self) -> None:
+        self.file = tempfile.TemporaryFile('w+', encoding='utf-8')
+        self.count = 0
+
+    def append(self, obj) -> None:
+        self.file.write((",\n    " if self.count else "\n    ") + json.dumps(obj, ensure_ascii=False))
+        self.count += 1
+
+    def copy_to(self, out) -> None:
+        self.file.seek(0)
+        shutil.copyfileobj(self.file, out)
+        if self.count:
+            out.write("\n  ")
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def generate_floor(txt_path: str, n_rows: int, n_cols: int, seed: int = 0, json_path: str | None = None,
+                   densities: dict[str, float] | None = None, goal_type: str = 'reach_and_keys', n_keys: int = 3,
+                   loop_prob: float = 0.05, name: str | None = None) -> tuple[str, str]:
+    """
+    迷路フロアを生成して txt_path と json_path に書き出し、(txt_path, json_path) を返す
+    n_rows, n_cols: マップの大きさ（外周の壁を含む. 5 以上）
+    densities: DEFAULT_DENSITIES の上書き（items / monsters / doors / chests / teleports / ice / terrain_damage）
+    goal_type: 'reach' | 'keys_only' | 'reach_and_keys'
+    n_keys: 鍵の数. 鍵はすべて1行目（開始位置から必ず行ける通路. ドアを置かない）に置く
+            （1行目の通路セル数 - 2 を超える分は作らない）
+    loop_prob: 迷路の壁を追加で壊す確率（0 なら行き止まりの多い完全迷路）
+    """
+    if n_rows < 5 or n_cols < 5:
+        raise ValueError("マップは 5x5 以上にしてください。")
+    if goal_type not in GOAL_TYPES:
+        raise ValueError(f"不正なゴールタイプです: {goal_type}")
+    if goal_type != 'reach' and n_keys < 1:
+        raise ValueError(f"ゴールタイプ {goal_type} には鍵が1つ以上必要です。")
+    rng = random.Random(seed)
+    densities = {**DEFAULT_DENSITIES, **(densities or {})}
+    json_path = json_path or os.path.splitext(txt_path)[0] + ".json"
+
+    maze_rows = (n_rows - 1) // 2  # 迷路セル（奇数行・奇数列）の数
+    maze_cols = (n_cols - 1) // 2
+    start = (1, 1)
+    goal = (2 * maze_rows - 1, 2 * maze_cols - 1)
+
+    key_ids = [f"K{i + 1}" for i in range(n_keys)]
+    key_cols = rng.sample(range(2, 2 * maze_cols - 1), min(n_keys, 2 * maze_cols - 3))  # 1行目は全セル通路
+    key_ids = key_ids[:len(key_cols)]  # 1行目に置ききれない鍵は作らない（ゴール・ドア・宝箱も置いた鍵だけを要求する）
+    goal_keys = key_ids[:2] if goal_type != 'reach' else []
+
+    spools = {section: _JsonSpool() for section in JSON_SECTIONS}
+    entity_sampler = _GeometricSampler(sum(densities[kind] for kind in ENTITY_KINDS), rng)
+    kind_weights = [densities[kind] for kind in ENTITY_KINDS]
+    gimmick_samplers = {kind: _GeometricSampler(densities[kind], rng) for kind in ('ice', 'terrain_damage')}
+    teleport_targets: list[tuple[int, int]] = []  # テレポ先の候補（アイテムを置いた既出セルの抽出）
+    counters = {kind: 0 for kind in ENTITY_KINDS}
+
+    def next_id(kind: str, prefix: str) -> str:
+        counters[kind] += 1
+        return f"{prefix}{counters[kind]}"
+
+    def random_item(item_id: str, pos) -> dict:
+        item_type = rng.choice(('weapon', 'potion', 'trap'))
+        if item_type == 'weapon':
+            return {"id": item_id, "type": "weapon", "pos": pos, "hidden": rng.random() < 0.1,
+                    "params": {"atk": rng.randint(1, 10)}}
+        if item_type == 'trap':
+            return {"id": item_id, "type": "trap", "pos": pos, "hidden": rng.random() < 0.3,
+                    "params": {"damage": rng.randint(5, 15)}}
+        return {"id": item_id, "type": "potion", "pos": pos, "hidden": rng.random() < 0.1, "params": {}}
+
+    def place_entities(row: int, line: bytearray, above: bytearray, below: bytearray) -> None:
+        """ 1行分のエンティティとギミック領域を置く（above / below は上下の行） """
+        for col in entity_sampler.columns(n_cols):
+            if line[col] != PATH_CHAR or (row, col) in (start, goal):
+                continue
+            kind = rng.choices(ENTITY_KINDS, kind_weights)[0]
+            pos = [row, col]
+            if kind == 'doors' and row == 1:
+                kind = 'items'  # 鍵のある1行目は塞がない
+            if kind == 'teleports' and (not teleport_targets or
+                                        (line[col - 1], line[col + 1], above[col], below[col]).count(PATH_CHAR) != 1):
+                kind = 'items'  # 起動セルは踏むと必ず飛ばされるので、奥を塞がない行き止まりにだけ置く
+
+            if kind == 'items':
+                spools['items'].append(random_item(next_id('items', "I"), pos))
+                if len(teleport_targets) < 256:
+                    teleport_targets.append((row, col))
+                else:
+                    teleport_targets[rng.randrange(256)] = (row, col)
+            elif kind == 'monsters':
+                spools['monsters'].append(_monster(next_id('monsters', "M"), row, col, line, rng))
+            elif kind == 'doors':
+                spools['doors'].append({"id": next_id('doors', "D"), "pos": pos,
+                                        "requires_key": rng.choice(key_ids) if key_ids else None, "opened": False})
+            elif kind == 'chests':
+                chest_id = next_id('chests', "C")
+                contents = [random_item(f"{chest_id}_{i + 1}", (-1, -1)) for i in range(rng.randint(1, 2))]
+                for content in contents:
+                    del content['pos'], content['hidden']
+                spools['chests'].append({"id": chest_id, "pos": pos,
+                                         "requires_key": rng.choice(key_ids) if key_ids and rng.random() < 0.5 else None,
+                                         "opened": False, "contents": contents})
+            else:
+                target = rng.choice(teleport_targets)
+                spools['teleports'].append({"id": next_id('teleports', "T"), "source": pos, "target": list(target),
+                                            "bidirectional": rng.random() < 0.5})
+
+        for kind, sampler in gimmick_samplers.items():
+            for col in sampler.columns(n_cols):
+                if line[col] == PATH_CHAR:
+                    spools[kind].append([row, col])
+
+    # ===== TXT（迷路）を1行ずつ書く =====
+    try:
+        with open(txt_path, 'wb') as txt:
+            txt.write(b"[grid]\n")
+            wall_line = bytearray(b'#' * n_cols)
+            txt.write(wall_line + b"\n")
+            row = 1
+            window = [wall_line, None]  # [1つ上の行, エンティティ配置待ちの行]. 下の行を書いてから置く
+
+            def write_line(line: bytearray) -> None:
+                nonlocal row
+                txt.write(line + b"\n")
+                above, pending = window
+                if pending is not None:
+                    place_entities(row - 1, pending, above, line)
+                    window[0] = pending
+                window[1] = line
+                row += 1
+            for maze_row in range(maze_rows):
+                north_line = bytearray(b'#' * n_cols)  # この迷路行と1つ上の迷路行の間の行
+                cell_line = bytearray(b'#' * n_cols)
+                cell_line[1:2 * maze_cols:2] = b'.' * maze_cols
+                run_start = 0
+                for maze_col in range(maze_cols):
+                    col = 2 * maze_col + 1
+                    at_east_edge = maze_col == maze_cols - 1
+                    if maze_row == 0:  # 1行目は東へすべてつなぐ
+                        if not at_east_edge:
+                            cell_line[col + 1] = PATH_CHAR
+                        continue
+                    if at_east_edge or rng.random() < 0.5:
+                        # run を閉じて、run 内のどこか1セルから北へ掘る
+                        north_col = 2 * rng.randint(run_start, maze_col) + 1
+                        north_line[north_col] = PATH_CHAR
+                        run_start = maze_col + 1
+                    else:
+                        cell_line[col + 1] = PATH_CHAR
+                    if loop_prob and rng.random() < loop_prob:  # 追加の穴（ループを作る）
+                        north_line[col] = PATH_CHAR
+
+                if maze_row > 0:
+                    write_line(north_line)
+                write_line(cell_line)
+                if maze_row == 0:
+                    for key_id, key_col in zip(key_ids, key_cols):
+                        spools['items'].append({"id": key_id, "type": "key", "pos": [1, key_col], "hidden": False,
+                                                "params": {}})
+            write_line(wall_line)  # 最後の迷路行のエンティティを置く
+            window[1] = None
+            while row < n_rows:  # 偶数サイズの余りと下端の壁
+                write_line(wall_line)
+            txt.write(f"\n[info]\njson={json_path}\n".encode('utf-8'))
+
+        # ===== JSON を連結して書く =====
+        with open(json_path, 'w', encoding='utf-8') as out:
+            header = {
+                "name": name or f"Generated {n_rows}x{n_cols} (seed {seed})",
+                "reveal_hidden": True,
+                "start": list(start),
+                "goal": {"type": goal_type, "multiple": False, "pos": list(goal), "keys": goal_keys},
+            }
+            out.write("{\n")
+            for key, value in header.items():
+                out.write(f"  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},\n")
+            for kind in ENTITY_KINDS:
+                out.write(f'  "{kind}": [')
+                spools[kind].copy_to(out)
+                out.write("],\n")
+            out.write('  "gimmicks": {')
+            gimmicks = [kind for kind in ('ice', 'terrain_damage') if spools[kind].count]  # 空の regions は全域扱いなので書かない
+            for i, kind in enumerate(gimmicks):
+                out.write(f'{"," if i else ""}\n    "{kind}": {{')
+                if kind == 'terrain_damage':
+                    out.write(f'"damage": {rng.randint(1, 3)}, ')
+                out.write('"regions": [')
+                spools[kind].copy_to(out)
+                out.write("]}")
+            out.write("\n  },\n" if gimmicks else "},\n")
+            out.write(f'  "rule": {json.dumps(_rule_text(goal_type, gimmicks), ensure_ascii=False)}\n}}\n')
+    finally:
+        for spool in spools.values():
+            spool.close()
+    return txt_path, json_path
+
+
+def _monster(monster_id: str, row: int, col: int, line: bytearray, rng: random.Random) -> dict:
+    ai_type = rng.choice(AI_TYPES)
+    monster = {"id": monster_id, "pos": [row, col], "ai_type": ai_type, "move_every": rng.choice((1, 1, 2)),
+               "strength": rng.choice(STRENGTHS)}
+    if ai_type == 'static':
+        monster["move_every"] = 0
+    elif ai_type == 'random':
+        monster["ai_params"] = {"p": round(rng.uniform(0.3, 0.8), 2)}
+    elif ai_type == 'chase':
+        monster["ai_params"] = {"range": rng.randint(4, 10)}
+    else:
+        # 同じ行で左に続く通路の端までを往復する
+        end = col
+        while end - 1 > 0 and line[end - 1] == PATH_CHAR and col - end < 6:
+            end -= 1
+        monster["ai_params"] = {"points": [[row, col], [row, end]]}
+    if rng.random() < 0.2:
+        monster["drop_list"] = [{"id": f"{monster_id}_drop", "type": "potion", "params": {}}]
+    return monster
+
+
+def _rule_text(goal_type: str, gimmicks: list[str]) -> str:
+    rules = {
+        'reach': "ゴールを目指せ。",
+        'keys_only': "必要な鍵をすべて集めろ。",
+        'reach_and_keys': "必要な鍵を集めてゴールを目指せ。",
+    }
+    text = rules[goal_type]
+    if 'ice' in gimmicks:
+        text += " 氷の上では壁に当たるまで滑る。"
+    if 'terrain_damage' in gimmicks:
+        text += " ダメージ床に注意。"
+    return text
+
+
+# ==================== CLI ====================
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="迷路フロア（TXT + JSON）を生成する")
+    parser.add_argument("output", help="出力する TXT のパス（JSON は拡張子を .json にしたパス）")
+    parser.add_argument("--rows", type=int, default=41)
+    parser.add_argument("--cols", type=int, default=41)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="JSON の出力パス")
+    parser.add_argument("--goal-type", choices=GOAL_TYPES, default='reach_and_keys')
+    parser.add_argument("--keys", type=int, default=3, help="鍵の数")
+    parser.add_argument("--loops", type=float, default=0.05, help="迷路の壁を追加で壊す確率")
+    for kind, density in DEFAULT_DENSITIES.items():
+        parser.add_argument(f"--{kind.replace('_', '-')}", type=float, default=density, dest=kind,
+                            help=f"1セルあたりの出現率（既定 {density}）")
+    args = parser.parse_args(argv)
+
+    densities = {kind: getattr(args, kind) for kind in DEFAULT_DENSITIES}
+    txt_path, json_path = generate_floor(args.output, args.rows, args.cols, args.seed, args.json, densities,
+                                         args.goal_type, args.keys, args.loops)
+    print(f"{txt_path}, {json_path}")
+
+
+if __name__ == "__main__":
+    main()
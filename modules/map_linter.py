@@ -0,0 +1,469 @@
+# ==================== マップの検査 ====================
+# map TXT と対応する JSON を読み、Floor を作る前に壊れている所を見つける。
+#   - TXT: [grid] が長方形か、'#' '.' 以外の文字、[info] の json= があるか
+#   - JSON: 必須キー・型、Item / Monster などのコンストラクタが受け付けないキー（Floor では TypeError になる）
+#   - 座標: 範囲内か、通路セル（'.'）の上か
+#   - ID: 種類ごとに重複していないか
+#   - 参照: requires_key・ゴールの鍵が、どこかで手に入る鍵か / patrol の巡回点が通路上か
+#   - 連結性: 開始位置からゴールと鍵に行けるか（踏むと必ず飛ばされるテレポートも考える）. ドアは開けられるものとして扱う
+#             ドア・氷まで含めた厳密な判定は --solve（modules.solver）で行う
+# ファイルごとに独立なので、複数プロセスで並列に検査する
+#
+# python -m modules.map_linter map_data --workers 4
+import argparse
+import inspect
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from modules.floor_cache import normalize_goal
+from modules.grid import Grid, PATH
+from modules.items import Item, ITEM_CLASS_MAP
+from modules.monsters import Monster
+from modules.objects import Chest, Door, Teleport
+
+ERROR = 'error'
+WARNING = 'warning'
+
+GOAL_TYPES = ('reach', 'keys_only', 'reach_and_keys')
+AI_TYPES = ('static', 'random', 'chase', 'patrol')
+STRENGTHS = ('weak', 'normal', 'strong')
+ENTITY_ID_PREFIX = {'items': "アイテム", 'monsters': "モンスター", 'doors': "ドア", 'chests': "宝箱", 'teleports': "テレポート"}
+
+
+def _constructor_fields(cls, excluded=('self', 'rng')) -> tuple[set[str], set[str]]:
+    """ JSON の1エントリとして渡せるキー（全体, 必須）をコンストラクタの引数から求める """
+    parameters = [p for name, p in inspect.signature(cls.__init__).parameters.items() if name not in excluded]
+    return ({p.name for p in parameters},
+            {p.name for p in parameters if p.default is inspect.Parameter.empty})
+
+
+ENTITY_FIELDS = {
+    'items': _constructor_fields(Item),
+    'monsters': _constructor_fields(Monster),
+    'doors': _constructor_fields(Door),
+    'chests': _constructor_fields(Chest),
+    'teleports': _constructor_fields(Teleport),
+}
+CONTENT_FIELDS = ENTITY_FIELDS['items']  # ドロップ・宝箱の中身（Item.create_item に渡す. pos は無くてよい）
+
+
+class LintIssue:
+    """ 検査で見つかった問題1件 """
+    def __init__(self, path: str, level: str, message: str) -> None:
+        self.path = path
+        self.level = level  # 'error' | 'warning'
+        self.message = message
+
+    def __repr__(self):
+        return f"LintIssue(path={self.path}, level={self.level}, message={self.message})"
+
+    def __str__(self):
+        return f"{self.path}: {self.level}: {self.message}"
+
+
+class _MapLinter:
+    """ 1つの TXT（と JSON）を検査して issues に積む """
+    def __init__(self, map_file_path: str) -> None:
+        self.map_file_path = map_file_path
+        self.issues: list[LintIssue] = []
+        self.grid: Grid | None = None
+        self.json_path = ""
+
+    def error(self, message: str, path: str | None = None) -> None:
+        self.issues.append(LintIssue(path or self.map_file_path, ERROR, message))
+
+    def warning(self, message: str, path: str | None = None) -> None:
+        self.issues.append(LintIssue(path or self.map_file_path, WARNING, message))
+
+    def run(self) -> list[LintIssue]:
+        json_path = self._check_txt()
+        if self.grid is None or not json_path:
+            return self.issues
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+        except OSError as e:
+            self.error(f"JSON を開けません: {json_path} ({e.strerror})")
+            return self.issues
+        except json.JSONDecodeError as e:
+            self.error(f"JSON の構文エラー: {e.msg} ({e.lineno}行 {e.colno}列)", json_path)
+            return self.issues
+        self.json_path = json_path
+        if not isinstance(info, dict):
+            self.error("JSON のトップレベルがオブジェクトではありません", json_path)
+            return self.issues
+        self._check_json(info)
+        return self.issues
+
+    # ===== TXT =====
+    def _check_txt(self) -> str:
+        """ [grid] と [info] を検査して json のパスを返す（read_map_data と同じ読み方） """
+        try:
+            with open(self.map_file_path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError as e:
+            self.error(f"開けません ({e.strerror})")
+            return ""
+        except UnicodeDecodeError:
+            self.error("UTF-8 として読めません")
+            return ""
+
+        section = None
+        grid_lines: list[str] = []
+        json_path = ""
+        for line in lines:
+            if not line:
+                continue
+            if line in ("[grid]", "[info]"):
+                section = line[1:-1]
+                continue
+            if section == 'grid':
+                grid_lines.append(line)
+            elif section == 'info' and line.startswith("json="):
+                json_path = line.split("=", 1)[1].strip().replace("\\", "/")
+
+        if not grid_lines:
+            self.error("[grid] がありません")
+            return ""
+        width = len(grid_lines[0])
+        for i, line in enumerate(grid_lines):
+            if len(line) != width:
+                self.error(f"grid が長方形ではありません: {i}行目の幅 {len(line)}（1行目は {width}）")
+                break
+        for i, line in enumerate(grid_lines):
+            stray = set(line) - {'#', '.'}
+            if stray:
+                self.warning(f"grid の {i}行目に '#' '.' 以外の文字 {''.join(sorted(stray))!r}（壁として扱われます）")
+                break
+        self.grid = Grid.from_lines(grid_lines)
+        if not json_path:
+            self.error("[info] に json= がありません")
+        return json_path
+
+    # ===== JSON =====
+    def _check_json(self, info: dict) -> None:
+        path = self.json_path
+        self.key_sources: dict[str, list[tuple[int, int] | None]] = {}  # 鍵 ID -> 入手位置（宝箱・動くモンスターは None）
+        self.teleport_edges: list[tuple[tuple[int, int], tuple[int, int]]] = []
+        self.required_keys: list[tuple[str, str]] = []  # (どこで, 鍵 ID)
+
+        start = self._position(info.get('start'), "start")
+        if 'start' not in info:
+            self.error("start がありません", path)
+
+        for table in ENTITY_FIELDS:
+            entries = info.get(table, [])
+            if not isinstance(entries, list):
+                self.error(f"{table} がリストではありません", path)
+                continue
+            seen_ids = set()
+            for i, entry in enumerate(entries):
+                label = f"{table}[{i}]"
+                if not isinstance(entry, dict):
+                    self.error(f"{label} がオブジェクトではありません", path)
+                    continue
+                if not self._check_fields(entry, ENTITY_FIELDS[table], label):
+                    continue
+                entity_id = entry['id']
+                label = f"{ENTITY_ID_PREFIX[table]} {entity_id}"
+                if entity_id in seen_ids:
+                    self.error(f"{label}: id が重複しています（後の定義で上書きされます）", path)
+                seen_ids.add(entity_id)
+                getattr(self, f"_check_{table}")(entry, label)
+
+        goal = self._check_goal(info)
+        self._check_gimmicks(info.get('gimmicks'))
+        for where, key_id in self.required_keys:
+            if key_id not in self.key_sources:
+                self.error(f"{where}: 必要な鍵 {key_id!r} がどこにもありません", path)
+        if start is not None and goal is not None:
+            self._check_connectivity(start, goal)
+
+    def _check_fields(self, entry: dict, fields: tuple[set[str], set[str]], label: str) -> bool:
+        allowed, required = fields
+        missing = sorted(required - entry.keys())
+        unknown = sorted(entry.keys() - allowed)
+        if missing:
+            self.error(f"{label}: 必須キー {', '.join(missing)} がありません", self.json_path)
+        if unknown:
+            self.error(f"{label}: 使えないキー {', '.join(unknown)}（Floor の読み込みで TypeError になります）", self.json_path)
+        return not missing and not unknown
+
+    def _position(self, raw, label: str, passable: bool = True) -> tuple[int, int] | None:
+        """ [r, c] を検査して (r, c) を返す. 不正なら None """
+        if raw is None:
+            return None
+        if not (isinstance(raw, (list, tuple)) and len(raw) == 2 and all(isinstance(v, int) for v in raw)):
+            self.error(f"{label}: 座標 {raw!r} は [行, 列] の整数2つではありません", self.json_path)
+            return None
+        pos = (raw[0], raw[1])
+        if not self.grid.in_bounds(*pos):
+            self.error(f"{label}: 座標 {list(pos)} がマップ（{self.grid.n_rows}x{self.grid.n_cols}）の外です", self.json_path)
+            return None
+        if passable and not self.grid.is_passable(*pos):
+            self.error(f"{label}: 座標 {list(pos)} が壁の上です", self.json_path)
+        return pos
+
+    def _check_contents(self, contents, label: str, pos: tuple[int, int] | None) -> None:
+        """ ドロップ・宝箱の中身（Item.create_item(**content) で作られる） """
+        if not isinstance(contents, list):
+            self.error(f"{label} がリストではありません", self.json_path)
+            return
+        for i, content in enumerate(contents):
+            if not isinstance(content, dict):
+                self.error(f"{label}[{i}]: {content!r} がオブジェクトではありません（Item.create_item に渡せません）",
+                           self.json_path)
+                continue
+            if self._check_fields(content, CONTENT_FIELDS, f"{label}[{i}]"):
+                self._check_item_type(content, f"{label}[{i}]")
+                if content['type'] == 'key':
+                    self.key_sources.setdefault(content['id'], []).append(pos)
+
+    def _check_item_type(self, entry: dict, label: str) -> None:
+        if entry['type'] not in ITEM_CLASS_MAP:
+            self.warning(f"{label}: 未知のアイテム種別 {entry['type']!r}", self.json_path)
+
+    def _check_items(self, entry: dict, label: str) -> None:
+        if 'pos' not in entry:
+            self.error(f"{label}: pos がありません（(-1, -1) に置かれて拾えません）", self.json_path)
+        pos = self._position(entry.get('pos'), label)
+        self._check_item_type(entry, label)
+        if entry['type'] == 'key':
+            self.key_sources.setdefault(entry['id'], []).append(pos)
+        if entry.get('params') is not None and not isinstance(entry['params'], dict):
+            self.error(f"{label}: params がオブジェクトではありません", self.json_path)
+
+    def _check_monsters(self, entry: dict, label: str) -> None:
+        pos = self._position(entry['pos'], label)
+        ai_type = entry['ai_type']
+        if ai_type not in AI_TYPES:
+            self.error(f"{label}: 未知の ai_type {ai_type!r}", self.json_path)
+        if entry.get('strength', 'normal') not in STRENGTHS:
+            self.error(f"{label}: 未知の strength {entry['strength']!r}", self.json_path)
+        move_every = entry.get('move_every', 1)
+        if not isinstance(move_every, int) or move_every < 0:
+            self.error(f"{label}: move_every {move_every!r} は 0 以上の整数ではありません", self.json_path)
+        ai_params = entry.get('ai_params', {})
+        if not isinstance(ai_params, dict):
+            self.error(f"{label}: ai_params がオブジェクトではありません", self.json_path)
+        elif ai_type == 'patrol':
+            points = ai_params.get('points')
+            if points is None:
+                hint = "（'path' ではなく 'points' で指定してください）" if 'path' in ai_params else ""
+                self.error(f"{label}: patrol の巡回点 ai_params.points がありません{hint}", self.json_path)
+            elif not isinstance(points, list) or not points:
+                self.error(f"{label}: ai_params.points が空か、リストではありません", self.json_path)
+            else:
+                for i, point in enumerate(points):
+                    self._position(point, f"{label} の巡回点 {i}")
+        # 動かないモンスターのドロップだけは位置が決まる
+        drop_pos = pos if ai_type == 'static' or move_every == 0 else None
+        self._check_contents(entry.get('drop_list', []), f"{label} の drop_list", drop_pos)
+
+    def _check_doors(self, entry: dict, label: str) -> None:
+        self._position(entry['pos'], label)
+        if entry.get('requires_key') is not None:
+            self.required_keys.append((label, entry['requires_key']))
+
+    def _check_chests(self, entry: dict, label: str) -> None:
+        self._position(entry['pos'], label)
+        if entry.get('requires_key') is not None:
+            self.required_keys.append((label, entry['requires_key']))
+        self._check_contents(entry.get('contents', []), f"{label} の contents", None)
+
+    def _check_teleports(self, entry: dict, label: str) -> None:
+        source = self._position(entry['source'], f"{label} の source")
+        target = self._position(entry['target'], f"{label} の target")
+        if entry.get('requires_key') is not None:
+            self.required_keys.append((label, entry['requires_key']))
+        if source is not None and target is not None:
+            self.teleport_edges.append((source, target))
+            if entry.get('bidirectional', True):
+                self.teleport_edges.append((target, source))
+
+    def _check_goal(self, info: dict) -> dict | None:
+        path = self.json_path
+        raw_goal = info.get('goal', {})
+        if not isinstance(raw_goal, dict):
+            self.error("goal がオブジェクトではありません", path)
+            return None
+        goal_type = raw_goal.get('type', 'reach')
+        if goal_type not in GOAL_TYPES:
+            self.error(f"goal: 未知の type {goal_type!r}", path)
+            return None
+        keys = raw_goal.get('keys', [])
+        if not isinstance(keys, list):
+            self.error("goal: keys がリストではありません", path)
+            return None
+        if goal_type != 'reach':
+            if not keys:
+                self.warning(f"goal: type={goal_type} なのに keys が空です", path)
+            for key_id in keys:
+                self.required_keys.append(("goal", key_id))
+        if goal_type != 'keys_only':
+            if raw_goal.get('multiple', False):
+                if not isinstance(raw_goal.get('pos'), list) or not raw_goal['pos']:
+                    self.error("goal: multiple=true なのに pos が座標のリストではありません", path)
+                    return None
+                positions = raw_goal['pos']
+            else:
+                if 'pos' not in raw_goal:
+                    self.error("goal: pos がありません（(0, 0) がゴールになります）", path)
+                positions = [raw_goal.get('pos', [0, 0])]
+            for i, pos in enumerate(positions):
+                if self._position(pos, f"goal の pos[{i}]") is None:
+                    return None
+        return normalize_goal(info)
+
+    def _check_gimmicks(self, gimmicks) -> None:
+        path = self.json_path
+        if gimmicks is None or gimmicks == []:
+            return
+        if not isinstance(gimmicks, dict):
+            self.error("gimmicks がオブジェクトではありません", path)
+            return
+        for name, config in gimmicks.items():
+            if name == 'ice':
+                regions = config.get('regions') if isinstance(config, dict) else config
+            elif name == 'terrain_damage':
+                if not isinstance(config, dict):
+                    self.error("gimmicks.terrain_damage がオブジェクトではありません", path)
+                    continue
+                regions = config.get('regions')
+            else:
+                self.warning(f"gimmicks: 未対応のギミック {name!r}（無視されます）", path)
+                continue
+            if regions is None:
+                continue
+            if not isinstance(regions, list):
+                self.error(f"gimmicks.{name} の regions がリストではありません", path)
+                continue
+            if not regions and isinstance(config, dict):
+                self.warning(f"gimmicks.{name}: regions が空なのでマップ全域が対象になります", path)
+            walls = [pos for pos in regions if self._position(pos, f"gimmicks.{name}", passable=False) is not None
+                     and not self.grid.is_passable(*pos)]
+            if walls:
+                self.warning(f"gimmicks.{name}: 壁の上のセルが {len(walls)} 個あります（例 {list(walls[0])}）", path)
+
+    # ===== 連結性 =====
+    def _check_connectivity(self, start: tuple[int, int], goal: dict) -> None:
+        """
+        ドアを開けられるものとして、開始位置から行けるセルを求める
+        テレポートの起動セルは踏むと必ず飛ばされる（Floor.enter_cell）ので、そこから先へは歩けず飛び先に立つ
+        standing: 立ち止まれるセル（ゴール判定の対象）, touched: 踏んだセル（アイテムを拾える）
+        """
+        grid = self.grid
+        if not grid.is_passable(*start):
+            return  # start が壁の上なのは報告済み
+        triggers: dict[int, int] = {}  # 起動セル -> 飛び先（Floor.teleports_at と同じく先に定義した方が優先）
+        for source, target in self.teleport_edges:
+            if grid.is_passable(*source) and grid.is_passable(*target):
+                triggers.setdefault(grid.index(*source), grid.index(*target))
+
+        cells = grid.cells
+        offsets = grid.neighbor_offset_list
+        start_index = grid.index(*start)
+        standing = bytearray(grid.size)
+        touched = bytearray(grid.size)
+        standing[start_index] = touched[start_index] = 1
+        queue = deque([start_index])
+        while queue:
+            index = queue.popleft()
+            for offset in offsets:
+                next_index = index + offset
+                if cells[next_index] != PATH:
+                    continue
+                touched[next_index] = 1
+                next_index = triggers.get(next_index, next_index)
+                if not standing[next_index]:
+                    standing[next_index] = 1
+                    queue.append(next_index)
+
+        path = self.json_path
+        if goal['type'] != 'keys_only' and \
+                not any(standing[grid.index(*pos)] for pos in goal['pos'] if grid.in_bounds(*pos)):
+            self.error(f"開始位置 {list(start)} からゴールに行けません", path)
+        for key_id, positions in self.key_sources.items():
+            placed = [pos for pos in positions if pos is not None]
+            if placed and len(placed) == len(positions) and not any(touched[grid.index(*pos)] for pos in placed):
+                level = self.error if key_id in goal['keys'] else self.warning
+                level(f"鍵 {key_id!r} に開始位置から行けません", path)
+
+
+def lint_map(map_file_path: str) -> list[LintIssue]:
+    """ 1つのマップ（TXT + JSON）を検査して問題のリストを返す """
+    return _MapLinter(map_file_path).run()
+
+
+def _lint_and_solve(map_file_path: str) -> list[LintIssue]:
+    """ 検査してエラーが無ければ modules.solver でクリアできるかも調べる """
+    issues = lint_map(map_file_path)
+    if any(issue.level == ERROR for issue in issues):
+        return issues
+    from modules.solver import UNDETERMINED, UNSOLVABLE, solve_map_file
+    result = solve_map_file(map_file_path)
+    reason = f"（入手できない鍵: {', '.join(result.missing_keys)}）" if result.missing_keys else ""
+    if result.status == UNSOLVABLE:
+        issues.append(LintIssue(map_file_path, ERROR, f"クリアできる手順がありません{reason}"))
+    elif result.status == UNDETERMINED:
+        drops = "".join(f"、{key_id} は動くモンスター {', '.join(monster_ids)} のドロップ"
+                        for key_id, monster_ids in result.mobile_drops.items())
+        issues.append(LintIssue(map_file_path, WARNING, f"クリアできるか判定できません{reason}{drops}"))
+    return issues
+
+
+def find_map_files(paths: list[str]) -> list[str]:
+    """ ファイルはそのまま、ディレクトリはその下の *.txt を再帰的に集める """
+    map_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, file_names in sorted(os.walk(path)):
+                map_files.extend(os.path.join(directory, name) for name in sorted(file_names) if name.endswith(".txt"))
+        else:
+            map_files.append(path)
+    return map_files
+
+
+def lint_files(map_files: list[str], workers: int = 1, solve: bool = False) -> list[list[LintIssue]]:
+    """ 複数のマップを検査する. workers > 1 ならプロセスを分けて並列に実行する（結果は map_files の順） """
+    lint = _lint_and_solve if solve else lint_map
+    if workers > 1 and len(map_files) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lint, map_files, chunksize=max(1, len(map_files) // (workers * 4))))
+    return [lint(map_file) for map_file in map_files]
+
+
+# ==================== CLI ====================
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="マップ（TXT + JSON）を検査する")
+    parser.add_argument("paths", nargs="*", default=["map_data"], help="マップの TXT ファイルかディレクトリ")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="並列実行するプロセス数（1 なら同一プロセス）")
+    parser.add_argument("--solve", action="store_true", help="エラーの無いマップがクリアできるかも調べる（modules.solver）")
+    parser.add_argument("--errors-only", action="store_true", help="警告を表示しない")
+    args = parser.parse_args(argv)
+
+    map_files = find_map_files(args.paths)
+    start = time.perf_counter()
+    results = lint_files(map_files, args.workers, args.solve)
+    elapsed = time.perf_counter() - start
+
+    n_errors = n_warnings = 0
+    for issues in results:
+        for issue in issues:
+            if issue.level == ERROR:
+                n_errors += 1
+            else:
+                n_warnings += 1
+                if args.errors_only:
+                    continue
+            print(issue)
+    print(f"{len(map_files)} files, {n_errors} errors, {n_warnings} warnings in {elapsed:.2f}s")
+    return 1 if n_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+# ==================== モンテカルロ木探索による自動プレイ ====================
+# w/a/s/d/u を行動とする UCT（open-loop MCTS）。フロアの難易度確認やヒント表示に使う。
+#   - 確率的な要素（random モンスターの移動、武器の攻撃力、次のフロアのモンスターのステータス）は
+#     反復ごとに複製した GameState の乱数を振り直して標本として扱う（木は行動列だけで分岐し、各ノードの値は
+#     偶然手番の結果で平均される）
+#   - 展開後はゴール・必要な鍵への距離に寄せたロールアウトを rollout_depth 手だけ行い、評価関数で値を付ける
+#   - 1手あたりの予算は反復回数（iterations）か秒数（time_limit）. 両方指定したら先に尽きた方で止める
+#   - workers > 1 ならルート並列化（各プロセスが別シードで独立に木を作り、ルートの訪問回数を合算する）
+#
+# python -m modules.mcts --maps map_data/map01.txt --iterations 400 --workers 4
+# python -m modules.batch_runner --policy modules.mcts:MCTSPolicy --games 20  （1プロセス1木）
+import argparse
+import math
+import os
+import random
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from modules.game_state import GameState
+from modules.grid import PATH
+from modules.observation import ACTIONS, action_mask_values
+from modules.player import Player
+
+DEFAULT_ITERATIONS = 300
+EXPLORATION = 1.0  # UCB の探索係数（値は 0〜1 に正規化している）
+ROLLOUT_DEPTH = 30
+ROLLOUT_GREEDY = 0.8  # ロールアウトで目標に近づく手を選ぶ確率（残りはランダム）
+POTION_HP_RATIO = 0.3  # ロールアウトでポーションを使う HP の割合
+
+
+# ==================== 評価 ====================
+_distance_fields = weakref.WeakKeyDictionary()  # Grid -> {目標セル: 距離マップ}（プロセス内で共有）
+_MAX_DISTANCE_FIELDS = 512  # Grid 1つあたり
+
+
+def distance_field(grid, targets: tuple[tuple[int, int], ...]):
+    """
+    targets からの (距離マップ, 最遠距離). 距離マップは多始点 BFS で Grid の index 空間、到達不能は -1
+    地形はフロア中変わらないので使い回す
+    """
+    fields = _distance_fields.get(grid)
+    if fields is None:
+        fields = _distance_fields[grid] = {}
+    cached = fields.get(targets)
+    if cached is not None:
+        return cached
+    if len(fields) >= _MAX_DISTANCE_FIELDS:
+        fields.clear()
+
+    cells = grid.cells
+    offsets = grid.neighbor_offset_list
+    field = grid.new_index_array(-1)
+    queue = deque()
+    for pos in targets:
+        if grid.in_bounds(*pos):
+            index = grid.index(*pos)
+            field[index] = 0
+            queue.append(index)
+    farthest = 0
+    while queue:
+        index = queue.popleft()
+        d = field[index] + 1
+        for offset in offsets:
+            new_index = index + offset
+            if field[new_index] != -1 or cells[new_index] != PATH:
+                continue
+            field[new_index] = d
+            farthest = d
+            queue.append(new_index)
+    fields[targets] = (field, farthest)
+    return field, farthest
+
+
+def current_targets(game: GameState) -> tuple[tuple[int, int], ...]:
+    """ 次に向かうセル: 拾える必要な鍵、無ければ鍵を落とすモンスター、それも無ければゴール（GreedyPolicy と同じ順） """
+    floor = game.floor
+    player = game.player
+    missing_keys = [key_id for key_id in floor.goal['keys'] if key_id not in player.inventory]
+    targets = set()
+    for key_id in missing_keys:
+        item = floor.items.get(key_id)
+        if item is not None and not item.picked and (floor.reveal_hidden or not item.hidden):
+            targets.add(item.pos)
+    if missing_keys and not targets:
+        for monster in floor.monsters.values():
+            if monster.alive and any(isinstance(drop, dict) and drop.get('id') in missing_keys
+                                     for drop in monster.drop_list):
+                targets.add(monster.pos)
+    if not targets:
+        targets = floor.goal['pos']
+    return tuple(sorted(targets))
+
+
+def evaluate(game: GameState) -> float:
+    """
+    状態の値（0〜1）. クリア 1、ゲームオーバー 0
+    それ以外は (クリア済みフロア数 + フロア内の進み具合) / 必要フロア数
+    進み具合: 集めた必要な鍵の数と、次の目標までの近さ（フロア内の最遠距離で正規化）、少しだけ HP
+    """
+    if game.is_game_cleared:
+        return 1.0
+    if game.is_game_over:
+        return 0.0
+    floor = game.floor
+    player = game.player
+    goal_keys = floor.goal['keys']
+    stages = len(goal_keys) + (0 if floor.goal['type'] == 'keys_only' else 1)
+    collected = sum(1 for key_id in goal_keys if key_id in player.inventory)
+
+    field, farthest = distance_field(floor.grid, current_targets(game))
+    distance = field[floor.grid.index(*player.position)]
+    closeness = 0.0 if distance < 0 else 1.0 - distance / (farthest + 1)
+    progress = (collected + closeness) / max(stages, 1)
+    health = max(player.hp, 0) / Player.MAX_HP
+    return (game.cleared_count + 0.9 * min(progress, 1.0) + 0.1 * health) / game.target_clear
+
+
+# ==================== 探索 ====================
+def legal_actions(game: GameState) -> list[int]:
+    """ 意味のある行動番号（動ける方向. ポーションは HP が減っている時だけ） """
+    player = game.player
+    mask = action_mask_values(player, game.floor.grid)
+    return [action for action, ok in enumerate(mask)
+            if ok and not (ACTIONS[action] == 'u' and player.hp >= Player.MAX_HP)]
+
+
+def sample_chance(game: GameState, rng: random.Random) -> None:
+    """ 複製した状態の乱数を振り直す（偶然手番の標本を引く）. これから読み込むフロアのシードも振り直す """
+    game.floor.rng.seed(rng.getrandbits(64))
+    if game.floor.monster_table is not None:
+        from modules.monster_table import np
+        game.floor.monster_table.np_rng = np.random.default_rng(rng.getrandbits(64))
+    next_index = game.current_floor_index + 1
+    if next_index < len(game.floor_seeds):
+        game.floor_seeds = game.floor_seeds[:next_index] + [rng.getrandbits(63) for _ in game.floor_seeds[next_index:]]
+
+
+def rollout_action(game: GameState, actions: list[int], rng: random.Random) -> int:
+    """ ロールアウト方策: HP が少なければポーション、多くは目標に近づく手、残りはランダム """
+    player = game.player
+    if player.potions and player.hp < Player.MAX_HP * POTION_HP_RATIO and ACTIONS.index('u') in actions:
+        return ACTIONS.index('u')
+    moves = [action for action in actions if ACTIONS[action] != 'u']
+    if moves and rng.random() < ROLLOUT_GREEDY:
+        grid = game.floor.grid
+        field, _ = distance_field(grid, current_targets(game))
+        index = grid.index(*player.position)
+        best = None
+        best_distance = None
+        for action in moves:
+            distance = field[index + grid.neighbor_offsets[ACTIONS[action]]]
+            if distance >= 0 and (best_distance is None or distance < best_distance):
+                best, best_distance = action, distance
+        if best is not None:
+            return best
+    return rng.choice(moves or actions)
+
+
+class Node:
+    """ 木のノード（open-loop なので状態ではなく、ルートからの行動列に対応する） """
+    __slots__ = ('visits', 'value', 'children')
+
+    def __init__(self) -> None:
+        self.visits = 0
+        self.value = 0.0  # 評価値の合計
+        self.children: dict[int, 'Node'] = {}
+
+
+class MCTS:
+    """
+    1つの木を作る探索器
+    iterations / time_limit: 1手あたりの予算（time_limit は秒. どちらかは必要）
+    """
+    def __init__(self, iterations: int | None = DEFAULT_ITERATIONS, time_limit: float | None = None,
+                 exploration: float = EXPLORATION, rollout_depth: int = ROLLOUT_DEPTH, seed: int | None = None) -> None:
+        if iterations is None and time_limit is None:
+            raise ValueError("iterations か time_limit のどちらかを指定してください。")
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.rollout_depth = rollout_depth
+        self.rng = random.Random(seed)
+
+    def search(self, game: GameState) -> dict[int, tuple[int, float]]:
+        """ game（書き換えない）から探索し、ルートの 行動 -> (訪問回数, 評価値の合計) を返す """
+        root = Node()
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        iteration = 0
+        while self.iterations is None or iteration < self.iterations:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            self._iterate(root, game)
+            iteration += 1
+        return {action: (child.visits, child.value) for action, child in root.children.items()}
+
+    def _iterate(self, root: Node, game: GameState) -> None:
+        rng = self.rng
+        state = game.clone()
+        sample_chance(state, rng)
+        node = root
+        path = [root]
+
+        # 選択・展開
+        while state.game_state():
+            actions = legal_actions(state)
+            if not actions:
+                break
+            untried = [action for action in actions if action not in node.children]
+            if untried:
+                action = rng.choice(untried)
+                child = node.children[action] = Node()
+                state.step(ACTIONS[action])
+                path.append(child)
+                break
+            log_visits = math.log(node.visits)
+            action = max(actions, key=lambda a: node.children[a].value / node.children[a].visits
+                         + self.exploration * math.sqrt(log_visits / node.children[a].visits))
+            node = node.children[action]
+            state.step(ACTIONS[action])
+            path.append(node)
+
+        # ロールアウト
+        for _ in range(self.rollout_depth):
+            if not state.game_state():
+                break
+            actions = legal_actions(state)
+            if not actions:
+                break
+            state.step(ACTIONS[rollout_action(state, actions, rng)])
+
+        value = evaluate(state)
+        for node in path:
+            node.visits += 1
+            node.value += value
+
+
+def _search_worker(game: GameState, iterations: int | None, time_limit: float | None, exploration: float,
+                   rollout_depth: int, seed: int) -> dict[int, tuple[int, float]]:
+    """ プロセスプールで1つの木を作る（ルート並列化の1本分） """
+    return MCTS(iterations, time_limit, exploration, rollout_depth, seed).search(game)
+
+
+class MCTSAgent:
+    """
+    MCTS で手を選ぶエージェント
+    workers: 並列に作る木の数（プロセス数）. 1 ならこのプロセスで探索する. 既定は CPU コア数
+    iterations は木1本あたり（workers 本の合計ではない）
+    """
+    def __init__(self, iterations: int | None = DEFAULT_ITERATIONS, time_limit: float | None = None,
+                 workers: int | None = None, exploration: float = EXPLORATION, rollout_depth: int = ROLLOUT_DEPTH,
+                 seed: int | None = None) -> None:
+        if iterations is None and time_limit is None:
+            raise ValueError("iterations か time_limit のどちらかを指定してください。")
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.exploration = exploration
+        self.rollout_depth = rollout_depth
+        self.rng = random.Random(seed)
+        self._pool: ProcessPoolExecutor | None = None
+
+    def __repr__(self):
+        return f"MCTSAgent(iterations={self.iterations}, time_limit={self.time_limit}, workers={self.workers})"
+
+    def analyze(self, game: GameState) -> dict[str, tuple[int, float]]:
+        """ コマンド -> (訪問回数, 平均評価値). 全ての木のルートを合算する """
+        args = (self.iterations, self.time_limit, self.exploration, self.rollout_depth)
+        seeds = [self.rng.getrandbits(63) for _ in range(self.workers)]
+        if self.workers == 1:
+            results = [_search_worker(game, *args, seeds[0])]
+        else:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            root = game.clone()  # 画面・出力先を持たない複製を送る
+            futures = [self._pool.submit(_search_worker, root, *args, seed) for seed in seeds]
+            results = [future.result() for future in futures]
+
+        totals: dict[int, list] = {}
+        for result in results:
+            for action, (visits, value) in result.items():
+                total = totals.setdefault(action, [0, 0.0])
+                total[0] += visits
+                total[1] += value
+        return {ACTIONS[action]: (visits, value / visits) for action, (visits, value) in totals.items() if visits}
+
+    def choose(self, game: GameState) -> str:
+        """ 訪問回数が最も多い手を返す（探索できる手が無ければ 'w'） """
+        stats = self.analyze(game)
+        if not stats:
+            return 'w'
+        return max(stats, key=lambda command: (stats[command][0], stats[command][1]))
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+class MCTSPolicy:
+    """ batch_runner 用のポリシー（--policy modules.mcts:MCTSPolicy）. 並列化は batch_runner 側に任せて1プロセスで探索する """
+    def __init__(self, rng: random.Random) -> None:
+        self.agent = MCTSAgent(iterations=DEFAULT_ITERATIONS, workers=1, seed=rng.getrandbits(63))
+
+    def __call__(self, game_state: GameState) -> str:
+        return self.agent.choose(game_state)
+
+
+# ==================== CLI ====================
+def play(agent: MCTSAgent, map_paths: list[str] | None, seed: int, max_turns: int, verbose: bool = False) -> dict:
+    """ 1ゲームを agent で最後まで遊び、結果を返す """
+    game = GameState(requires_map_file_path=map_paths or [], seed=seed, sinks=[])
+    while game.game_state() and game.turn_count < max_turns:
+        command = agent.choose(game)
+        result = game.step(command)
+        if verbose:
+            print(f"turn {result.turn}: {command} hp={game.player.hp} floors={game.cleared_count}")
+    return {"seed": seed, "won": game.is_game_cleared, "turns": game.turn_count,
+            "floors_cleared": game.cleared_count, "hp": game.player.hp}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="MCTS で自動プレイしてフロアの難易度を確かめる")
+    parser.add_argument("--maps", nargs="*", default=None, help="遊ぶフロア（既定: GameState のランダム抽選）")
+    parser.add_argument("--games", type=int, default=1, help="ゲーム数")
+    parser.add_argument("--seed", type=int, default=0, help="最初のゲームのシード")
+    parser.add_argument("--iterations", type=int, default=None, help=f"1手・木1本あたりの反復回数（既定: {DEFAULT_ITERATIONS}）")
+    parser.add_argument("--time-limit", type=float, default=None, help="1手あたりの秒数")
+    parser.add_argument("--workers", type=int, default=None, help="並列に作る木の数（既定: CPUコア数）")
+    parser.add_argument("--rollout-depth", type=int, default=ROLLOUT_DEPTH, help="ロールアウトの手数")
+    parser.add_argument("--max-turns", type=int, default=1000, help="1ゲームの最大ターン数")
+    parser.add_argument("--verbose", action="store_true", help="1手ごとに表示する")
+    args = parser.parse_args(argv)
+
+    iterations = args.iterations if args.iterations is not None or args.time_limit is not None else DEFAULT_ITERATIONS
+    agent = MCTSAgent(iterations=iterations, time_limit=args.time_limit, workers=args.workers,
+                      rollout_depth=args.rollout_depth, seed=args.seed)
+    wins = 0
+    start = time.perf_counter()
+    try:
+        for seed in range(args.seed, args.seed + args.games):
+            result = play(agent, args.maps, seed, args.max_turns, args.verbose)
+            wins += result["won"]
+            print(result)
+    finally:
+        agent.close()
+    elapsed = time.perf_counter() - start
+    print(f"won {wins}/{args.games} ({elapsed:.1f}s, workers={agent.workers})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,175 @@
+# ==================== モンスター表（NumPy 一括更新） ====================
+# モンスターが大量にいるフロア向けに、位置・AI種別・移動周期カウンタ・HP・攻撃力を NumPy 配列で持ち、
+# static / random / chase（共有距離マップ）の移動を全モンスター分まとめて計算する。
+# GameState(vectorized_monsters=True) のときだけ使う。numpy が無い環境では使えない（通常のループで動く）
+#
+# 逐次ループとの違い:
+#   - 移動先の衝突はターン開始時の位置で判定する（同じターンに空いたセルへは入れない）
+#   - 同じセルを複数体が狙った場合はモンスター表の順（JSON の順）で先の1体だけが動く
+#   - random の乱数はフロアの rng から作った NumPy の Generator を使う（シードが同じなら再現される）
+try:
+    import numpy as np
+except ImportError:  # numpy はオプション
+    np = None
+
+import copy
+from typing import TYPE_CHECKING
+from modules.grid import PATH
+if TYPE_CHECKING:
+    from modules.floor import Floor
+    from modules.monsters import Monster
+
+AI_STATIC = 0
+AI_RANDOM = 1
+AI_CHASE = 2
+AI_OTHER = 3  # patrol など一括計算しない AI（Monster.monster_next_move で1体ずつ動かす）
+AI_CODES = {'static': AI_STATIC, 'random': AI_RANDOM, 'chase': AI_CHASE}
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+class MonsterTable:
+    """
+    1フロア分のモンスターの列指向テーブル（行 = floor.monsters の順）
+    index: Grid の index 空間での位置
+    ai / move_every / turn_counter / hp / attack / alive: 各モンスターの状態
+    move_p / chase_range: random の移動確率、chase の射程（-1 は無制限）
+    occupancy: セルごとの生存モンスター数（Grid の index 空間）
+    Monster オブジェクトの pos と Floor.monsters_at は移動のたびに Floor.move_monsters でまとめて書き戻す
+    """
+    def __init__(self, floor: 'Floor') -> None:
+        if np is None:
+            raise ImportError("MonsterTable には numpy が必要です。")
+        self.floor = floor
+        grid = floor.grid
+        self.monsters: list['Monster'] = list(floor.monsters.values())
+        self.rows: dict[str, int] = {monster.id: row for row, monster in enumerate(self.monsters)}
+        monsters = self.monsters
+
+        self.index = np.array([grid.index(*m.pos) for m in monsters], dtype=np.int64)
+        self.ai = np.array([AI_CODES.get(m.ai_type, AI_OTHER) for m in monsters], dtype=np.int8)
+        self.move_every = np.array([m.move_every for m in monsters], dtype=np.int64)
+        self.turn_counter = np.array([m.turn_counter for m in monsters], dtype=np.int64)
+        self.hp = np.array([m.hp for m in monsters], dtype=np.int64)
+        self.attack = np.array([m.attack for m in monsters], dtype=np.int64)
+        self.alive = np.array([m.alive for m in monsters], dtype=bool)
+        self.move_p = np.array([m.ai_params.get('p', 0.5) for m in monsters], dtype=np.float64)
+        self.chase_range = np.array([-1 if m.ai_params.get('range') is None else m.ai_params['range'] for m in monsters],
+                                    dtype=np.int64)
+
+        self.cells = np.frombuffer(grid.cells, dtype=np.uint8)
+        self.offsets = np.array(grid.neighbor_offset_list, dtype=np.int64)
+        self.occupancy = np.zeros(grid.size, dtype=np.int32)
+        np.add.at(self.occupancy, self.index[self.alive], 1)
+        self.np_rng = np.random.default_rng(floor.rng.getrandbits(64))
+
+    def __repr__(self):
+        return f"MonsterTable(monsters={len(self.monsters)}, alive={int(self.alive.sum())})"
+
+    def clone(self, floor: 'Floor', copies: dict[int, 'Monster']) -> 'MonsterTable':
+        """
+        複製したフロア用の表（Floor.clone が呼ぶ）. copies: id(元の Monster) -> 複製
+        変わる列（位置・カウンタ・HP・生存・占有数・乱数）だけ複製し、AI 種別などの列と地形は共有する
+        """
+        table = MonsterTable.__new__(MonsterTable)
+        table.__dict__.update(self.__dict__)
+        table.floor = floor
+        table.monsters = [copies.get(id(monster), monster) for monster in self.monsters]
+        table.index = self.index.copy()
+        table.turn_counter = self.turn_counter.copy()
+        table.hp = self.hp.copy()
+        table.alive = self.alive.copy()
+        table.occupancy = self.occupancy.copy()
+        table.np_rng = copy.deepcopy(self.np_rng)
+        return table
+
+    def mark_dead(self, monster: 'Monster') -> None:
+        """ 戦闘で倒されたモンスターを表から外す（Floor.battle_monster が呼ぶ） """
+        row = self.rows.get(monster.id)
+        if row is None or not self.alive[row]:
+            return
+        self.alive[row] = False
+        self.hp[row] = monster.hp
+        self.occupancy[self.index[row]] -= 1
+
+    # ===== 1ターン分の移動 =====
+    def step(self, player_pos: tuple[int, int], instrumentation=None) -> int:
+        """ 全モンスターを1ターン分動かし、移動した数を返す """
+        floor = self.floor
+        moving = self.alive & (self.move_every > 0)
+        self.turn_counter[moving] = (self.turn_counter[moving] + 1) % self.move_every[moving]
+        movers = np.flatnonzero(moving & (self.turn_counter == 0))
+        if instrumentation is not None:
+            instrumentation.count('entities_scanned', len(self.monsters))
+        if len(movers) == 0:
+            return 0
+
+        ai = self.ai[movers]
+        current = self.index[movers]
+        target = current.copy()
+
+        # random: 通行可能な隣接セルから一様に選ぶ（確率 p で移動）
+        random_rows = np.flatnonzero(ai == AI_RANDOM)
+        if len(random_rows):
+            neighbors = current[random_rows, None] + self.offsets
+            passable = self.cells[neighbors] == PATH
+            counts = passable.sum(axis=1)
+            go = (counts > 0) & (self.np_rng.random(len(random_rows)) < self.move_p[movers[random_rows]])
+            k = (self.np_rng.random(len(random_rows)) * counts).astype(np.int64)
+            pick = np.argmax(np.cumsum(passable, axis=1) > k[:, None], axis=1)
+            target[random_rows[go]] = neighbors[go, pick[go]]
+
+        # chase: 共有距離マップでプレイヤーに1歩近づく隣接セル（射程内のみ）
+        chase_rows = np.flatnonzero(ai == AI_CHASE)
+        if len(chase_rows):
+            field = np.frombuffer(floor.player_distance_field(player_pos), dtype=np.intc)
+            distance = field[current[chase_rows]]
+            chase_range = self.chase_range[movers[chase_rows]]
+            in_range = (distance > 0) & ((chase_range < 0) | (distance <= chase_range))
+            neighbors = current[chase_rows, None] + self.offsets
+            closer = field[neighbors] == (distance - 1)[:, None]
+            go = in_range & closer.any(axis=1)
+            first = np.argmax(closer, axis=1)
+            target[chase_rows[go]] = neighbors[go, first[go]]
+
+        # 衝突解決: ターン開始時に空いているセルへ、表の順で先の1体だけが移動する
+        candidates = np.flatnonzero(target != current)
+        candidates = candidates[self.occupancy[target[candidates]] == 0]
+        _, first_claim = np.unique(target[candidates], return_index=True)
+        winners = candidates[np.sort(first_claim)]
+        moved = self._apply_moves(movers[winners], target[winners])
+
+        # patrol など: 1体ずつ従来の AI で動かす
+        for row in movers[ai == AI_OTHER].tolist():
+            moved += self._step_scalar(row, player_pos, instrumentation)
+        return moved
+
+    def _apply_moves(self, rows, targets) -> int:
+        """ 表・占有数・Monster.pos・Floor.monsters_at に移動を反映する """
+        if len(rows) == 0:
+            return 0
+        np.subtract.at(self.occupancy, self.index[rows], 1)
+        self.occupancy[targets] += 1
+        self.index[rows] = targets
+
+        stride = self.floor.grid.stride
+        monsters = self.monsters
+        self.floor.move_monsters(zip([monsters[row] for row in rows.tolist()],
+                                     zip((targets // stride - 1).tolist(), (targets % stride - 1).tolist())))
+        return len(rows)
+
+    def _step_scalar(self, row: int, player_pos: tuple[int, int], instrumentation) -> int:
+        floor = self.floor
+        monster = self.monsters[row]
+        new_pos = monster.monster_next_move(player_pos, floor.grid, occupied_positions=floor.monsters_at,
+                                            instrumentation=instrumentation)
+        if new_pos in floor.monsters_at:
+            return 0  # 移動先が他のモンスターと被る場合は移動しない
+        new_index = floor.grid.index(*new_pos)
+        self.occupancy[self.index[row]] -= 1
+        self.occupancy[new_index] += 1
+        self.index[row] = new_index
+        floor.move_monster(monster, new_pos)
+        return 1
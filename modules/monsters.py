@@ -1,27 +1,38 @@
 # ==================== モンスタークラス ====================
 
 import random
-from modules.constants import DIRECTIONS
+from modules.grid import Grid, PATH
+from modules.items import NO_PARAMS
 
 class Monster:
-    def __init__(self, id, pos, ai_type, ai_params = {}, move_every=1, drop_list=[], strength: str = 'normal'):
+    # 大量に作るので __dict__ を持たせない
+    __slots__ = ('id', 'pos', 'next_pos', 'ai_type', 'ai_params', 'move_every', 'turn_counter', 'drop_list', 'strength',
+                 'rng', 'alive', 'hp', 'attack', 'patrol_points', 'patrol_point', 'debug_path')
+
+    # strength ごとの倍率の範囲（プレイヤーのステータスに掛ける）. 全モンスターで共有する
+    STRENGTH_PARAMS = {
+        'weak': (0.1, 0.3),
+        'normal': (0.4, 0.6),
+        'strong': (0.7, 1.0)
+    }
+
+    def __init__(self, id, pos, ai_type, ai_params: dict | None = None, move_every=1, drop_list: list | None = None,
+                 strength: str = 'normal', rng: random.Random | None = None):
         self.id = id  # 一意なID
         self.pos = tuple(pos)  # (row, col)
         self.next_pos = self.pos  # 次のターンの位置
 
         self.ai_type = ai_type  # 'static'|'random'|'chase'|'patrol'
-        self.ai_params = ai_params  # AIの行動についての追加パラメータ辞書
+        self.ai_params = ai_params if ai_params is not None else NO_PARAMS  # AIの行動についての追加パラメータ辞書（読むだけ）
 
         self.move_every = move_every  # 何ターンごとに移動するか（0=動かない）
         self.turn_counter = 0  # ターンカウンター
-        self.drop_list = drop_list  # 撃破時ドロップアイテムIDリスト
+        self.drop_list = drop_list if drop_list is not None else ()  # 撃破時ドロップアイテムIDリスト
         self.strength = strength  # 'weak'|'normal'|'strong'
-        self.strength_param = {
-            'weak': (0.1, 0.3),
-            'normal': (0.4, 0.6),
-            'strong': (0.7, 1.0)
-        }
-        
+        self.rng = rng or random  # ステータス決定・ランダム移動に使う乱数（フロアごとの Random を渡すと再現可能になる）
+        self.patrol_points = ()  # patrol の巡回点（init_status で設定）
+        self.patrol_point = 0  # 現在のパトロールポイントインデックス
+
         # ステータスはフロア侵入時に自動で設定（要件）
         self.alive = True  # 生存フラグ
         self.hp = 0
@@ -29,14 +40,38 @@ class Monster:
         self.init_status()  # ステータス初期化
 
         # デバッグ用表示
-        self.debug_path = []  # デバッグ用：移動経路記録リスト
+        self.debug_path = ()  # デバッグ用：移動経路記録（bfs が最後に求めた経路）
     
     def __repr__(self):
         return f"Monster(id={self.id}, pos={self.pos}, ai_type={self.ai_type}, ai_params={self.ai_params}, move_every={self.move_every}, drop_list={self.drop_list})"
     
+    def copy(self, rng: random.Random | None = None) -> 'Monster':
+        """
+        同じ状態のモンスター（GameState.clone 用）. rng を渡すとそれを使う（複製したフロアの乱数）
+        ai_params・drop_list・巡回点・経路は書き換えないので共有する
+        """
+        monster = Monster.__new__(Monster)
+        monster.id = self.id
+        monster.pos = self.pos
+        monster.next_pos = self.next_pos
+        monster.ai_type = self.ai_type
+        monster.ai_params = self.ai_params
+        monster.move_every = self.move_every
+        monster.turn_counter = self.turn_counter
+        monster.drop_list = self.drop_list
+        monster.strength = self.strength
+        monster.rng = rng if rng is not None else self.rng
+        monster.alive = self.alive
+        monster.hp = self.hp
+        monster.attack = self.attack
+        monster.patrol_points = self.patrol_points
+        monster.patrol_point = self.patrol_point
+        monster.debug_path = self.debug_path
+        return monster
+
     def init_status(self, player_hp: int = 100, player_attack: int = 10):
         """ プレイヤーステータスに基づき、モンスターのステータスを初期化する """  # TODO: ステータス設定 要調整
-        multiplier = random.uniform(*self.strength_param[self.strength])
+        multiplier = self.rng.uniform(*self.STRENGTH_PARAMS[self.strength])
         self.hp = int(player_hp*multiplier)
         self.attack = int(player_attack*multiplier)
 
@@ -58,35 +93,45 @@ class Monster:
         self.turn_counter = 0
     
     # ===== モンスター行動 =====
-    def monster_next_move(self, player_pos: tuple[int, int], grid: list[list[str]], occupied_positions:set=None) -> tuple[int, int]:
-        """ モンスターのAIによる移動先決定ロジック """
+    def monster_next_move(self, player_pos: tuple[int, int], grid: Grid, occupied_positions:set=None,
+                          distance_field=None, instrumentation=None) -> tuple[int, int]:
+        """
+        モンスターのAIによる移動先決定ロジック
+        distance_field: Floor.player_distance_field の距離マップ. chase はこれを参照して1歩を決める（無ければ個別にBFS）
+        instrumentation: TurnInstrumentation. 指定すると BFS の展開ノード数を数える
+        """
         # static: 動かない
         if self.ai_type == 'static':
             return self.pos
         
         # random: ランダム移動
         elif self.ai_type == 'random':
-            moveable_positions = []
-            for direction in DIRECTIONS.values():
-                new_row = self.pos[0] + direction[0]
-                new_col = self.pos[1] + direction[1]
-                if not (0 <= new_row < len(grid) and 0 <= new_col < len(grid[0])):
-                    continue  # マップ外
-
-                if grid[new_row][new_col] == '.':  # 通路なら移動可能
-                    moveable_positions.append((new_row, new_col))
+            index = grid.index(*self.pos)
+            moveable_indices = [index + offset for offset in grid.neighbor_offset_list if grid.cells[index + offset] == PATH]
             
-            if moveable_positions:  # 移動可能な場所がある場合
+            if moveable_indices:  # 移動可能な場所がある場合
                 p = self.ai_params.get('p', 0.5)  # 移動確率
-                if random.random() < p:
-                    return random.choice(moveable_positions)  # ランダムに移動先選択
+                if self.rng.random() < p:
+                    return grid.position(self.rng.choice(moveable_indices))  # ランダムに移動先選択
         
-        # chase: プレイヤーに向かって移動
+        # chase: プレイヤーに向かって移動（ai_params['range'] 以内の時だけ）
         elif self.ai_type == 'chase':
-            # 幅優先探索で最短経路を見つける
-            path = self.bfs(self.pos, player_pos, grid)
-            if path and len(path) > 1:
-                return path[1]
+            chase_range = self.ai_params.get('range')
+            if distance_field is None:
+                # 幅優先探索で最短経路を見つける
+                path = self.bfs(self.pos, player_pos, grid, instrumentation=instrumentation)
+                if path and len(path) > 1 and (chase_range is None or len(path) - 1 <= chase_range):
+                    return path[1]
+                return self.pos
+
+            # 共有距離マップで、プレイヤーに1歩近づく隣接セルを選ぶ
+            index = grid.index(*self.pos)
+            distance = distance_field[index]
+            if distance <= 0 or (chase_range is not None and distance > chase_range):
+                return self.pos  # 到達不能・射程外・すでに同じセル
+            for offset in grid.neighbor_offset_list:
+                if distance_field[index + offset] == distance - 1:
+                    return grid.position(index + offset)
         
         # patrol: パトロール移動
         elif self.ai_type == 'patrol':
@@ -99,58 +144,57 @@ class Monster:
             if self.pos == target_point:  # 現在のパトロールポイントに到達したら次へ
                 self.patrol_point = (self.patrol_point + 1) % len(self.patrol_points)
                 target_point = self.patrol_points[self.patrol_point]
-            path = self.bfs(self.pos, target_point, grid)
+            path = self.bfs(self.pos, target_point, grid, instrumentation=instrumentation)
             if path and len(path) > 1:
                 return path[1]
             
         return self.pos  # デフォルト：移動しない
     
-    def bfs(self, start: tuple[int, int], goal: tuple[int, int], grid: list[list[str]], occupied_positions:set=None) -> list[tuple[int, int]]:
+    def bfs(self, start: tuple[int, int], goal: tuple[int, int], grid: Grid, occupied_positions:set=None,
+            instrumentation=None) -> list[tuple[int, int]]:
         """ 幅優先探索で最短経路を見つける """
         from collections import deque
 
-        n, m = len(grid), len(grid[0])
-        visited = set()
-        prev = {start: None}  # 経路復元用辞書
-        queue = deque([start])
-        visited.add(start)
+        cells = grid.cells
+        offsets = grid.neighbor_offset_list
+        start_index = grid.index(*start)
+        goal_index = grid.index(*goal) if grid.in_bounds(*goal) else -1
+        blocked = {grid.index(*pos) for pos in occupied_positions} if occupied_positions else ()
+        prev = {start_index: None}  # 経路復元用辞書（訪問済み集合を兼ねる）
+        queue = deque([start_index])
 
         while queue:
             current = queue.popleft()
-            if current == goal:
+            if current == goal_index:
                 break
 
-            for dr, dc in DIRECTIONS.values():
-                new_row = current[0] + dr
-                new_col = current[1] + dc
-                new_pos = (new_row, new_col)
-
-                if not (0 <= new_row < n and 0 <= new_col < m):
-                    continue  # マップ外
-                if grid[new_row][new_col] != '.':
-                    continue  # 通路でない
-                if new_pos in visited:
+            for offset in offsets:
+                new_index = current + offset
+                if cells[new_index] != PATH:
+                    continue  # 通路でない（外周は壁なので範囲チェック不要）
+                if new_index in prev:
                     continue  # 訪問済み
-                if occupied_positions and (new_pos in occupied_positions and new_pos != goal):
+                if new_index in blocked and new_index != goal_index:
                     continue
                 
-                visited.add(new_pos)
-                prev[new_pos] = current
-                queue.append(new_pos)
+                prev[new_index] = current
+                queue.append(new_index)
+
+        if instrumentation is not None:
+            instrumentation.count('bfs_nodes', len(prev))
 
         # 経路復元
+        if goal_index not in prev:
+            self.debug_path = ()
+            return []  # 経路なし
         path = []
-        step = goal
+        step = goal_index
         while step is not None:
-            path.append(step)
-            step = prev.get(step)
+            path.append(grid.position(step))
+            step = prev[step]
         path.reverse()
         self.debug_path = path  # デバッグ用：移動経路記録リストに保存
-
-        if path[0] == start:
-            return path  # 最短経路
-        else:
-            return []  # 経路なし
+        return path  # 最短経路
 
 
 # テストコード
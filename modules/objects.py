@@ -6,8 +6,11 @@ if TYPE_CHECKING:
     from modules.player import Player
 from modules.items import Item, Key, Weapon, Potion, ITEM_CLASS_MAP
 from modules.constants import DIRECTIONS
+from modules.grid import Grid
 
 class Door:
+    __slots__ = ('id', 'pos', 'requires_key', 'opened')
+
     def __init__(self, id, pos, requires_key=None, opened=False):
         self.id = id
         self.pos = tuple(pos)
@@ -17,17 +20,26 @@ class Door:
     def __repr__(self):
         return f"Door(id={self.id}, pos={self.pos}, requires_key={self.requires_key}, opened={self.opened})"
 
+    def copy(self) -> Door:
+        return Door(self.id, self.pos, self.requires_key, self.opened)
+
 
 class Chest:
-    def __init__(self, id, pos, requires_key=None, contents=[], opened=False):
+    __slots__ = ('id', 'pos', 'requires_key', 'contents', 'opened')
+
+    def __init__(self, id, pos, requires_key=None, contents: list[dict] | None = None, opened=False):
         self.id = id
         self.pos = tuple(pos)
         self.requires_key = requires_key
-        self.contents: list[dict] = contents  # id, type, params の辞書リスト
+        self.contents: list[dict] = contents if contents is not None else []  # id, type, params の辞書リスト
         self.opened = opened
     
     def __repr__(self):
         return f"Chest(id={self.id}, pos={self.pos}, requires_key={self.requires_key}, contents={self.contents}, opened={self.opened})"
+
+    def copy(self) -> Chest:
+        """ 中身のリストは複製する（中身の辞書は共有） """
+        return Chest(self.id, self.pos, self.requires_key, list(self.contents), self.opened)
     
     def return_contents(self) -> list[Item]:
         """ contents を実体化して返す """
@@ -40,6 +52,8 @@ class Chest:
 
 
 class Teleport:
+    __slots__ = ('id', 'source', 'target', 'requires_key', 'bidirectional')
+
     def __init__(self, id, source, target, requires_key=None, bidirectional=True):
         self.id = id
         self.source = tuple(source)
@@ -61,20 +75,22 @@ class Teleport:
 
 # ==================== ギミック全体クラス ====================
 class Gimmicks:
-    def __init__(self, grid: list[list[str]], moveable_cells: set[tuple[int, int]] | None = None, params: dict | None = None):
+    def __init__(self, grid: Grid, moveable_cells: set[tuple[int, int]] | None = None, params: dict | None = None):
         self.grid = grid  # floorのグリッド情報参照用
-        if moveable_cells is None:
-            moveable_cells = {(i, j) for i in range(len(grid)) for j in range(len(grid[0])) if grid[i][j] == '.'}
-        self.moveable_cells = set(moveable_cells)  # 移動可能セル集合
+        # 移動可能セル集合. 領域がマップ全域の時にだけ使うので、未指定なら必要になった時に grid から作る
+        self.moveable_cells = set(moveable_cells) if moveable_cells is not None else None
         self.params = params or {}
 
         self.is_ice = 'ice' in self.params  # ギミックに氷が含まれているか
         self.ice_regions: set[tuple[int, int]] = self._normalize_region_list(self.params.get('ice'))
+        # 氷上の滑走表. direction -> {氷セル: (着地セル, 滑走列, 開始位置)}. 通過セルは 滑走列[開始位置:]
+        self.ice_slides: dict[str, dict[tuple[int, int], tuple[tuple[int, int], tuple[tuple[int, int], ...], int]]] = {}
+        self._ice_slides_init()
 
         self.is_terrain_damage = 'terrain_damage' in self.params  # ギミックに地形ダメージが含まれているか
         terrain_config = self.params.get('terrain_damage', {})
         if self.is_terrain_damage:
-            regions = terrain_config.get('regions', self.moveable_cells)
+            regions = terrain_config['regions'] if 'regions' in terrain_config else self._all_moveable_cells()
             self.terrain_damage_regions = {tuple(pos) for pos in regions}
             self.terrain_damage = terrain_config.get('damage', 1)  # ダメージ量（デフォルト1）
         else:
@@ -85,11 +101,37 @@ class Gimmicks:
         if raw_regions is None:
             return set()
         if isinstance(raw_regions, dict):
-            candidates = raw_regions.get('regions', self.moveable_cells)
+            candidates = raw_regions['regions'] if 'regions' in raw_regions else self._all_moveable_cells()
         else:
             candidates = raw_regions
         return {tuple(pos) for pos in candidates}
 
+    def _ice_slides_init(self) -> None:
+        """
+        各方向について、通行可能な氷セルが連続する列（滑走列）を1度だけ作り、
+        列上の各セルから滑ったときの着地セル（列の末尾）と通過セルを引けるようにする
+        """
+        ice_cells = {pos for pos in self.ice_regions if self.grid.is_passable(*pos)}
+        for direction, (dx, dy) in DIRECTIONS.items():
+            table = {}
+            for pos in ice_cells:
+                if (pos[0] - dx, pos[1] - dy) in ice_cells:
+                    continue  # 列の先頭からだけ辿る
+                run = [pos]
+                next_position = (pos[0] + dx, pos[1] + dy)
+                while next_position in ice_cells:
+                    run.append(next_position)
+                    next_position = (next_position[0] + dx, next_position[1] + dy)
+                run = tuple(run)  # 列上の全セルで共有する
+                for i, cell in enumerate(run):
+                    table[cell] = (run[-1], run, i + 1)
+            self.ice_slides[direction] = table
+
+    def _all_moveable_cells(self) -> set[tuple[int, int]]:
+        if self.moveable_cells is None:
+            self.moveable_cells = set(self.grid.passable_cells())
+        return self.moveable_cells
+
     def is_gimmick_cell(self, pos: tuple[int, int]) -> bool:
         """ 指定された位置が指定されたギミックのセルかどうかを判定する """
         if self.is_ice and pos in self.ice_regions:
@@ -102,6 +144,14 @@ class Gimmicks:
         return self.is_ice and pos in self.ice_regions
 
     # ===== ギミックの種類ごとの動作メソッド群 =====
+    def slide(self, pos: tuple[int, int], direction: str) -> tuple[tuple[int, int], tuple[tuple[int, int], ...]]:
+        """ pos から direction に滑ったときの (着地セル, 通過したセルの列) を返す. プレイヤー・モンスター共通 """
+        entry = self.ice_slides.get(direction, {}).get(pos)
+        if entry is None:
+            return pos, ()
+        landing, run, start = entry
+        return landing, run[start:]
+
     def ice_gimmick_effect(self, player: Player, on_visit: Callable[[tuple[int, int]], None] | None = None) -> None:
         """ プレイヤーが氷上にいる場合にスライド効果を適用する """
         current_position = player.position  # プレイヤーの現在位置
@@ -111,18 +161,12 @@ class Gimmicks:
         if direction is None:
             return  # 最後の移動方向が不明な場合は何もしない
         
-        dx, dy = DIRECTIONS[direction]
-        while True:
-            next_position = (current_position[0] + dx, current_position[1] + dy)
-            # 次の位置が移動可能セルであり、氷上である場合は移動を続ける
-            if next_position in self.ice_regions and next_position in self.moveable_cells:
-                current_position = next_position
-                if on_visit:
-                    on_visit(current_position)
-            else:
-                break
+        landing, traversed = self.slide(current_position, direction)  # 滑走表から着地セルと通過セルを引く
+        if on_visit:
+            for position in traversed:
+                on_visit(position)
         
-        player.position = current_position  # 最終的な位置に更新
+        player.position = landing  # 最終的な位置に更新
     
     
     def terrain_damage_value(self, pos: tuple[int, int]) -> int:
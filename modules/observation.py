@@ -0,0 +1,241 @@
+# ==================== 観測（エージェント学習用の NumPy 表現） ====================
+# Floor とプレイヤーの状態を学習用の配列に変換する。numpy が無い環境では使えない
+#   grid:   (N_CHANNELS, 行数, 列数) の uint8. CHANNELS の各チャネルに、そのセルにあれば 1
+#   status: (N_STATUS,) の float32. STATUS_FIELDS の順
+#   action_mask: (len(ACTIONS),) の bool. 今そのコマンドを実行して意味があるか
+# 地形のチャネル（壁・ゴール・氷・ダメージ床）は CompiledFloor ごとに1度だけ作り、同じマップの Floor で共有する
+# 未発見の隠しアイテム（hidden かつ reveal_hidden でない）は拾えないので観測に含めない
+# 毎ターン使う場合は Floor.observation_view（FloorObservation）が変わったセルだけを書き直したテンソルを返す
+try:
+    import numpy as np
+except ImportError:  # numpy はオプション
+    np = None
+
+import weakref
+from typing import TYPE_CHECKING
+from modules.grid import Grid, PATH
+if TYPE_CHECKING:
+    from modules.floor import Floor
+    from modules.player import Player
+
+CHANNELS = (
+    'wall', 'goal', 'ice', 'terrain_damage',  # 地形（フロア中は変わらない）
+    'monster_weak', 'monster_normal', 'monster_strong',
+    'item_key', 'item_potion', 'item_weapon', 'item_trap', 'item_other',
+    'door', 'chest', 'teleport',
+    'player',
+)
+CHANNEL_INDEX = {name: channel for channel, name in enumerate(CHANNELS)}
+N_CHANNELS = len(CHANNELS)
+N_STATIC_CHANNELS = 4  # CHANNELS の先頭から地形のチャネル数
+
+MONSTER_CHANNELS = {'weak': CHANNEL_INDEX['monster_weak'], 'normal': CHANNEL_INDEX['monster_normal'],
+                    'strong': CHANNEL_INDEX['monster_strong']}
+ITEM_CHANNELS = {'key': CHANNEL_INDEX['item_key'], 'potion': CHANNEL_INDEX['item_potion'],
+                 'weapon': CHANNEL_INDEX['item_weapon'], 'trap': CHANNEL_INDEX['item_trap']}
+ITEM_OTHER = CHANNEL_INDEX['item_other']  # dummy など
+DOOR = CHANNEL_INDEX['door']  # 開いていないドア
+CHEST = CHANNEL_INDEX['chest']  # 開いていない宝箱
+TELEPORT = CHANNEL_INDEX['teleport']
+PLAYER = CHANNEL_INDEX['player']
+
+STATUS_FIELDS = ('hp', 'attack', 'keys', 'missing_goal_keys', 'potions')
+N_STATUS = len(STATUS_FIELDS)
+
+ACTIONS = ('w', 'a', 's', 'd', 'u')  # 行動番号 -> コマンド（'q' と 'r' は学習では使わない）
+
+_static_layers = weakref.WeakKeyDictionary()  # CompiledFloor -> 地形チャネル
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("観測の作成には numpy が必要です。")
+
+
+# ===== 地形チャネル =====
+def static_layers(floor: 'Floor'):
+    """ (N_STATIC_CHANNELS, 行数, 列数) の地形チャネル（読み取り専用. 同じマップの Floor で共有する） """
+    _require_numpy()
+    layers = _static_layers.get(floor.compiled)
+    if layers is not None:
+        return layers
+
+    grid = floor.grid
+    n_rows, n_cols = grid.n_rows, grid.n_cols
+    layers = np.zeros((N_STATIC_CHANNELS, n_rows, n_cols), dtype=np.uint8)
+    cells = np.frombuffer(grid.cells, dtype=np.uint8).reshape(n_rows + 2, grid.stride)[1:-1, 1:-1]
+    layers[CHANNEL_INDEX['wall']] = cells != PATH
+    _fill_positions(layers[CHANNEL_INDEX['goal']], floor.goal['pos'])
+    gimmicks = floor.gimmicks
+    if gimmicks:
+        _fill_positions(layers[CHANNEL_INDEX['ice']], gimmicks.ice_regions)
+        _fill_positions(layers[CHANNEL_INDEX['terrain_damage']], gimmicks.terrain_damage_regions)
+    layers.flags.writeable = False
+    _static_layers[floor.compiled] = layers
+    return layers
+
+
+def _fill_positions(layer, positions) -> None:
+    n_rows, n_cols = layer.shape
+    positions = [pos for pos in positions if 0 <= pos[0] < n_rows and 0 <= pos[1] < n_cols]
+    if positions:
+        rows, cols = zip(*positions)
+        layer[list(rows), list(cols)] = 1
+
+
+# ===== エンティティチャネル =====
+def cell_channels(floor: 'Floor', pos: tuple[int, int]) -> list[int]:
+    """ セル pos 上のエンティティが立てるチャネル番号の列（append_entities の1セル版） """
+    channels = []
+    for monster in floor.monsters_at.get(pos, ()):
+        channels.append(MONSTER_CHANNELS.get(monster.strength, MONSTER_CHANNELS['normal']))
+    for item in floor.items_at.get(pos, ()):
+        if item.hidden and not floor.reveal_hidden:
+            continue
+        channels.append(ITEM_CHANNELS.get(item.type, ITEM_OTHER))
+    door = floor.doors_at.get(pos)
+    if door is not None and not door.opened:
+        channels.append(DOOR)
+    chest = floor.chests_at.get(pos)
+    if chest is not None and not chest.opened:
+        channels.append(CHEST)
+    if pos in floor.teleports_at:
+        channels.append(TELEPORT)
+    return channels
+
+
+def append_entities(floor: 'Floor', channels: list[int], rows: list[int], cols: list[int]) -> int:
+    """
+    フロア上のエンティティが立てる (チャネル, 行, 列) を3つのリストに追加し、追加した数を返す
+    範囲外の座標もそのまま追加する（書き込む側で除く）
+    """
+    count = len(channels)
+    for pos, monsters in floor.monsters_at.items():
+        for monster in monsters:
+            channels.append(MONSTER_CHANNELS.get(monster.strength, MONSTER_CHANNELS['normal']))
+            rows.append(pos[0])
+            cols.append(pos[1])
+    reveal_hidden = floor.reveal_hidden
+    for pos, items in floor.items_at.items():
+        for item in items:
+            if item.hidden and not reveal_hidden:
+                continue
+            channels.append(ITEM_CHANNELS.get(item.type, ITEM_OTHER))
+            rows.append(pos[0])
+            cols.append(pos[1])
+    for index, channel in ((floor.doors_at, DOOR), (floor.chests_at, CHEST)):
+        for pos, entity in index.items():
+            if not entity.opened:
+                channels.append(channel)
+                rows.append(pos[0])
+                cols.append(pos[1])
+    for pos in floor.teleports_at:
+        channels.append(TELEPORT)
+        rows.append(pos[0])
+        cols.append(pos[1])
+    return len(channels) - count
+
+
+# ===== 観測の作成 =====
+def encode_floor(floor: 'Floor', out=None):
+    """
+    フロアの全チャネル（player 以外）を out に書き込んで返す
+    out: (N_CHANNELS, H, W) の uint8. H, W がマップより大きければ、はみ出した部分は壁として埋める
+    """
+    _require_numpy()
+    n_rows, n_cols = floor.map_size
+    if out is None:
+        out = np.zeros((N_CHANNELS, n_rows, n_cols), dtype=np.uint8)
+    elif out.shape[1] < n_rows or out.shape[2] < n_cols:
+        raise ValueError(f"観測の大きさ {out.shape[1:]} がマップ {floor.map_size} より小さいです。")
+    else:
+        out[:] = 0
+        out[CHANNEL_INDEX['wall'], n_rows:, :] = 1
+        out[CHANNEL_INDEX['wall'], :, n_cols:] = 1
+    out[:N_STATIC_CHANNELS, :n_rows, :n_cols] = static_layers(floor)
+
+    # エンティティは (チャネル, 行, 列) を集めて1回の代入で立てる
+    channels, rows, cols = [], [], []
+    if append_entities(floor, channels, rows, cols):
+        rows = np.array(rows)
+        cols = np.array(cols)
+        inside = (rows >= 0) & (rows < n_rows) & (cols >= 0) & (cols < n_cols)
+        out[np.array(channels)[inside], rows[inside], cols[inside]] = 1
+    return out
+
+
+class FloorObservation:
+    """
+    Floor が持つ観測テンソル（Floor.observation_view で作る）
+    - 地形とエンティティのチャネルを encode_floor で1度だけ作り、以後は変わったセルだけ書き直す
+    - エンティティが変わったセルは Floor が dirty_cells に積む（Floor.mark_cell_changed / move_monsters）
+    - view は tensor の読み取り専用ビュー. update で tensor を書き換えるとそのまま反映される
+    - player チャネルは常に 0（プレイヤーはフロアの状態ではないので、使う側で立てる）
+    version: 内容が変わるたびに増やす（前回コピーした時から変わったかの判定用）
+    """
+    def __init__(self, floor: 'Floor') -> None:
+        self.floor = floor
+        self.tensor = encode_floor(floor)
+        self.view = self.tensor.view()
+        self.view.flags.writeable = False
+        self.dirty_cells: set[tuple[int, int]] = set()
+        self.version = 0
+
+    def __repr__(self):
+        return f"FloorObservation(shape={self.tensor.shape}, version={self.version}, dirty={len(self.dirty_cells)})"
+
+    def update(self):
+        """ dirty なセルのエンティティチャネルを書き直し、読み取り専用ビューを返す """
+        dirty = self.dirty_cells
+        if dirty:
+            floor = self.floor
+            tensor = self.tensor
+            in_bounds = floor.grid.in_bounds
+            for pos in dirty:
+                if not in_bounds(*pos):
+                    continue
+                row, col = pos
+                tensor[N_STATIC_CHANNELS:, row, col] = 0
+                for channel in cell_channels(floor, pos):
+                    tensor[channel, row, col] = 1
+            dirty.clear()
+            self.version += 1
+        return self.view
+
+
+def status_values(player: 'Player', floor: 'Floor') -> tuple:
+    """ STATUS_FIELDS の順のプレイヤーの状態 """
+    missing = sum(1 for key_id in floor.goal['keys'] if key_id not in player.keys)
+    return (player.hp, player.attack, len(player.keys), missing, len(player.potions))
+
+
+def encode_status(player: 'Player', floor: 'Floor', out=None):
+    """ status_values を out（(N_STATUS,) の float32）に書き込んで返す """
+    _require_numpy()
+    if out is None:
+        out = np.zeros(N_STATUS, dtype=np.float32)
+    out[:] = status_values(player, floor)
+    return out
+
+
+def action_mask_values(player: 'Player', grid: Grid) -> list[bool]:
+    """
+    ACTIONS の順に、実行して意味のある行動なら True
+    移動は try_move_player で動けるか、'u' はポーションを持っているか
+    """
+    from modules.game_state import try_move_player  # game_state -> floor との循環 import を避ける
+    return [bool(player.potions) if command == 'u' else try_move_player(player, command, grid) is not None
+            for command in ACTIONS]
+
+
+def action_mask(player: 'Player', grid: Grid, out=None):
+    """ action_mask_values を out（(len(ACTIONS),) の bool）に書き込んで返す """
+    _require_numpy()
+    if out is None:
+        out = np.zeros(len(ACTIONS), dtype=bool)
+    out[:] = action_mask_values(player, grid)
+    return out
@@ -3,6 +3,8 @@ from collections import Counter
 from modules.items import Item
 
 class Player:
+    __slots__ = ('position', 'hp', 'equipped_weapon_attack', 'equipped_weapon_id', 'attack', 'inventory', 'keys', 'potions',
+                 'last_move_direction')
     MAX_HP = 100
     BASE_ATK = 10
     def __init__(self, start_pos: tuple[int, int]) -> None:
@@ -20,30 +22,52 @@ class Player:
         self.last_move_direction: str | None = None  # 最後に移動した方向 ('w', 'a', 's', 'd')
         # self.visited_cells = set()  # 訪問済みセル集合
         
+    def copy(self) -> 'Player':
+        """ 同じ状態のプレイヤー（GameState.clone 用）. インベントリの Item は回収後は変わらないので共有する """
+        player = Player.__new__(Player)
+        player.position = self.position
+        player.hp = self.hp
+        player.equipped_weapon_attack = self.equipped_weapon_attack
+        player.equipped_weapon_id = self.equipped_weapon_id
+        player.attack = self.attack
+        player.inventory = dict(self.inventory)
+        player.keys = set(self.keys)
+        player.potions = set(self.potions)
+        player.last_move_direction = self.last_move_direction
+        return player
+
     # ====== ステータス表示 ======
     def print_status(self) -> None:
         """ プレイヤーステータスを表示する """
-        print(f"HP: {self.hp}/{Player.MAX_HP}, Attack: {self.attack}")
-        self.print_inventory()
+        print("\n".join(self.status_lines()))
+
+    def status_lines(self) -> list[str]:
+        """ ステータス表示の各行（HP・攻撃力 + インベントリ） """
+        return [f"HP: {self.hp}/{Player.MAX_HP}, Attack: {self.attack}", *self.inventory_lines()]
     
     # ====== インベントリ 管理 ======
     def print_inventory(self, debug: bool = False) -> None:
         """ インベントリを表示する """
-        print("Inventory:")
+        print("\n".join(self.inventory_lines(debug)))
+
+    def inventory_lines(self, debug: bool = False) -> list[str]:
+        """ インベントリ表示の各行 """
+        lines = ["Inventory:"]
         if debug:
             for id, item in self.inventory.items():
-                print(f"\t{item}: {id}")
+                lines.append(f"\t{item}: {id}")
         else:
             if self.potions:
-                print(f"\tPotions: {'🧪' * len(self.potions)}")
+                lines.append(f"\tPotions: {'🧪' * len(self.potions)}")
             
             if self.keys:  # キーid一覧を表示 だったやつをアイコンの個数で表現するようにした
-                print(f"\tKeys: {'🔑' * len(self.keys)}")
+                lines.append(f"\tKeys: {'🔑' * len(self.keys)}")
         
         if self.equipped_weapon_id:
-            print(f"\tWeapon: {self.equipped_weapon_id} (+{self.equipped_weapon_attack})")
+            lines.append(f"\tWeapon: {self.equipped_weapon_id} (+{self.equipped_weapon_attack})")
         else:
-            print("\tWeapon: None")
+            lines.append("\tWeapon: None")
+        return lines
 
     def add_item(self, item: Item) -> None:
         """ アイテムをインベントリに追加する """
@@ -62,37 +86,34 @@ class Player:
         for key_id in key_ids:
             del self.inventory[key_id]
     
-    def use_potion(self) -> bool:
-        """ ポーションを使用する """
+    def use_potion(self) -> str | None:
+        """ ポーションを使用する。使用したポーションID（無ければ None）を返す """
         if not self.potions:
-            print("使用可能なポーションがありません！")
-            return False
+            return None
         
         # インベントリからポーションを探す
         potion_id = self.potions.pop()  # 1つ取得
 
         # ポーション効果適用
         self.inventory[potion_id].apply_effect(self)
-        print(f"ポーション {potion_id} を使用しました。")
 
         # インベントリから削除
         del self.inventory[potion_id]
-        return True
+        return potion_id
     
     def recalculate_attack(self) -> None:
         """ 基礎攻撃力と装備ボーナスで攻撃力を更新 """
         self.attack = Player.BASE_ATK + self.equipped_weapon_attack
 
-    def equip_weapon(self, weapon: Item, attack_bonus: int) -> None:
-        """ 武器は1本のみ装備し、強い方へ自動で持ち替える """
+    def equip_weapon(self, weapon: Item, attack_bonus: int) -> bool:
+        """ 武器は1本のみ装備し、強い方へ自動で持ち替える。持ち替えたかどうかを返す """
         if attack_bonus <= self.equipped_weapon_attack:
-            print(f"{weapon.id} を拾ったが、すでに装備中の武器の方が強い。")
-            return
+            return False  # すでに装備中の武器の方が強い
 
         self.equipped_weapon_id = weapon.id
         self.equipped_weapon_attack = attack_bonus
         self.recalculate_attack()
-        print(f"{weapon.id} に持ち替えた。攻撃力は {self.attack} になった。")
+        return True
     
     def item_organizing(self) -> None:
         """ インベントリ内のアイテムを整理する（種類ごとにまとめるなど）, inventoryの内容が変更された場合に呼び出す """
@@ -0,0 +1,49 @@
+# ==================== 次フロアの先読み ====================
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, TYPE_CHECKING
+if TYPE_CHECKING:
+    from modules.floor import Floor
+
+
+class FloorPrefetcher:
+    """
+    次のフロアをワーカースレッド1本で先読みする
+    schedule() で読み込みを始め、take() で読み込んだ Floor を受け取る
+    take() は読み込み中なら完了を待つ. 先読みしていない・失敗した場合は None を返すので、呼び出し側で同期読み込みする
+    """
+    def __init__(self) -> None:
+        self._executor: ThreadPoolExecutor | None = None  # 初回 schedule 時に作る
+        self._future: Future | None = None
+        self._floor_index: int | None = None  # 先読み中のフロアインデックス
+
+    def schedule(self, floor_index: int, loader: Callable[[], 'Floor']) -> None:
+        """ floor_index のフロアを loader で先読みし始める（前の先読みは破棄） """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="floor-prefetch")
+        if self._future is not None:
+            self._future.cancel()
+        self._floor_index = floor_index
+        self._future = self._executor.submit(loader)
+
+    def take(self, floor_index: int) -> 'Floor | None':
+        """
+        floor_index の先読み結果の Floor を返す. 読み込み中なら終わるまで待つ（同じフロアを2回読まない）
+        先読みしていない・対象違い・失敗なら None
+        """
+        future, self._future = self._future, None
+        if future is None or self._floor_index != floor_index:
+            if future is not None:
+                future.cancel()
+            return None
+        if future.cancelled() or future.exception() is not None:  # exception() は完了まで待つ
+            return None
+        return future.result()
+
+    def shutdown(self) -> None:
+        """ ワーカースレッドを止める """
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
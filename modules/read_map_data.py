@@ -1,9 +1,12 @@
-def read_map_data(file_path: str) -> tuple[list[list[str]], str]:
+from modules.grid import Grid
+
+
+def read_map_data(file_path: str) -> tuple[Grid, str]:
     """
     map_txt を読み、[grid] と [info] を処理する。
     - [grid] は # と . のみ（検証は最小限）
     - [info] は json=xxx.json だけを見る
-    返り値: (grid: List[List[str]], json_path: str)
+    返り値: (grid: Grid, json_path: str)
     """
     with open(file_path, 'r', encoding='utf-8') as f:
         lines = f.readlines()
@@ -25,11 +28,11 @@ def read_map_data(file_path: str) -> tuple[list[list[str]], str]:
             continue
 
         if section == 'grid':
-            grid.append(list(line))
+            grid.append(line)
             continue
         elif section == 'info':
             if line.startswith("json="):
-                json_path = line.split("=", 1)[1].strip()
+                json_path = line.split("=", 1)[1].strip().replace("\\", "/")  # Windows 区切りも読めるようにする
                 continue
 
-    return grid, json_path
\ No newline at end of file
+    return Grid.from_lines(grid), json_path
\ No newline at end of file
@@ -0,0 +1,137 @@
+# ==================== マップ描画 ====================
+
+# マップを表示する際のシンボル定義 半角
+ENTITY_SYMBOLS = {
+    "player": "@",
+    "goal": "G",
+    "path": " ",
+    "wall": "■",
+    "weapon": "W",
+    "potion": "P",
+    "key": "K",
+    "trap": "!",
+    "monster": "M",
+    "opened_door": "/",
+    "closed_door": "D",
+    "closed_chest": "C",
+    "opened_chest": " ",
+    "teleport": "T",
+    "hidden_item": "?",
+}
+
+# マップを表示する際のシンボル定義 全角
+ENTITY_SYMBOLS_FULL_WIDTH = {
+    "player": "🧍",
+    "goal": "🚩",
+    "path": "　",
+    "wall": "🔳",
+    "weapon": "🗡️ ",
+    "potion": "🧪",
+    "key": "🔑",
+    "trap": "💥",
+    "monster": "👾",
+    "monster_weak": "🐁",  # ここ
+    "monster_normal": "👾",
+    "monster_strong": "🐉",
+    "opened_door": "　",
+    "closed_door": "🚪",
+    "closed_chest": "🧰",
+    "opened_chest": "　",
+    "teleport": "🔯",
+    "hidden_item": "❓",
+}
+
+
+class FloorRenderer:
+    """
+    Floor のレイヤ別差分描画器
+    - 静的レイヤ（壁・通路・ゴール）はフロアごとに1度だけ作る
+    - エンティティの重ね描きが変わったセルは Floor が dirty_cells に積む（Floor.mark_cell_changed）
+    - 1フレームでは dirty なセルとプレイヤーの新旧位置だけを描き直し、変わった行の文字列だけ作り直す
+    描画優先: プレイヤー > ゴール > テレポ > チェスト > ドア > モンスター > アイテム > 床/壁
+    """
+    def __init__(self, floor, full_width: bool = True) -> None:
+        self.floor = floor
+        self.symbol_map = ENTITY_SYMBOLS_FULL_WIDTH if full_width else ENTITY_SYMBOLS
+        self.dirty_cells: set[tuple[int, int]] = set()  # 前フレームから重ね描きが変わったセル
+        self.player_pos: tuple[int, int] | None = None  # 前フレームのプレイヤー位置
+
+        # 静的レイヤ
+        n_rows, n_cols = floor.map_size
+        wall, path, goal = self.symbol_map["wall"], self.symbol_map["path"], self.symbol_map["goal"]
+        self.static_rows: list[list[str]] = []
+        for i in range(n_rows):
+            row_codes = floor.grid.row_string(i)
+            self.static_rows.append([path if code == '.' else wall for code in row_codes])
+        for (i, j) in floor.goal['pos']:
+            if 0 <= i < n_rows and 0 <= j < n_cols:
+                self.static_rows[i][j] = goal
+
+        # 現在のフレーム（静的レイヤ + エンティティ）
+        self.rows: list[list[str]] = [row.copy() for row in self.static_rows]
+        for pos in self._entity_cells():
+            self.rows[pos[0]][pos[1]] = self.cell_symbol(pos)
+        self.row_strings: list[str] = ["".join(row) for row in self.rows]
+
+    def _entity_cells(self) -> set[tuple[int, int]]:
+        floor = self.floor
+        cells = set(floor.items_at)
+        cells.update(floor.monsters_at, floor.doors_at, floor.chests_at, floor.teleports_at)
+        return {pos for pos in cells if floor.grid.in_bounds(*pos)}
+
+    def cell_symbol(self, pos: tuple[int, int], player_pos: tuple[int, int] | None = None) -> str:
+        """ 1セル分のシンボルを描画優先順に決める """
+        floor = self.floor
+        symbol_map = self.symbol_map
+        if pos == player_pos:  # プレイヤー位置
+            return symbol_map["player"]
+        if pos in floor.goal['pos']:  # ゴール位置
+            return symbol_map["goal"]
+        if pos in floor.teleports_at:
+            return symbol_map["teleport"]
+        chest = floor.chests_at.get(pos)
+        if chest is not None:
+            return symbol_map["opened_chest" if chest.opened else "closed_chest"]
+        door = floor.doors_at.get(pos)
+        if door is not None:
+            return symbol_map["opened_door" if door.opened else "closed_door"]
+        monsters = floor.monsters_at.get(pos)
+        if monsters:
+            monster_strength_key = f"monster_{monsters[-1].strength}"
+            return symbol_map[monster_strength_key if (monster_strength_key in symbol_map) else "monster"]
+        items = floor.items_at.get(pos)
+        if items:
+            item = items[-1]
+            if item.hidden and floor.reveal_hidden:  # 未発見の隠しアイテム
+                return symbol_map["hidden_item"]
+            return symbol_map[item.type]
+        return self.static_rows[pos[0]][pos[1]]
+
+    def update(self, player_pos: tuple[int, int] | None = None) -> set[int]:
+        """ dirty なセルを描き直し、変更があった行番号の集合を返す """
+        dirty = set(self.dirty_cells)
+        self.dirty_cells.clear()  # 同じ集合を Floor も持っている（mark_cell_changed が積む）ので作り直さない
+        if player_pos != self.player_pos:
+            if self.player_pos is not None:
+                dirty.add(self.player_pos)
+            if player_pos is not None:
+                dirty.add(player_pos)
+            self.player_pos = player_pos
+
+        changed_rows = set()
+        rows = self.rows
+        for pos in dirty:
+            if not self.floor.grid.in_bounds(*pos):
+                continue
+            symbol = self.cell_symbol(pos, player_pos)
+            if rows[pos[0]][pos[1]] != symbol:
+                rows[pos[0]][pos[1]] = symbol
+                changed_rows.add(pos[0])
+        for i in changed_rows:
+            self.row_strings[i] = "".join(rows[i])
+        return changed_rows
+
+    def render(self, player_pos: tuple[int, int] | None = None) -> str:
+        """ 差分を反映したフレーム全体の文字列を返す """
+        self.update(player_pos)
+        return "\n".join(self.row_strings) + "\n"
@@ -0,0 +1,140 @@
+# ==================== リプレイ ====================
+# 1ゲームを「シード + フロア指定 + コマンド列」で記録し、ヘッドレスに再実行する。
+# 記録は JSON Lines の1行:
+#   {"v": 1, "seed": 123, "maps": null, "commands": "wwdsu...", "result": {"turns": 57, "won": false, ...}}
+# commands は1文字コマンドを連結した文字列. result は記録時の結果で、再実行結果との比較に使う
+#
+# python -m modules.replay .cache/replays.jsonl --workers 4
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+
+from modules.constants import COMMANDS, REPLAY_LOG_PATH
+from modules.game_state import GameState
+
+REPLAY_VERSION = 1
+
+
+class Replay:
+    """
+    1ゲーム分のリプレイ
+    seed: GameState のシード
+    commands: コマンド列（1文字コマンドの連結）
+    maps: フロア指定（GameState の requires_map_file_path. None ならシードによる抽選）
+    result: 記録時の結果（summarize の戻り値. 無ければ比較しない）
+    """
+    def __init__(self, seed: int, commands: str, maps: list[str] | None = None, result: dict | None = None) -> None:
+        self.seed = seed
+        self.commands = commands
+        self.maps = maps
+        self.result = result
+
+    def __repr__(self):
+        return f"Replay(seed={self.seed}, maps={self.maps}, turns={len(self.commands)}, result={self.result})"
+
+    @classmethod
+    def from_game(cls, game_state: GameState) -> 'Replay':
+        """ 進行中・終了済みの GameState からリプレイを作る """
+        return cls(game_state.seed, "".join(game_state.commands), list(game_state.requires_map_file_path) or None,
+                   summarize(game_state))
+
+    def to_json(self) -> str:
+        return json.dumps({"v": REPLAY_VERSION, "seed": self.seed, "maps": self.maps,
+                           "commands": self.commands, "result": self.result}, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, line: str) -> 'Replay':
+        data = json.loads(line)
+        if data.get("v") != REPLAY_VERSION:
+            raise ValueError(f"未対応のリプレイ形式です: v={data.get('v')}")
+        commands = data["commands"]
+        invalid = set(commands) - set(COMMANDS)
+        if invalid:
+            raise ValueError(f"不正なコマンドが含まれています: {sorted(invalid)}")
+        return cls(data["seed"], commands, data.get("maps"), data.get("result"))
+
+
+def summarize(game_state: GameState) -> dict:
+    """ リプレイの一致判定に使うゲーム結果 """
+    return {
+        "turns": game_state.turn_count,
+        "won": game_state.is_game_cleared,
+        "game_over": game_state.is_game_over,
+        "floors_cleared": game_state.cleared_count,
+        "hp": game_state.player.hp,
+        "position": list(game_state.player.position),
+    }
+
+
+# ==================== 再実行 ====================
+def run_replay(replay: Replay, instrumentation=None) -> GameState:
+    """ リプレイを入出力なしで再実行し、最終状態の GameState を返す（ゲームが終わったら残りのコマンドは捨てる） """
+    game_state = GameState(requires_map_file_path=replay.maps or [], seed=replay.seed, instrumentation=instrumentation)
+    step = game_state.step
+    for command in replay.commands:
+        if game_state.is_game_over or game_state.is_game_cleared:
+            break
+        step(command)
+    return game_state
+
+
+def verify_replay(replay: Replay) -> tuple[bool, dict]:
+    """ 再実行して記録時の結果と一致するかを返す. (一致したか, 再実行結果) """
+    result = summarize(run_replay(replay))
+    return (replay.result is None or replay.result == result), result
+
+
+# ==================== ファイル入出力 ====================
+def save_replay(replay: Replay, path: str = REPLAY_LOG_PATH) -> None:
+    """ リプレイを JSON Lines ファイルに1行追記する """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(replay.to_json() + "\n")
+
+
+def load_replays(path: str) -> Iterator[Replay]:
+    """ JSON Lines ファイルからリプレイを順に読む（空行は飛ばす） """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield Replay.from_json(line)
+
+
+def _verify_line(replay: Replay) -> tuple[bool, dict, Replay]:
+    ok, result = verify_replay(replay)
+    return ok, result, replay
+
+
+# ==================== CLI ====================
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="記録したゲームを再実行して結果を照合する")
+    parser.add_argument("paths", nargs="*", default=[REPLAY_LOG_PATH], help="リプレイの JSON Lines ファイル")
+    parser.add_argument("--workers", type=int, default=1, help="並列実行するプロセス数（1 なら同一プロセス）")
+    args = parser.parse_args(argv)
+
+    replays = [replay for path in args.paths for replay in load_replays(path)]
+    start = time.perf_counter()
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            outcomes = list(executor.map(_verify_line, replays, chunksize=max(1, len(replays) // (args.workers * 4))))
+    else:
+        outcomes = [_verify_line(replay) for replay in replays]
+    elapsed = time.perf_counter() - start
+
+    mismatches = [(result, replay) for ok, result, replay in outcomes if not ok]
+    for result, replay in mismatches:
+        print(f"MISMATCH seed={replay.seed} maps={replay.maps}: recorded {replay.result}, replayed {result}")
+    turns = sum(len(replay.commands) for replay in replays)
+    print(f"{len(replays)} replays, {turns} turns in {elapsed:.2f}s ({turns / max(elapsed, 1e-9):.0f} turns/s), "
+          f"{len(mismatches)} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+# ==================== フロアの解法探索 ====================
+# (プレイヤー位置, 所持している鍵の集合) を1つの状態として A* で探索し、
+# フロアをクリアできる最短のコマンド列を求める。見つからなければ、到達可能な状態をすべて調べた結果（解なしの証明）を返す。
+# ただし動くモンスターだけが落とす鍵が要る場合・探索を打ち切った場合は「判定できない」（UNDETERMINED）とする。
+#
+# 移動のモデル（GameState.step / Floor.enter_cell と同じ順序）
+#   1. 隣のセルへ1歩（壁なら不可）
+#   2. 氷の上なら、同じ向きに滑走列の末尾まで滑る（Gimmicks.ice_slides）
+#   3. 踏んだ／滑り抜けたセルの鍵を拾う（隠しアイテムは reveal_hidden のときだけ）
+#   4. 最後のセルがテレポートの起動セルなら飛ぶ（飛び先のアイテムは拾わない）
+#   5. ゴール判定（Floor.check_goal と同じ reach / keys_only / reach_and_keys）
+# README のルールとゲーム本体の実装がずれている所は、どちらで遊んでも成り立つ側に倒す
+#   - 鍵の要るドアは、鍵を持つまで通れない（本体はまだドアで止めない）
+#   - 鍵の要るテレポートは、鍵を持たずに踏まない（本体は鍵を見ずに飛ばす）
+#   - 宝箱の中身・動くモンスターのドロップは鍵の入手元にしない. 動かないモンスターのドロップは、その位置で入手できるとみなす
+# HP（罠・ダメージ床・戦闘）とモンスターの移動は扱わない。鍵は使っても無くならないので、開いたドアの集合は鍵の集合から決まる
+#
+# python -m modules.solver map_data/map01.txt map_data/map03.txt
+import argparse
+import heapq
+import time
+from collections import deque
+
+from modules.constants import DIRECTIONS
+from modules.floor import Floor
+from modules.grid import PATH
+
+MOVE_COMMANDS = tuple(DIRECTIONS)  # 'w', 's', 'a', 'd'
+
+# SolveResult.status
+SOLVED = 'solved'  # 手順が見つかった
+UNSOLVABLE = 'unsolvable'  # 到達可能な状態をすべて調べても解が無い（証明済み）
+UNDETERMINED = 'undetermined'  # 解は見つからなかったが、動くモンスターのドロップ・max_states の打ち切りのため証明にならない
+
+
+class SolveResult:
+    """
+    探索結果
+    status: SOLVED / UNSOLVABLE / UNDETERMINED
+    solvable: クリアできるか（status == SOLVED）
+    commands: 最短のクリア手順（solvable のときだけ. w/a/s/d の列）
+    states_explored: 調べた状態数
+    reachable_cells: 鍵の有無に関係なく到達できたセル数
+    missing_keys: ゴールに必要なのに、どの到達可能な状態でも手に入らなかった鍵
+    mobile_drops: 手に入らなかった鍵（ドア・テレポート用も含む）のうち、動くモンスターが落とす鍵（鍵 ID -> モンスター ID のリスト）
+    """
+    def __init__(self, status: str, commands: list[str], states_explored: int, reachable_cells: int,
+                 missing_keys: list[str], elapsed: float, mobile_drops: dict[str, list[str]] | None = None) -> None:
+        self.status = status
+        self.solvable = status == SOLVED
+        self.commands = commands
+        self.states_explored = states_explored
+        self.reachable_cells = reachable_cells
+        self.missing_keys = missing_keys
+        self.elapsed = elapsed
+        self.mobile_drops = mobile_drops or {}
+
+    def __repr__(self):
+        return (f"SolveResult(status={self.status}, moves={len(self.commands)}, states_explored={self.states_explored}, "
+                f"reachable_cells={self.reachable_cells}, missing_keys={self.missing_keys})")
+
+
+class FloorSolver:
+    """
+    1フロア分の探索器
+    状態は 1つの int: (鍵のビット集合 << index_bits) | 位置の Grid index
+    鍵のビットは、ゴール・ドア・テレポートが要求する鍵 ID にだけ割り当てる（それ以外の鍵は結果に影響しない）
+    各 (セル, 向き) の移動結果（着地 index, 拾う鍵, 要る鍵）は最初に1度だけ計算する
+    ヒューリスティックは「ドアをすべて開けた時の、ゴール・まだ持っていない必要な鍵までの最少手数」の最大値
+    """
+    def __init__(self, floor: Floor) -> None:
+        self.floor = floor
+        grid = floor.grid
+        self.grid = grid
+        goal = floor.goal
+
+        # ===== 鍵のビット割り当て =====
+        key_ids: list[str] = []
+        def add_key(key_id):
+            if key_id is not None and key_id not in key_ids:
+                key_ids.append(key_id)
+        for key_id in goal['keys']:
+            add_key(key_id)
+        for door in floor.doors.values():
+            add_key(door.requires_key)
+        for teleport in floor.teleports.values():
+            add_key(teleport.requires_key)
+        self.key_ids = key_ids
+        self.key_bits = {key_id: 1 << i for i, key_id in enumerate(key_ids)}
+        self.goal_mask = sum(self.key_bits[key_id] for key_id in goal['keys'])
+
+        # ===== セルごとの鍵の入手元・必要な鍵 =====
+        self.key_at: dict[int, int] = {}  # index -> そのセルで拾える鍵のビット
+        self.mobile_drops: dict[str, list[str]] = {}  # 鍵 ID -> その鍵を落とす動くモンスター（入手元にしない）
+        for item in floor.items.values():
+            if item.type == 'key' and item.id in self.key_bits and (not item.hidden or floor.reveal_hidden):
+                self._add_key_source(item.pos, item.id)
+        for monster in floor.monsters.values():
+            for drop in monster.drop_list:
+                if not isinstance(drop, dict) or drop.get('type') != 'key' or drop.get('id') not in self.key_bits:
+                    continue
+                if monster.ai_type == 'static' or monster.move_every == 0:
+                    self._add_key_source(monster.pos, drop['id'])
+                else:
+                    self.mobile_drops.setdefault(drop['id'], []).append(monster.id)
+
+        self.door_mask: dict[int, int] = {}  # index -> 通るのに要る鍵のビット
+        for door in floor.doors.values():
+            if door.requires_key is not None and not door.opened:
+                index = grid.index(*door.pos)
+                self.door_mask[index] = self.door_mask.get(index, 0) | self.key_bits[door.requires_key]
+
+        self.teleport_to: dict[int, tuple[int, int]] = {}  # 起動セル index -> (飛び先 index, 要る鍵のビット)
+        for pos, teleport in floor.teleports_at.items():
+            destination = teleport.get_destination(pos)
+            required = self.key_bits[teleport.requires_key] if teleport.requires_key is not None else 0
+            self.teleport_to[grid.index(*pos)] = (grid.index(*destination), required)
+
+        self.goal_type = goal['type']
+        self.goal_indices = {grid.index(*pos) for pos in goal['pos'] if grid.is_passable(*pos)}
+        gimmicks = floor.gimmicks
+        self.has_ice = bool(gimmicks and gimmicks.is_ice and gimmicks.ice_regions)
+
+        self.index_bits = grid.size.bit_length()
+        self.index_mask = (1 << self.index_bits) - 1
+        self.successors: dict[int, tuple[tuple[int, int, int, str], ...]] = {}  # index -> ((着地, 拾う鍵, 要る鍵, コマンド), ...)
+        self._build_successors()
+        self._goal_distance = self._relaxed_distance(lambda index, gained: index in self.goal_indices, at_cell=True)
+        self._key_distance = {bit: self._relaxed_distance(lambda index, gained, bit=bit: gained & bit)
+                              for key_id, bit in self.key_bits.items() if key_id in goal['keys']}
+
+    def _add_key_source(self, pos, key_id: str) -> None:
+        index = self.grid.index(*pos)
+        self.key_at[index] = self.key_at.get(index, 0) | self.key_bits[key_id]
+
+    # ===== 1手分の移動 =====
+    def move(self, index: int, command: str) -> tuple[int, int, int] | None:
+        """
+        index から command で動いた結果 (着地 index, 拾う鍵, 要る鍵) を返す. 壁で動けなければ None
+        要る鍵: 通るドア・乗るテレポートの鍵のうち、同じ手の途中で拾う鍵を除いたもの
+        """
+        grid = self.grid
+        new_index = index + grid.neighbor_offsets[command]
+        if grid.cells[new_index] != PATH:
+            return None
+
+        traversed = [new_index]
+        gimmicks = self.floor.gimmicks
+        if self.has_ice and gimmicks.is_ice_cell(grid.position(new_index)):
+            landing, passed = gimmicks.slide(grid.position(new_index), command)
+            traversed.extend(grid.index(*pos) for pos in passed)
+
+        gained = required = 0
+        for cell in traversed:
+            required |= self.door_mask.get(cell, 0) & ~gained
+            gained |= self.key_at.get(cell, 0)
+        landing = traversed[-1]
+        teleport = self.teleport_to.get(landing)
+        if teleport is not None:
+            landing, teleport_key = teleport
+            required |= teleport_key & ~gained
+        return landing, gained, required
+
+    def _build_successors(self) -> None:
+        """ 開始位置から（鍵を無視して）行けるセルすべてについて、4方向の移動結果を1度だけ計算する """
+        start = self.grid.index(*self.floor.start)
+        successors = self.successors
+        successors[start] = ()
+        queue = deque([start])
+        while queue:
+            index = queue.popleft()
+            moves = []
+            for command in MOVE_COMMANDS:
+                moved = self.move(index, command)
+                if moved is None:
+                    continue
+                moves.append((*moved, command))
+                if moved[0] not in successors:
+                    successors[moved[0]] = ()
+                    queue.append(moved[0])
+            successors[index] = tuple(moves)
+
+    def _relaxed_distance(self, reached, at_cell: bool = False) -> dict[int, int]:
+        """
+        ドアと鍵の要るテレポートをすべて開けた時の、各セルから目標までの最少手数（A* のヒューリスティック）
+        reached(着地 index, 拾う鍵): その手で目標に届くか. at_cell なら目標のセル自体の距離を 0 にする
+        実際の移動はこの緩和した移動の部分集合なので、許容的かつ無矛盾になる
+        """
+        predecessors: dict[int, list[int]] = {}
+        distance: dict[int, int] = {}
+        queue = deque()
+        for index, moves in self.successors.items():
+            if at_cell and reached(index, 0):
+                distance[index] = 0
+                queue.append(index)
+            for landing, gained, _, _ in moves:
+                predecessors.setdefault(landing, []).append(index)
+                if not at_cell and reached(landing, gained) and index not in distance:
+                    distance[index] = 1
+                    queue.append(index)
+        while queue:
+            index = queue.popleft()
+            d = distance[index] + 1
+            for previous in predecessors.get(index, ()):
+                if previous not in distance:
+                    distance[previous] = d
+                    queue.append(previous)
+        return distance
+
+    def is_goal(self, index: int, mask: int) -> bool:
+        if self.goal_type == 'reach':
+            return index in self.goal_indices
+        if self.goal_type == 'keys_only':
+            return mask & self.goal_mask == self.goal_mask
+        if self.goal_type == 'reach_and_keys':
+            return index in self.goal_indices and mask & self.goal_mask == self.goal_mask
+        return False
+
+    def heuristic(self, index: int, mask: int) -> int | None:
+        """ 残りの最少手数の下限. ゴールに届かない状態なら None """
+        h = 0
+        if self.goal_type != 'keys_only':
+            h = self._goal_distance.get(index)
+            if h is None:
+                return None
+        if self.goal_type != 'reach':
+            for bit, distance in self._key_distance.items():
+                if not mask & bit:
+                    d = distance.get(index)
+                    if d is None:
+                        return None
+                    h = max(h, d)
+        return h
+
+    # ===== 探索 =====
+    def solve(self, max_states: int | None = None) -> SolveResult:
+        """
+        A* で最短のクリア手順を探す（1手のコストは1）
+        解が無い場合、動くモンスターだけが落とす鍵が手に入らなかった・max_states を超えて打ち切った時は UNDETERMINED
+        （モンスターの移動は扱わないので、その鍵が取れるかは決められない）. それ以外は UNSOLVABLE
+        """
+        start_time = time.perf_counter()
+        index_bits, index_mask = self.index_bits, self.index_mask
+        successors = self.successors
+        start = self.grid.index(*self.floor.start)
+        parents: dict[int, tuple[int, str] | None] = {start: None}  # 状態 -> (直前の状態, コマンド)
+        depth = {start: 0}
+        collected = 0  # どこかの状態で持っていた鍵
+        # 鍵は減らないので、同じセルに同じ手数以下でより多くの鍵を持って来た状態があれば、その状態は調べなくてよい
+        seen_at: dict[int, list[tuple[int, int]]] = {start: [(0, 0)]}  # index -> [(鍵, 手数), ...]
+
+        found = None
+        truncated = False
+        counter = 0  # f が同じなら手数の多い方、さらに同じなら先に積んだ方から
+        h = self.heuristic(start, 0)
+        frontier = [(h, 0, counter, start)] if h is not None else []
+        while frontier:
+            _, negative_g, _, state = heapq.heappop(frontier)
+            g = -negative_g
+            if g != depth[state]:
+                continue  # より短い経路で付け替えられた古いエントリ
+            index, mask = state & index_mask, state >> index_bits
+            if g > 0 and self.is_goal(index, mask):
+                found = state
+                break
+            g += 1
+            for landing, gained, required, command in successors[index]:
+                if required & ~mask:
+                    continue  # 鍵が足りないドア・テレポート
+                new_mask = mask | gained
+                entries = seen_at.get(landing)
+                if entries is None:
+                    seen_at[landing] = [(new_mask, g)]
+                elif any(seen_mask | new_mask == seen_mask and seen_g <= g for seen_mask, seen_g in entries):
+                    continue
+                else:
+                    entries.append((new_mask, g))
+                new_state = (new_mask << index_bits) | landing
+                parents[new_state] = (state, command)
+                depth[new_state] = g
+                collected |= new_mask
+                h = self.heuristic(landing, new_mask)
+                if h is None:
+                    continue  # 鍵を全部開けてもゴールに届かない
+                counter += 1
+                heapq.heappush(frontier, (g + h, -g, counter, new_state))
+            if max_states is not None and len(parents) > max_states:
+                truncated = True
+                break
+
+        commands = []
+        if found is not None:
+            state = found
+            while parents[state] is not None:
+                state, command = parents[state]
+                commands.append(command)
+            commands.reverse()
+        missing = [] if self.goal_type == 'reach' else \
+            [key_id for key_id in self.floor.goal['keys'] if not collected & self.key_bits[key_id]]
+        mobile_drops = {key_id: monster_ids for key_id, monster_ids in self.mobile_drops.items()
+                        if key_id in self.key_bits and not collected & self.key_bits[key_id]}
+        if found is not None:
+            status = SOLVED
+        elif truncated or mobile_drops:
+            status = UNDETERMINED
+        else:
+            status = UNSOLVABLE
+        return SolveResult(status, commands, len(parents), len(successors), missing,
+                           time.perf_counter() - start_time, mobile_drops)
+
+
+def solve_floor(floor: Floor, max_states: int | None = None) -> SolveResult:
+    """ floor の最短クリア手順を探す """
+    return FloorSolver(floor).solve(max_states)
+
+
+def solve_map_file(map_file_path: str, max_states: int | None = None) -> SolveResult:
+    """ マップファイルを読み込んで最短クリア手順を探す """
+    return solve_floor(Floor(map_file_path), max_states)
+
+
+# ==================== CLI ====================
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="フロアがクリア可能かを調べ、最短手順を表示する")
+    parser.add_argument("maps", nargs="+", help="マップの TXT ファイル")
+    parser.add_argument("--route", action="store_true", help="最短手順のコマンド列も表示する")
+    parser.add_argument("--max-states", type=int, default=None, help="調べる状態数の上限")
+    args = parser.parse_args(argv)
+
+    unsolvable = 0  # 判定できないフロアは数えない（終了コードは証明できたクリア不可能・読み込み失敗だけで決める）
+    for map_file in args.maps:
+        try:
+            result = solve_map_file(map_file, args.max_states)
+        except (OSError, ValueError) as e:
+            unsolvable += 1
+            print(f"{map_file}: 読み込めません ({e})")
+            continue
+        if result.solvable:
+            print(f"{map_file}: クリア可能 最短 {len(result.commands)} 手 "
+                  f"(状態 {result.states_explored}, {result.elapsed:.2f}s)")
+            if args.route:
+                print("".join(result.commands))
+        else:
+            reason = f" 入手できない鍵: {', '.join(result.missing_keys)}" if result.missing_keys else ""
+            for key_id, monster_ids in result.mobile_drops.items():
+                reason += f"\n  {key_id} は動くモンスター {', '.join(monster_ids)} のドロップ（位置が決まらないので数えない）"
+            if result.status == UNDETERMINED:
+                label = "判定できません（手順は見つからないが、クリア不可能の証明にもならない）"
+            else:
+                unsolvable += 1
+                label = "クリア不可能"
+            print(f"{map_file}: {label} (到達可能セル {result.reachable_cells}, 状態 {result.states_explored}, "
+                  f"{result.elapsed:.2f}s){reason}")
+    return 1 if unsolvable else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,191 @@
+# ==================== 端末への描画 ====================
+# PlainTerminal: 毎ターン マップ・ステータスを print で出し直す（従来の表示. 非対応端末の既定）
+# AnsiTerminal: 前フレームを覚えておき、変わったセルだけを ANSI エスケープ（カーソル移動）で書き換える
+#               1フレームは1回の write で送るので、遅い回線でも転送量と書き込み回数が少ない
+# どちらも TerminalSink なので、ターンのイベント表示もそのまま担当する
+import os
+import shutil
+import sys
+import unicodedata
+from functools import lru_cache
+from typing import TextIO, TYPE_CHECKING
+
+from modules.event_sinks import TerminalSink
+from modules.events import TurnResult
+if TYPE_CHECKING:
+    from modules.floor import Floor
+    from modules.player import Player
+
+CSI = "\x1b["
+CLEAR_SCREEN = CSI + "H" + CSI + "2J"
+CLEAR_TO_END = CSI + "J"
+CLEAR_LINE_END = CSI + "K"
+
+
+def cursor_to(row: int, col: int) -> str:
+    """ 1始まりの (row, col) にカーソルを移すエスケープシーケンス """
+    return f"{CSI}{row};{col}H"
+
+
+@lru_cache(maxsize=None)
+def is_unstable_width(symbol: str) -> bool:
+    """
+    端末によって表示幅が変わりうるシンボルか（異体字セレクタ付き絵文字・曖昧幅文字など）
+    これらを含む行は、行の文字列ではなくセルごとに列位置を指定して描く
+    """
+    for char in symbol:
+        if char == '\ufe0f' or (ord(char) >= 0x80 and unicodedata.east_asian_width(char) in ('N', 'A')):
+            return True
+    return False
+
+
+def display_width(text: str) -> int:
+    """ 文字列の表示桁数の目安（全角・絵文字は2桁） """
+    return sum(2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1 for char in text)
+
+
+@lru_cache(maxsize=None)
+def fits_cell(symbol: str, cell_width: int) -> bool:
+    """ 端末上でちょうど cell_width 桁になるシンボルか（違えば行の文字列から列位置が決まらない） """
+    return not is_unstable_width(symbol) and display_width(symbol) == cell_width
+
+
+class PlainTerminal(TerminalSink):
+    """ 従来どおり、毎ターン マップとステータスを全体 print する """
+    def draw(self, floor: 'Floor', player: 'Player') -> None:
+        floor.print_grid(player, output_file_object=self.stream)
+        print(file=self.stream)
+        print("\n".join(player.status_lines()), file=self.stream)
+        print(file=self.stream)
+
+
+class AnsiTerminal(TerminalSink):
+    """
+    ANSI エスケープによる差分描画
+    画面レイアウト（1始まりの行）:
+        1 .. n_rows           マップ（1セル = cell_width 桁で固定. 全角シンボルは2桁）
+        n_rows + 3 ..         ステータス
+        その下                前ターンのイベントメッセージ、入力プロンプト
+    フロアが変わった時・端末サイズが変わった時は画面を消して全体を描き直す
+    マップが端末の高さに収まらない場合は、全体を1回の write で出し直す（スクロール表示）
+    """
+    def __init__(self, stream: TextIO | None = None, full_width: bool = True) -> None:
+        super().__init__(stream)
+        self.full_width = full_width
+        self.cell_width = 2 if full_width else 1
+
+        self._renderer = None  # 前フレームを描いた FloorRenderer（フロアが変わったら全描画）
+        self._cells: list[list[str]] = []  # 前フレームのセル
+        self._row_strings: list[str] = []  # 前フレームの行文字列（変わった行だけセル単位で比較する）
+        self._terminal_size: tuple[int, int] | None = None
+        self._messages = ""  # 前ターンのイベントメッセージ（次のフレームでも表示し続ける）
+        self._tail = ""  # 前フレームで描いたステータス + メッセージ
+        self._tail_rows: int | None = None  # その行数（折り返しがあって分からない時は None）
+
+    def _stream(self) -> TextIO:
+        return self.stream if self.stream is not None else sys.stdout
+
+    def invalidate(self) -> None:
+        """ 次のフレームを全体描画にする（画面が他の出力で乱れた時など） """
+        self._renderer = None
+
+    def draw(self, floor: 'Floor', player: 'Player') -> None:
+        renderer = floor.get_renderer(self.full_width)
+        renderer.update(player.position)
+        status = "\n".join(line.expandtabs() for line in player.status_lines())
+        n_rows = len(renderer.rows)
+        terminal_size = tuple(shutil.get_terminal_size())
+
+        status_row = n_rows + 3
+        if status_row + status.count("\n") + 2 > terminal_size[1]:
+            # 端末に収まらない: 位置指定はできないので全体を流す
+            self.invalidate()
+            self._write("\n".join(renderer.row_strings) + "\n\n\n" + status + "\n\n")
+            return
+
+        out = []
+        if renderer is not self._renderer or terminal_size != self._terminal_size:
+            out.append(CLEAR_SCREEN)
+            for i, row_string in enumerate(renderer.row_strings):
+                self._draw_row(i, renderer.rows[i], row_string, out)
+            self._renderer = renderer
+            self._terminal_size = terminal_size
+            self._cells = [row.copy() for row in renderer.rows]
+            self._row_strings = list(renderer.row_strings)
+            self._tail, self._tail_rows = "", None
+        else:
+            self._diff_rows(renderer, out)
+
+        # ステータスと前ターンのメッセージ. 前フレームと同じなら、その下（入力プロンプト以降）だけ消す
+        tail = status + "\n\n" + self._messages
+        if tail == self._tail and self._tail_rows is not None:
+            out.append(cursor_to(status_row + self._tail_rows, 1) + CLEAR_TO_END)
+        else:
+            out.append(cursor_to(status_row, 1) + CLEAR_TO_END + tail)
+            self._tail = tail
+            fits = all(display_width(line) < terminal_size[0] for line in tail.split("\n"))
+            self._tail_rows = tail.count("\n") if fits else None
+        self._write("".join(out))
+
+    def _draw_row(self, i: int, row: list[str], row_string: str, out: list[str]) -> None:
+        """
+        1行を描くシーケンスを out に積む
+        全セルが cell_width 桁なら行の文字列をそのまま1回で書き、そうでなければセルごとに列位置を指定して書く
+        （後者は右端からはみ出した分を行末まで消す）
+        """
+        if all(fits_cell(symbol, self.cell_width) for symbol in row):
+            out.append(cursor_to(i + 1, 1) + row_string)
+            return
+        cell_width = self.cell_width
+        out.extend(cursor_to(i + 1, j * cell_width + 1) + symbol for j, symbol in enumerate(row))
+        out.append(CLEAR_LINE_END)
+
+    def _diff_rows(self, renderer, out: list[str]) -> None:
+        """
+        前フレームから変わったセルだけを書き換えるシーケンスを out に積む
+        幅が cell_width でないシンボルが前後のフレームのどちらかにある行は、行全体をセルごとの位置指定で描き直す
+        """
+        cell_width = self.cell_width
+        for i, row_string in enumerate(renderer.row_strings):
+            if row_string == self._row_strings[i]:
+                continue
+            old_row, new_row = self._cells[i], renderer.rows[i]
+            if all(fits_cell(symbol, self.cell_width) for symbol in old_row) and all(fits_cell(symbol, self.cell_width) for symbol in new_row):
+                for j, symbol in enumerate(new_row):
+                    if symbol != old_row[j]:
+                        out.append(cursor_to(i + 1, j * cell_width + 1) + symbol)
+            else:
+                self._draw_row(i, new_row, row_string, out)
+            self._cells[i] = new_row.copy()
+            self._row_strings[i] = row_string
+
+    def write_turn(self, result: TurnResult) -> None:
+        """
+        メッセージは次の draw で画面と同じ1回の write に入れる（1フレーム1回の書き込み）
+        ゲームが終わったターンは次の draw が無いので、ここで書き込む
+        """
+        self._messages = self.format_turn(result)
+        if self._messages and (result.game_over or result.game_cleared):
+            self._write(self._messages)
+
+    def _write(self, text: str) -> None:
+        stream = self._stream()
+        stream.write(text)
+        stream.flush()
+
+
+def supports_ansi(stream: TextIO) -> bool:
+    """ stream が ANSI エスケープを解釈する端末か """
+    if not hasattr(stream, 'isatty') or not stream.isatty():
+        return False
+    term = os.environ.get('TERM', '')
+    if os.name == 'nt':
+        return bool(os.environ.get('WT_SESSION') or term)  # Windows Terminal / 端末エミュレータ上のみ
+    return term not in ('', 'dumb')
+
+
+def create_terminal(stream: TextIO | None = None, full_width: bool = True) -> PlainTerminal | AnsiTerminal:
+    """ 端末の種類に応じて AnsiTerminal か PlainTerminal を返す """
+    if supports_ansi(stream if stream is not None else sys.stdout):
+        return AnsiTerminal(stream, full_width)
+    return PlainTerminal(stream)
@@ -0,0 +1,198 @@
+# ==================== 学習用のベクトル化環境 ====================
+# 独立した多数のゲーム（GameState）を1つのオブジェクトでまとめて reset / step する Gym 風の API。
+# 画面描画・入力待ちはせず GameState.step を直接呼び、観測は全環境分を1つの NumPy 配列にまとめて返す。
+#   obs['grid']:        (n_envs, N_CHANNELS, H, W) uint8  （modules/observation.py の CHANNELS. マップ外は壁）
+#   obs['status']:      (n_envs, N_STATUS) float32        （HP・攻撃力・鍵の数など）
+#   obs['action_mask']: (n_envs, len(ACTIONS)) bool       （try_move_player で動ける方向と、ポーションの有無）
+# 返す配列は毎回同じバッファを書き換える（残したい場合は呼び出し側でコピーする）。
+# 終了した環境は step の中で次のシードで reset し、終了時の情報は infos に入れる。numpy が必要
+#
+# env = VectorEnv(256, seed=0)
+# obs = env.reset()
+# obs, rewards, terminated, truncated, infos = env.step(actions)
+#
+# python -m modules.vector_env --envs 256 --steps 200
+import argparse
+import time
+
+from modules.constants import MAP_DIR_PATH, TOTAL_FLOORS
+from modules.floor_cache import load_compiled_floor
+from modules.game_state import GameState
+from modules.observation import (np, ACTIONS, CHANNEL_INDEX, N_CHANNELS, N_STATUS, PLAYER,
+                                 status_values, encode_status, action_mask_values)
+
+REWARD_FLOOR_CLEARED = 1.0  # フロアをクリアしたターンの報酬
+REWARD_GAME_OVER = -1.0  # HP が尽きたターンの報酬
+
+
+def max_map_shape(map_paths: list[str] | None = None) -> tuple[int, int]:
+    """ 遊ぶ可能性のある全マップが収まる (行数, 列数). map_paths が無ければ GameState が抽選する map00〜 """
+    if not map_paths:
+        map_paths = [MAP_DIR_PATH + f"map0{floor_id}.txt" for floor_id in range(TOTAL_FLOORS + 1)]
+    shapes = [(grid.n_rows, grid.n_cols) for grid in (load_compiled_floor(path).grid for path in map_paths)]
+    return max(shape[0] for shape in shapes), max(shape[1] for shape in shapes)
+
+
+class VectorEnv:
+    """
+    n_envs 個の独立したゲームを並べた環境
+    map_paths: 各ゲームで遊ぶフロア（GameState の requires_map_file_path）. None なら GameState のランダム抽選
+    seed: 最初のゲームのシード. 以降のゲーム（reset・終了後の自動 reset）は1ずつ増やしたシードで作る
+    max_turns: 1ゲームの最大ターン数（超えたら truncated）
+    obs_shape: 観測の (H, W). 省略時は遊ぶ可能性のあるマップの最大サイズ
+    """
+    def __init__(self, n_envs: int, map_paths: list[str] | None = None, seed: int = 0, max_turns: int = 1000,
+                 obs_shape: tuple[int, int] | None = None, vectorized_monsters: bool = False) -> None:
+        if np is None:
+            raise ImportError("VectorEnv には numpy が必要です。")
+        if n_envs < 1:
+            raise ValueError("n_envs は1以上にしてください。")
+        self.n_envs = n_envs
+        self.map_paths = list(map_paths) if map_paths else None
+        self.max_turns = max_turns
+        self.vectorized_monsters = vectorized_monsters
+        self.next_seed = seed
+        self.obs_shape = tuple(obs_shape) if obs_shape is not None else max_map_shape(self.map_paths)
+
+        n_rows, n_cols = self.obs_shape
+        self.grid = np.zeros((n_envs, N_CHANNELS, n_rows, n_cols), dtype=np.uint8)
+        self.status = np.zeros((n_envs, N_STATUS), dtype=np.float32)
+        self.action_mask = np.zeros((n_envs, len(ACTIONS)), dtype=bool)
+        self.rewards = np.zeros(n_envs, dtype=np.float32)
+        self.terminated = np.zeros(n_envs, dtype=bool)
+        self.truncated = np.zeros(n_envs, dtype=bool)
+
+        self.games: list[GameState] = []
+        self.seeds: list[int] = []
+        self.copied: list[tuple] = [(None, -1)] * n_envs  # grid[env] にコピーした (Floor, 観測の version)
+        self.env_indices = np.arange(n_envs)
+        self.player_rows = np.zeros(n_envs, dtype=np.int64)  # grid に player を立てたセル
+        self.player_cols = np.zeros(n_envs, dtype=np.int64)
+
+    def __repr__(self):
+        return f"VectorEnv(n_envs={self.n_envs}, obs_shape={self.obs_shape}, next_seed={self.next_seed})"
+
+    def _new_game(self, env: int) -> GameState:
+        seed = self.next_seed
+        self.next_seed += 1
+        self.seeds[env] = seed
+        return GameState(requires_map_file_path=self.map_paths or [], seed=seed, sinks=[],
+                         vectorized_monsters=self.vectorized_monsters)
+
+    def _start_floor(self, env: int, floor) -> None:
+        """ 環境 env のフロアが変わった時に観測を作り直す（マップ外は壁） """
+        n_rows, n_cols = floor.map_size
+        if n_rows > self.obs_shape[0] or n_cols > self.obs_shape[1]:
+            raise ValueError(f"マップ {floor.map_size} が観測の大きさ {self.obs_shape} に収まりません。")
+        grid = self.grid[env]
+        grid[:] = 0
+        grid[CHANNEL_INDEX['wall']] = 1
+        self.copied[env] = (floor, -1)
+
+    def _observe_all(self) -> None:
+        """
+        全環境の観測をバッファに書き込む
+        フロアの観測テンソル（Floor.observation_view）は前回のコピーから変わった環境だけコピーし、
+        プレイヤーのセルは全環境分を1回の代入で消して立て直す
+        """
+        grid = self.grid
+        envs = self.env_indices
+        grid[envs, PLAYER, self.player_rows, self.player_cols] = 0
+        statuses, masks = [], []
+        for env, game in enumerate(self.games):
+            floor, player = game.floor, game.player
+            copied_floor, copied_version = self.copied[env]
+            if copied_floor is not floor:
+                self._start_floor(env, floor)
+            view = floor.observation_view()
+            version = floor.observation.version
+            if version != copied_version:
+                n_rows, n_cols = floor.map_size
+                grid[env, :, :n_rows, :n_cols] = view
+                self.copied[env] = (floor, version)
+            self.player_rows[env], self.player_cols[env] = player.position
+            statuses.append(status_values(player, floor))
+            masks.append(action_mask_values(player, floor.grid))
+        grid[envs, PLAYER, self.player_rows, self.player_cols] = 1
+        self.status[:] = statuses
+        self.action_mask[:] = masks
+
+    def observation(self) -> dict:
+        return {'grid': self.grid, 'status': self.status, 'action_mask': self.action_mask}
+
+    # ===== Gym 風 API =====
+    def reset(self, seed: int | None = None) -> dict:
+        """ 全環境を新しいゲームで始め、観測を返す """
+        if seed is not None:
+            self.next_seed = seed
+        self.seeds = [0] * self.n_envs
+        self.games = [None] * self.n_envs
+        for env in range(self.n_envs):
+            self.games[env] = self._new_game(env)
+        self._observe_all()
+        return self.observation()
+
+    def step(self, actions) -> tuple[dict, 'np.ndarray', 'np.ndarray', 'np.ndarray', list[dict]]:
+        """
+        全環境を1ターン進める. actions: 長さ n_envs の行動番号（ACTIONS の添字）
+        返り値: (obs, rewards, terminated, truncated, infos)
+            terminated: ゲームクリア or ゲームオーバー. truncated: max_turns に達した
+            infos[env]: 終わった環境だけ {seed, turns, floors_cleared, won, final_status}
+        """
+        if not self.games:
+            raise RuntimeError("step の前に reset を呼んでください。")
+        actions = np.asarray(actions)
+        if actions.shape != (self.n_envs,):
+            raise ValueError(f"actions の形は ({self.n_envs},) にしてください: {actions.shape}")
+
+        infos: list[dict] = [{} for _ in range(self.n_envs)]
+        rewards, terminated, truncated = self.rewards, self.terminated, self.truncated
+        for env, action in enumerate(actions.tolist()):
+            game = self.games[env]
+            result = game.step(ACTIONS[action])
+            rewards[env] = (REWARD_FLOOR_CLEARED if result.floor_cleared else 0.0) + \
+                (REWARD_GAME_OVER if result.game_over else 0.0)
+            terminated[env] = result.game_over or result.game_cleared
+            truncated[env] = not terminated[env] and game.turn_count >= self.max_turns
+            if terminated[env] or truncated[env]:
+                infos[env] = {
+                    "seed": self.seeds[env],
+                    "turns": game.turn_count,
+                    "floors_cleared": game.cleared_count,
+                    "won": game.is_game_cleared,
+                    "final_status": encode_status(game.player, game.floor),
+                }
+                self.games[env] = self._new_game(env)
+        self._observe_all()
+        return self.observation(), rewards, terminated, truncated, infos
+
+
+# ==================== CLI（速度計測） ====================
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="VectorEnv をランダムな行動で回して速度を測る")
+    parser.add_argument("--envs", type=int, default=256, help="環境数")
+    parser.add_argument("--steps", type=int, default=200, help="step の呼び出し回数")
+    parser.add_argument("--maps", nargs="*", default=None, help="遊ぶフロア（既定: GameState のランダム抽選）")
+    parser.add_argument("--seed", type=int, default=0, help="最初のゲームのシード")
+    parser.add_argument("--max-turns", type=int, default=1000, help="1ゲームの最大ターン数")
+    args = parser.parse_args(argv)
+
+    env = VectorEnv(args.envs, map_paths=args.maps, seed=args.seed, max_turns=args.max_turns)
+    rng = np.random.default_rng(args.seed)
+    obs = env.reset()
+    episodes = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        # 行動マスクの中から一様に選ぶ（選べる行動が無い環境は 'w'. 壁にぶつかってターンだけ進む）
+        weights = rng.random(obs['action_mask'].shape) * obs['action_mask']
+        obs, rewards, terminated, truncated, infos = env.step(weights.argmax(axis=1))
+        episodes += int(terminated.sum() + truncated.sum())
+    elapsed = time.perf_counter() - start
+    transitions = args.envs * args.steps
+    print(f"{transitions} transitions in {elapsed:.2f}s ({transitions / elapsed:.0f}/s, "
+          f"{elapsed / args.steps * 1000:.2f} ms/step), episodes finished: {episodes}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
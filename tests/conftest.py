@@ -0,0 +1,14 @@
+# テスト共通設定. マップ・テキストは相対パス（map_data/, game_texts/）で読むので、リポジトリ直下で実行する
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+@pytest.fixture(autouse=True)
+def _run_in_repo_root(monkeypatch):
+    monkeypatch.chdir(ROOT_DIR)
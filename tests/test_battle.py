@@ -0,0 +1,40 @@
+import itertools
+
+from modules.battle import MONSTER_WINS, PLAYER_WINS, hit_events, resolve_battle
+
+
+def simulate(player_hp: int, player_attack: int, monster_hp: int, monster_attack: int):
+    """ 1撃ずつ殴り合う従来のループ（プレイヤーが先攻） """
+    player_hits = monster_hits = 0
+    while True:
+        monster_hp -= player_attack
+        player_hits += 1
+        if monster_hp <= 0:
+            return PLAYER_WINS, player_hits, monster_hits, player_hp, monster_hp
+        player_hp -= monster_attack
+        monster_hits += 1
+        if player_hp <= 0:
+            return MONSTER_WINS, player_hits, monster_hits, player_hp, monster_hp
+
+
+def test_resolve_battle_matches_hit_by_hit_loop():
+    for player_hp, player_attack, monster_hp, monster_attack in itertools.product(
+            (1, 7, 30, 100), (1, 3, 10, 25), (1, 9, 40), (0, 1, 6, 15)):
+        outcome = resolve_battle("M1", player_hp, player_attack, monster_hp, monster_attack)
+        expected = simulate(player_hp, player_attack, monster_hp, monster_attack)
+        assert (outcome.winner, outcome.player_hits, outcome.monster_hits,
+                outcome.player_hp, outcome.monster_hp) == expected
+
+
+def test_resolve_battle_without_damage_is_not_a_battle():
+    outcome = resolve_battle("M1", 10, 0, 10, 0)
+    assert outcome.winner is None and outcome.player_hits == 0 and outcome.monster_hits == 0
+
+
+def test_hit_events_expand_battle_event():
+    outcome = resolve_battle("M1", 20, 4, 10, 7)
+    events = list(hit_events(outcome.to_event().data))
+    assert [event.kind for event in events] == ["player_attack", "monster_attack", "player_attack",
+                                                 "monster_attack", "player_attack"]
+    assert events[-1].data["monster_hp"] == 0
+    assert events[-2].data["hp"] == 20 - 2 * 7
@@ -0,0 +1,121 @@
+import asyncio
+import random
+
+from modules.game_server import GameClient, GameServer, Session
+from modules.renderer import FloorRenderer
+
+MAPS = ["map_data/map01.txt"]
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 30))
+
+
+async def start_server(**kwargs) -> GameServer:
+    server = GameServer(port=0, map_paths=MAPS, seed=0, **kwargs)
+    await server.start()
+    return server
+
+
+def test_concurrent_sessions_are_independent():
+    async def scenario():
+        server = await start_server()
+        try:
+            clients = await asyncio.gather(*(GameClient.connect(port=server.port) for _ in range(8)))
+            assert len(server.sessions) == 8
+            assert all(client.start["type"] == "start" for client in clients)
+            assert len({client.start["session"] for client in clients}) == 8
+
+            # 1つのセッションだけ進めても他のセッションのターンは進まない
+            moves = await asyncio.gather(*(client.send("d") for client in clients[:4]))
+            assert all(message["type"] == "turn" and message["turn"] == 1 for message in moves)
+            message = await clients[4].send("s")
+            assert message["turn"] == 1
+
+            # 同じフロアの解析済みデータを全セッションで共有する
+            compiled = {id(session.game.floor.compiled) for session in server.sessions.values()}
+            assert compiled == {id(server.compiled_floors[MAPS[0]])}
+            for client in clients:
+                await client.close()
+        finally:
+            await server.close()
+    run(scenario())
+
+
+def test_invalid_command_returns_error_and_keeps_session():
+    async def scenario():
+        server = await start_server()
+        try:
+            client = await GameClient.connect(port=server.port)
+            message = await client.send("x")
+            assert message["type"] == "error"
+            message = await client.send("w")
+            assert message["type"] == "turn" and message["turn"] == 1
+            await client.close()
+        finally:
+            await server.close()
+    run(scenario())
+
+
+def test_quit_ends_session():
+    async def scenario():
+        server = await start_server()
+        try:
+            client = await GameClient.connect(port=server.port)
+            message = await client.send("q")
+            assert message["type"] == "turn" and message["state"] == "over"
+            assert await client.reader.readline() == b""  # サーバが切断する
+            await asyncio.sleep(0)
+            assert server.sessions == {}
+            await client.close()
+        finally:
+            await server.close()
+    run(scenario())
+
+
+def test_idle_session_is_evicted():
+    async def scenario():
+        server = await start_server(idle_timeout=0.2)
+        try:
+            idle = await GameClient.connect(port=server.port)
+            active = await GameClient.connect(port=server.port)
+            for _ in range(4):
+                await asyncio.sleep(0.1)
+                assert (await active.send("w"))["type"] == "turn"
+            message = await idle.receive()
+            assert message == {"type": "evicted", "idle_timeout": 0.2}
+            assert await idle.reader.readline() == b""
+            assert len(server.sessions) == 1
+            await idle.close()
+            await active.close()
+        finally:
+            await server.close()
+    run(scenario())
+
+
+def test_max_sessions_rejects_extra_clients():
+    async def scenario():
+        server = await start_server(max_sessions=1)
+        try:
+            first = await GameClient.connect(port=server.port)
+            second = await GameClient.connect(port=server.port)
+            assert first.start["type"] == "start"
+            assert second.start["type"] == "error"
+            await first.close()
+            await second.close()
+        finally:
+            await server.close()
+    run(scenario())
+
+
+def test_session_screen_matches_full_render():
+    session = Session(1, ["map_data/map04.txt"], seed=3)
+    session.game.player.hp = 10 ** 9
+    rng = random.Random(3)
+    for _ in range(40):
+        message = session.handle(rng.choice('wasd'))
+        if message["state"] != "playing":
+            break
+        game = session.game
+        frame = FloorRenderer(game.floor).render(game.player.position)
+        assert message["screen"].startswith(frame)
@@ -0,0 +1,107 @@
+import pytest
+
+from modules.constants import DIRECTIONS
+from modules.game_state import GameState
+
+MAP = "map_data/map01.txt"
+
+
+def new_game(seed: int = 0) -> GameState:
+    return GameState(requires_map_file_path=[MAP], seed=seed, sinks=[])
+
+
+def open_and_blocked_directions(game: GameState) -> tuple[list[str], list[str]]:
+    row, col = game.player.position
+    open_directions, blocked = [], []
+    for command, (dr, dc) in DIRECTIONS.items():
+        (open_directions if game.floor.grid.is_passable(row + dr, col + dc) else blocked).append(command)
+    return open_directions, blocked
+
+
+def test_step_rejects_unknown_command():
+    game = new_game()
+    with pytest.raises(ValueError):
+        game.step('x')
+    assert game.turn_count == 0 and game.commands == []
+
+
+def test_step_moves_player_and_records_command():
+    game = new_game()
+    start = game.player.position
+    open_directions, _ = open_and_blocked_directions(game)
+    command = open_directions[0]
+    result = game.step(command)
+    dr, dc = DIRECTIONS[command]
+    assert result.moved and result.turn == 1
+    assert game.player.position == (start[0] + dr, start[1] + dc)
+    assert game.commands == [command]
+
+
+def test_step_blocked_move_keeps_position():
+    game = new_game()
+    start = game.player.position
+    _, blocked = open_and_blocked_directions(game)
+    result = game.step(blocked[0])
+    assert not result.moved
+    assert game.player.position == start
+    assert [event.kind for event in result.events] == ["blocked"]
+
+
+def test_step_potion_without_potions():
+    game = new_game()
+    result = game.step('u')
+    assert [event.kind for event in result.events] == ["no_potion"]
+    assert result.hp_delta == 0
+
+
+def test_step_quit_ends_game():
+    game = new_game()
+    result = game.step('q')
+    assert result.game_over
+    assert not game.game_state()
+
+
+def play(game: GameState, commands: str) -> list:
+    return [(game.step(command).hp_delta, game.player.position, game.player.hp) for command in commands]
+
+
+def state_of(game: GameState) -> tuple:
+    floor = game.floor
+    return (game.turn_count, game.cleared_count, game.player.position, game.player.hp,
+            sorted(game.player.inventory), game.rng.getstate(), floor.rng.getstate(),
+            sorted((monster.id, monster.pos, monster.hp, monster.alive) for monster in floor.monsters.values()),
+            sorted(item.id for item in floor.items.values() if item.picked),
+            {pos: sorted(monster.id for monster in monsters) for pos, monsters in floor.monsters_at.items()})
+
+
+COMMANDS = "ddssaawwddsdsdsaawdsuwddssdd" * 3
+
+
+def test_clone_evolves_like_original():
+    game = new_game(seed=5)
+    play(game, "ds")
+    copy = game.clone()
+    assert state_of(copy) == state_of(game)
+    assert play(copy, COMMANDS) == play(game, COMMANDS)
+    assert state_of(copy) == state_of(game)
+
+
+def test_clone_is_independent():
+    game = new_game(seed=5)
+    before = state_of(game)
+    copy = game.clone()
+    play(copy, COMMANDS)
+    assert state_of(game) == before
+    assert game.commands == []
+
+
+def test_restore_returns_to_snapshot():
+    game = new_game(seed=9)
+    play(game, "dd")
+    snapshot = game.snapshot()
+    saved = state_of(game)
+    expected = play(game, COMMANDS)
+    for _ in range(2):  # 同じ snapshot に何度でも戻れる
+        game.restore(snapshot)
+        assert state_of(game) == saved
+        assert play(game, COMMANDS) == expected
@@ -0,0 +1,16 @@
+import glob
+
+from modules.map_linter import ERROR, WARNING, lint_files
+
+
+def test_shipped_maps_lint_and_solve_without_errors():
+    map_files = sorted(glob.glob("map_data/map0*.txt"))
+    for map_file, issues in zip(map_files, lint_files(map_files, solve=True)):
+        assert [issue for issue in issues if issue.level == ERROR] == [], map_file
+
+
+def test_key_from_moving_monster_is_a_warning():
+    # map04 のゴールの鍵は動く monster_02 が落とす. 解法探索では判定できないがクリアはできる
+    [issues] = lint_files(["map_data/map04.txt"], solve=True)
+    assert [issue.level for issue in issues] == [WARNING]
+    assert "monster_02" in issues[0].message
@@ -0,0 +1,21 @@
+import random
+
+import pytest
+
+from modules.game_state import GameState
+from modules.renderer import FloorRenderer
+
+
+@pytest.mark.parametrize("full_width", [True, False])
+@pytest.mark.parametrize("map_file_path, seed", [("map_data/map04.txt", 3), ("map_data/map08.txt", 1)])
+def test_incremental_render_matches_full_render(map_file_path, seed, full_width):
+    game = GameState(requires_map_file_path=[map_file_path], seed=seed, sinks=[])
+    game.player.hp = 10 ** 9  # 途中で終わらないようにする
+    renderer = game.floor.get_renderer(full_width)  # Floor が変わったセルを dirty_cells に積む
+    rng = random.Random(seed)
+    for _ in range(60):
+        game.step(rng.choice('wasd'))
+        if game.is_game_cleared:
+            break
+        position = game.player.position
+        assert renderer.render(position) == FloorRenderer(game.floor, full_width).render(position)
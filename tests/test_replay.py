@@ -0,0 +1,41 @@
+import random
+
+from modules.game_state import GameState
+from modules.replay import Replay, load_replays, run_replay, save_replay, summarize, verify_replay
+
+
+def play_random(seed: int, maps: list[str] | None = None, turns: int = 300) -> GameState:
+    rng = random.Random(seed)
+    game = GameState(requires_map_file_path=maps or [], seed=seed, sinks=[])
+    while game.game_state() and game.turn_count < turns:
+        game.step(rng.choice('wasdu'))
+    return game
+
+
+def test_same_seed_and_commands_reproduce_game():
+    for seed in range(5):
+        game = play_random(seed)
+        replay = Replay.from_game(game)
+        assert verify_replay(replay) == (True, summarize(game))
+        assert run_replay(replay).commands == game.commands
+
+
+def test_fixed_maps_replay():
+    game = play_random(7, maps=["map_data/map04.txt", "map_data/map06.txt"])
+    assert verify_replay(Replay.from_game(game))[0]
+
+
+def test_replay_round_trips_through_file(tmp_path):
+    path = str(tmp_path / "replays.jsonl")
+    replays = [Replay.from_game(play_random(seed, turns=50)) for seed in range(3)]
+    for replay in replays:
+        save_replay(replay, path)
+    loaded = list(load_replays(path))
+    assert [(r.seed, r.commands, r.maps, r.result) for r in loaded] == \
+           [(r.seed, r.commands, r.maps, r.result) for r in replays]
+
+
+def test_mismatching_result_is_detected():
+    replay = Replay.from_game(play_random(3, turns=50))
+    replay.result = {**replay.result, "hp": replay.result["hp"] + 1}
+    assert not verify_replay(replay)[0]
@@ -0,0 +1,31 @@
+import pytest
+
+from modules.game_state import GameState
+from modules.solver import SOLVED, UNDETERMINED, solve_map_file
+
+SOLVABLE_MAPS = [f"map_data/map0{i}.txt" for i in (0, 1, 2, 3, 5, 6, 7, 8)]
+
+
+@pytest.mark.parametrize("map_file_path", SOLVABLE_MAPS)
+def test_solution_clears_floor_in_game(map_file_path):
+    result = solve_map_file(map_file_path)
+    assert result.status == SOLVED and result.solvable and result.commands
+
+    game = GameState(requires_map_file_path=[map_file_path], seed=0, sinks=[])
+    game.player.hp = 10 ** 9  # 戦闘で倒れないようにする（経路そのものを確かめる）
+    for command in result.commands[:-1]:
+        assert not game.step(command).floor_cleared
+    assert game.step(result.commands[-1]).floor_cleared
+    assert game.is_game_cleared
+
+
+def test_key_only_dropped_by_moving_monster_is_undetermined():
+    result = solve_map_file("map_data/map04.txt")  # 実際には monster_02 を倒せばクリアできる
+    assert result.status == UNDETERMINED and not result.solvable
+    assert result.missing_keys == ["key"]
+    assert "key" in result.mobile_drops
+
+
+def test_truncated_search_is_undetermined():
+    result = solve_map_file("map_data/map03.txt", max_states=2)
+    assert result.status == UNDETERMINED
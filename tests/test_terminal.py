@@ -0,0 +1,37 @@
+import io
+
+from modules.game_state import GameState
+from modules.terminal import AnsiTerminal
+
+
+class CountingStream(io.StringIO):
+    """ write の回数を数える """
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        self.writes += 1
+        return super().write(text)
+
+
+def test_ansi_terminal_sends_one_write_per_turn(monkeypatch):
+    monkeypatch.setenv("COLUMNS", "200")
+    monkeypatch.setenv("LINES", "100")
+    stream = CountingStream()
+    terminal = AnsiTerminal(stream)
+    game = GameState(requires_map_file_path=["map_data/map01.txt"], seed=0, terminal=terminal)
+    for command in "ddwwasdsr" * 3:
+        before = stream.writes
+        game.step_turn(command)  # 描画 -> step -> イベント出力
+        assert stream.writes - before == 1
+
+
+def test_ansi_terminal_writes_final_messages(monkeypatch):
+    monkeypatch.setenv("COLUMNS", "200")
+    monkeypatch.setenv("LINES", "100")
+    stream = CountingStream()
+    terminal = AnsiTerminal(stream)
+    game = GameState(requires_map_file_path=["map_data/map01.txt"], seed=0, terminal=terminal)
+    game.step_turn('q')
+    assert stream.getvalue().endswith("ゲーム終了します。\n")